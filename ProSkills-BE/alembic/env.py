@@ -37,9 +37,9 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-# from backend.models import Base  # або твій шлях до моделей
-# target_metadata = Base.metadata
-target_metadata = None
+from backend.models import Base  # noqa: E402
+
+target_metadata = Base.metadata
 
 
 # other values from the config, defined by the needs of env.py,
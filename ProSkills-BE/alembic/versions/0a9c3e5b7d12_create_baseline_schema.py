@@ -0,0 +1,206 @@
+"""create the baseline schema
+
+Revision ID: 0a9c3e5b7d12
+Revises:
+Create Date: 2026-10-15 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9c3e5b7d12'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tables as they were before the first migration; databases that were
+    # created with create_all already have them, hence if_not_exists
+    op.create_table(
+        'our_users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.Column('reset_token', sa.String(), nullable=True),
+        sa.Column('reset_token_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_our_users_email'), 'our_users', ['email'], unique=True, if_not_exists=True)
+    op.create_index(op.f('ix_our_users_id'), 'our_users', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'courses',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('lessons_count', sa.Integer(), nullable=False),
+        sa.Column('lessons_duration', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('ratings_count', sa.Integer(), nullable=False),
+        sa.Column('files', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['teacher_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_courses_id'), 'courses', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'course_progress',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('completed_assignments', sa.Integer(), nullable=False),
+        sa.Column('total_assignments', sa.Integer(), nullable=False),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_course_progress_id'), 'course_progress', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'enrollment',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'course_id'),
+        sa.UniqueConstraint('user_id', 'course_id', name='_user_course_uc'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'ratings',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_ratings_id'), 'ratings', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_reviews_id'), 'reviews', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'sections',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_sections_id'), 'sections', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'assignments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('section_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('due_date', sa.DateTime(), nullable=True),
+        sa.Column('teacher_comments', sa.String(), nullable=False),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('is_completed', sa.Boolean(), nullable=False),
+        sa.Column('submission_type', sa.String(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['section_id'], ['sections.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_assignments_id'), 'assignments', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'assignment_progress',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('submission_file_key', sa.String(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=True),
+        sa.Column('feedback', sa.String(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_assignment_progress_id'), 'assignment_progress', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'comments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.Column('comment_text', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['our_users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(op.f('ix_comments_id'), 'comments', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_comments_id'), table_name='comments', if_exists=True)
+    op.drop_table('comments', if_exists=True)
+    op.drop_index(op.f('ix_assignment_progress_id'), table_name='assignment_progress', if_exists=True)
+    op.drop_table('assignment_progress', if_exists=True)
+    op.drop_index(op.f('ix_assignments_id'), table_name='assignments', if_exists=True)
+    op.drop_table('assignments', if_exists=True)
+    op.drop_index(op.f('ix_sections_id'), table_name='sections', if_exists=True)
+    op.drop_table('sections', if_exists=True)
+    op.drop_index(op.f('ix_reviews_id'), table_name='reviews', if_exists=True)
+    op.drop_table('reviews', if_exists=True)
+    op.drop_index(op.f('ix_ratings_id'), table_name='ratings', if_exists=True)
+    op.drop_table('ratings', if_exists=True)
+    op.drop_table('enrollment', if_exists=True)
+    op.drop_index(op.f('ix_course_progress_id'), table_name='course_progress', if_exists=True)
+    op.drop_table('course_progress', if_exists=True)
+    op.drop_index(op.f('ix_courses_id'), table_name='courses', if_exists=True)
+    op.drop_table('courses', if_exists=True)
+    op.drop_index(op.f('ix_our_users_id'), table_name='our_users', if_exists=True)
+    op.drop_index(op.f('ix_our_users_email'), table_name='our_users', if_exists=True)
+    op.drop_table('our_users', if_exists=True)
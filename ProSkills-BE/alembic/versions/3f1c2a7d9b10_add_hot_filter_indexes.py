@@ -0,0 +1,40 @@
+"""add indexes for hot admin filters
+
+Revision ID: 3f1c2a7d9b10
+Revises: 0a9c3e5b7d12
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: Union[str, None] = '0a9c3e5b7d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_enrollment_course_id', 'enrollment', ['course_id'], if_not_exists=True)
+    op.create_index('ix_courses_teacher_id', 'courses', ['teacher_id'], if_not_exists=True)
+    op.create_index('ix_our_users_role', 'our_users', ['role'], if_not_exists=True)
+    op.create_index(
+        'ix_assignment_progress_completed',
+        'assignment_progress',
+        ['assignment_id', 'student_id'],
+        postgresql_where=sa.text("status IN ('completed', 'graded')"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_assignment_progress_completed', table_name='assignment_progress', if_exists=True)
+    op.drop_index('ix_our_users_role', table_name='our_users', if_exists=True)
+    op.drop_index('ix_courses_teacher_id', table_name='courses', if_exists=True)
+    op.drop_index('ix_enrollment_course_id', table_name='enrollment', if_exists=True)
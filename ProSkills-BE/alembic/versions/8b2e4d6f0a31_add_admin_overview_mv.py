@@ -0,0 +1,70 @@
+"""add admin overview materialized view
+
+Revision ID: 8b2e4d6f0a31
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f0a31'
+down_revision: Union[str, None] = '3f1c2a7d9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One CTE per table so the counts don't multiply into a Cartesian product
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS admin_overview_mv AS
+        WITH users AS (
+            SELECT
+                count(*) FILTER (WHERE role = 'student') AS students,
+                count(*) FILTER (WHERE role = 'teacher') AS teachers,
+                count(*) FILTER (WHERE role = 'admin') AS admins
+            FROM our_users
+        ),
+        courses AS (
+            SELECT count(*) AS courses FROM courses
+        ),
+        assignments AS (
+            SELECT count(*) AS assignments FROM assignments
+        ),
+        enrollments AS (
+            SELECT
+                count(*) AS enrollments,
+                count(DISTINCT course_id) AS active_courses
+            FROM enrollment
+        ),
+        completions AS (
+            SELECT count(*) AS completed_assignments
+            FROM assignment_progress
+            WHERE status IN ('completed', 'graded')
+        )
+        SELECT
+            1 AS id,
+            users.students,
+            users.teachers,
+            users.admins,
+            courses.courses,
+            assignments.assignments,
+            enrollments.enrollments,
+            enrollments.active_courses,
+            completions.completed_assignments
+        FROM users, courses, assignments, enrollments, completions
+        """
+    )
+    # REFRESH ... CONCURRENTLY requires a unique index on the view
+    op.create_index('ix_admin_overview_mv_id', 'admin_overview_mv', ['id'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS admin_overview_mv")
@@ -0,0 +1,41 @@
+"""add generated completion_percentage to course_progress
+
+Revision ID: a2b4c6d8e0f1
+Revises: f3c6d8e2a175
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2b4c6d8e0f1'
+down_revision: Union[str, None] = 'f3c6d8e2a175'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'course_progress',
+        sa.Column(
+            'completion_percentage',
+            sa.Numeric(5, 2),
+            sa.Computed(
+                "CASE WHEN total_assignments > 0"
+                " THEN round(completed_assignments * 100.0 / total_assignments, 2)"
+                " ELSE 0 END",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('course_progress', 'completion_percentage')
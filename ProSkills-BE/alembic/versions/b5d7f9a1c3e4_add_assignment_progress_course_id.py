@@ -0,0 +1,53 @@
+"""add course_id to assignment_progress
+
+Revision ID: b5d7f9a1c3e4
+Revises: a2b4c6d8e0f1
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d7f9a1c3e4'
+down_revision: Union[str, None] = 'a2b4c6d8e0f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('assignment_progress', sa.Column('course_id', sa.Integer(), nullable=True))
+    # Backfill from the assignment each row belongs to
+    op.execute(
+        """
+        UPDATE assignment_progress ap
+        SET course_id = a.course_id
+        FROM assignments a
+        WHERE ap.assignment_id = a.id
+        """
+    )
+    op.alter_column('assignment_progress', 'course_id', nullable=False)
+    op.create_foreign_key(
+        'assignment_progress_course_id_fkey',
+        'assignment_progress',
+        'courses',
+        ['course_id'],
+        ['id'],
+    )
+    op.create_index(
+        op.f('ix_assignment_progress_course_id'),
+        'assignment_progress',
+        ['course_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_assignment_progress_course_id'), table_name='assignment_progress')
+    op.drop_constraint('assignment_progress_course_id_fkey', 'assignment_progress', type_='foreignkey')
+    op.drop_column('assignment_progress', 'course_id')
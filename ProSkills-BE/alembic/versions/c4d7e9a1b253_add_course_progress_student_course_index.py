@@ -0,0 +1,33 @@
+"""add composite index on course_progress (student_id, course_id)
+
+Revision ID: c4d7e9a1b253
+Revises: 8b2e4d6f0a31
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e9a1b253'
+down_revision: Union[str, None] = '8b2e4d6f0a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_course_progress_student_course',
+        'course_progress',
+        ['student_id', 'course_id'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_course_progress_student_course', table_name='course_progress', if_exists=True)
@@ -0,0 +1,52 @@
+"""add unique (user_id, course_id) and (course_id, created_at) indexes to reviews
+
+Revision ID: c6e8a0b2d4f5
+Revises: b5d7f9a1c3e4
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e8a0b2d4f5'
+down_revision: Union[str, None] = 'b5d7f9a1c3e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Racing requests may have left a user with two reviews of a course;
+    # keep the newest one
+    op.execute(
+        """
+        DELETE FROM reviews a
+        USING reviews b
+        WHERE a.user_id = b.user_id
+          AND a.course_id = b.course_id
+          AND a.id < b.id
+        """
+    )
+    op.create_index(
+        'ux_reviews_user_course',
+        'reviews',
+        ['user_id', 'course_id'],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_reviews_course_created',
+        'reviews',
+        ['course_id', 'created_at'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_course_created', table_name='reviews', if_exists=True)
+    op.drop_index('ux_reviews_user_course', table_name='reviews', if_exists=True)
@@ -0,0 +1,29 @@
+"""drop ix_reviews_id, which duplicates the reviews primary key index
+
+Revision ID: d7f9b1c3e5a6
+Revises: c6e8a0b2d4f5
+Create Date: 2026-10-15 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f9b1c3e5a6'
+down_revision: Union[str, None] = 'c6e8a0b2d4f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # reviews_pkey already indexes id; the extra index only slows down writes
+    op.drop_index('ix_reviews_id', table_name='reviews', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_reviews_id', 'reviews', ['id'], if_not_exists=True)
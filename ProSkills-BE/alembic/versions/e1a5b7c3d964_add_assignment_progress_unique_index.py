@@ -0,0 +1,48 @@
+"""add unique index on assignment_progress (student_id, assignment_id)
+
+Revision ID: e1a5b7c3d964
+Revises: c4d7e9a1b253
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a5b7c3d964'
+down_revision: Union[str, None] = 'c4d7e9a1b253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Older rows may repeat a (student, assignment) pair; keep the newest one
+    op.execute(
+        """
+        DELETE FROM assignment_progress a
+        USING assignment_progress b
+        WHERE a.student_id = b.student_id
+          AND a.assignment_id = b.assignment_id
+          AND a.id < b.id
+        """
+    )
+    op.create_index(
+        'ux_assignment_progress_student_assignment',
+        'assignment_progress',
+        ['student_id', 'assignment_id'],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ux_assignment_progress_student_assignment',
+        table_name='assignment_progress',
+        if_exists=True,
+    )
@@ -0,0 +1,42 @@
+"""replace ix_reviews_course_created with (course_id, created_at, id)
+
+Revision ID: e8a0c2d4f6b7
+Revises: d7f9b1c3e5a6
+Create Date: 2026-10-15 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a0c2d4f6b7'
+down_revision: Union[str, None] = 'd7f9b1c3e5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pages seek on (created_at, id) > cursor; with id in the index the whole
+    # row comparison is an index condition
+    op.create_index(
+        'ix_reviews_course_created_id',
+        'reviews',
+        ['course_id', 'created_at', 'id'],
+        if_not_exists=True,
+    )
+    op.drop_index('ix_reviews_course_created', table_name='reviews', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_reviews_course_created',
+        'reviews',
+        ['course_id', 'created_at'],
+        if_not_exists=True,
+    )
+    op.drop_index('ix_reviews_course_created_id', table_name='reviews', if_exists=True)
@@ -0,0 +1,51 @@
+"""make the course_progress (student_id, course_id) index unique
+
+Revision ID: f3c6d8e2a175
+Revises: e1a5b7c3d964
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c6d8e2a175'
+down_revision: Union[str, None] = 'e1a5b7c3d964'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Older rows may repeat a (student, course) pair; keep the newest one
+    op.execute(
+        """
+        DELETE FROM course_progress a
+        USING course_progress b
+        WHERE a.student_id = b.student_id
+          AND a.course_id = b.course_id
+          AND a.id < b.id
+        """
+    )
+    op.create_index(
+        'ux_course_progress_student_course',
+        'course_progress',
+        ['student_id', 'course_id'],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.drop_index('ix_course_progress_student_course', table_name='course_progress', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_course_progress_student_course',
+        'course_progress',
+        ['student_id', 'course_id'],
+        if_not_exists=True,
+    )
+    op.drop_index('ux_course_progress_student_course', table_name='course_progress', if_exists=True)
@@ -0,0 +1,77 @@
+"""add refreshed_at to the admin overview materialized view
+
+Revision ID: f9b1d3e5a7c8
+Revises: e8a0c2d4f6b7
+Create Date: 2026-10-15 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9b1d3e5a7c8'
+down_revision: Union[str, None] = 'e8a0c2d4f6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_view(extra_columns: str = "") -> None:
+    # Same counts as in 8b2e4d6f0a31; a view can't gain a column in place
+    op.execute(
+        f"""
+        CREATE MATERIALIZED VIEW admin_overview_mv AS
+        WITH users AS (
+            SELECT
+                count(*) FILTER (WHERE role = 'student') AS students,
+                count(*) FILTER (WHERE role = 'teacher') AS teachers,
+                count(*) FILTER (WHERE role = 'admin') AS admins
+            FROM our_users
+        ),
+        courses AS (
+            SELECT count(*) AS courses FROM courses
+        ),
+        assignments AS (
+            SELECT count(*) AS assignments FROM assignments
+        ),
+        enrollments AS (
+            SELECT
+                count(*) AS enrollments,
+                count(DISTINCT course_id) AS active_courses
+            FROM enrollment
+        ),
+        completions AS (
+            SELECT count(*) AS completed_assignments
+            FROM assignment_progress
+            WHERE status IN ('completed', 'graded')
+        )
+        SELECT
+            1 AS id,
+            users.students,
+            users.teachers,
+            users.admins,
+            courses.courses,
+            assignments.assignments,
+            enrollments.enrollments,
+            enrollments.active_courses,
+            completions.completed_assignments{extra_columns}
+        FROM users, courses, assignments, enrollments, completions
+        """
+    )
+    op.create_index('ix_admin_overview_mv_id', 'admin_overview_mv', ['id'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # now() is evaluated on every REFRESH, so readers can tell a view that
+    # is no longer being refreshed (no celery beat running) from a fresh one
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS admin_overview_mv")
+    _create_view(",\n            now() AS refreshed_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS admin_overview_mv")
+    _create_view()
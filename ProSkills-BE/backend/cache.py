@@ -0,0 +1,204 @@
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+import orjson
+import redis
+
+from backend.config import RedisSettings
+
+# Keys for cached admin statistics
+ADMIN_OVERVIEW_KEY = "admin:overview:v1"
+ADMIN_COURSES_DETAILED_KEY = "admin:courses_detailed:v1"
+
+# Admin dashboards tolerate slightly stale numbers
+ADMIN_STATS_TTL = 45
+
+# Course catalog and course pages, cached per viewer
+COURSES_KEY_PREFIX = "courses:v1"
+COURSES_TTL = 60
+
+# Task file listings, read from S3 for every assignment in a response
+TASK_FILES_KEY_PREFIX = "task_files:v1"
+TASK_FILES_TTL = 30
+
+# Course review pages requested without a cursor; dropped on every review write
+REVIEWS_KEY_PREFIX = "reviews:v1"
+REVIEWS_TTL = 300
+
+# Groups of keys are invalidated by bumping a version counter folded into
+# the keys instead of SCANning for them; entries under an old version are
+# never read again and expire with their TTL. The counters outlive every
+# cached entry by far, so one that expires and restarts from zero cannot
+# resurrect a stale entry.
+VERSION_KEY_PREFIX = "cache_ver"
+VERSION_TTL = 24 * 60 * 60
+
+# Initialize Redis settings
+redis_settings = RedisSettings()
+
+# Make Redis client optional
+redis_client = None
+try:
+    redis_client = redis.Redis(
+        host=redis_settings.REDIS_HOST,
+        port=redis_settings.REDIS_PORT,
+        password=redis_settings.REDIS_PASSWORD,
+        decode_responses=True,
+    )
+    # Test the connection
+    redis_client.ping()
+except (redis.ConnectionError, redis.AuthenticationError, Exception):
+    print("Warning: Redis not available. Response caching will be disabled.")
+    redis_client = None
+
+
+def dumps(value: Any) -> bytes:
+    # orjson writes datetimes as ISO 8601 and, like json, accepts int dict keys
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def get_cached(key: str) -> Optional[Any]:
+    if redis_client:
+        try:
+            value = redis_client.get(key)
+        except redis.RedisError:
+            return None
+        if value is not None:
+            return orjson.loads(value)
+    return None
+
+
+def set_cached(key: str, value: Any, ttl: int = ADMIN_STATS_TTL) -> None:
+    if redis_client:
+        try:
+            redis_client.setex(key, ttl, dumps(value))
+        except redis.RedisError:
+            pass
+
+
+def invalidate(*keys: str) -> None:
+    if redis_client and keys:
+        try:
+            redis_client.delete(*keys)
+        except redis.RedisError:
+            pass
+
+
+def _version_key(namespace: str) -> str:
+    return f"{VERSION_KEY_PREFIX}:{namespace}"
+
+
+def get_versions(*namespaces: str) -> str:
+    """Current versions of the namespaces, joined for use inside a cache key."""
+    if not redis_client:
+        return "0"
+    try:
+        versions = redis_client.mget([_version_key(ns) for ns in namespaces])
+    except redis.RedisError:
+        return "0"
+    return ".".join(version or "0" for version in versions)
+
+
+def bump_versions(*namespaces: str) -> None:
+    """Invalidate every key built with these namespaces in one round trip."""
+    if redis_client and namespaces:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for ns in namespaces:
+                pipe.incr(_version_key(ns))
+                pipe.expire(_version_key(ns), VERSION_TTL)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+
+def admin_courses_detailed_key(last_updated: Any, course_count: int, skip: int, limit: int) -> str:
+    version = get_versions("admin_courses")
+    return f"{ADMIN_COURSES_DETAILED_KEY}:{version}:{last_updated}:{course_count}:{skip}:{limit}"
+
+
+def invalidate_admin_stats() -> None:
+    """Drop cached admin statistics after a write that changes them."""
+    invalidate(ADMIN_OVERVIEW_KEY)
+    bump_versions("admin_courses")
+
+
+def course_list_key(user_id: Optional[int]) -> str:
+    user_id = user_id or 0
+    version = get_versions("courses", f"courses:u{user_id}")
+    return f"{COURSES_KEY_PREFIX}:list:{version}:u{user_id}"
+
+
+def course_detail_key(course_id: int, user_id: Optional[int]) -> str:
+    user_id = user_id or 0
+    version = get_versions("courses", f"courses:u{user_id}")
+    return f"{COURSES_KEY_PREFIX}:detail:{course_id}:{version}:u{user_id}"
+
+
+def invalidate_courses(*user_ids: int) -> None:
+    """
+    Drop cached course responses.
+
+    With user ids only those users' entries go (enrollment or progress
+    changed); without any every viewer's entries go (a course changed).
+    """
+    if user_ids:
+        bump_versions(*(f"courses:u{user_id}" for user_id in user_ids))
+    else:
+        bump_versions("courses")
+
+
+def task_files_key(assignment_id: int) -> str:
+    return f"{TASK_FILES_KEY_PREFIX}:{assignment_id}"
+
+
+def invalidate_task_files(assignment_id: int) -> None:
+    """Drop the cached task file listing after files of an assignment change."""
+    invalidate(task_files_key(assignment_id))
+
+
+def course_reviews_key(course_id: int, skip: int, limit: int) -> str:
+    version = get_versions(f"reviews:{course_id}")
+    return f"{REVIEWS_KEY_PREFIX}:{course_id}:{version}:{skip}:{limit}"
+
+
+def invalidate_course_reviews(course_id: int) -> None:
+    """Drop cached review pages of a course after one of its reviews changes."""
+    bump_versions(f"reviews:{course_id}")
+
+
+class TTLCache:
+    """
+    Small in-process cache for lookups that hardly ever change.
+
+    Unlike the Redis helpers above it is per worker process and costs no
+    round trip; entries expire after ttl seconds, and the whole cache is
+    dropped when it reaches maxsize.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                self._data.clear()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
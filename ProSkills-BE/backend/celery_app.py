@@ -3,12 +3,21 @@ import os
 from asgiref.sync import async_to_sync
 from celery import Celery
 
+from backend.constants import ADMIN_OVERVIEW_MV_REFRESH_INTERVAL
+
 celery_app = Celery(
     "my_app",
     broker=os.getenv("REDIS_URL", "redis://redis:6379/0"),
     backend=os.getenv("REDIS_URL", "redis://redis:6379/0"),
 )
 
+celery_app.conf.beat_schedule = {
+    "refresh-admin-overview-mv": {
+        "task": "backend.celery_app.refresh_admin_overview_mv_task",
+        "schedule": float(ADMIN_OVERVIEW_MV_REFRESH_INTERVAL),
+    },
+}
+
 
 @celery_app.task
 def send_reset_password_email_task(email: str, token: str):
@@ -17,3 +26,17 @@ def send_reset_password_email_task(email: str, token: str):
     )
 
     async_to_sync(send_reset_password_email)(email, token)
+
+
+@celery_app.task
+def refresh_admin_overview_mv_task():
+    from sqlalchemy import text
+
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY admin_overview_mv"))
+        db.commit()
+    finally:
+        db.close()
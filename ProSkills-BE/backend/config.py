@@ -10,6 +10,23 @@ class DatabaseSettings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_DB: str
     POSTGRES_HOST: str
+    # Connection pools per worker process. Each worker holds a sync and an
+    # async pool, so keep
+    #   (DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW)
+    #   * number of workers
+    # below Postgres' max_connections (30 + 8 = 38 per worker by default).
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    # The async pool only serves the review handlers, so it stays small
+    DB_ASYNC_POOL_SIZE: int = 5
+    DB_ASYNC_MAX_OVERFLOW: int = 3
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    # Behind PgBouncer in transaction mode let the bouncer do the pooling
+    DB_USE_NULL_POOL: bool = False
+    # The schema is managed by Alembic (run at deploy); create_all on startup
+    # is only a shortcut for throwaway local databases
+    DB_AUTO_CREATE_TABLES: bool = False
 
 
 class RedisSettings(BaseSettings):
@@ -22,6 +39,10 @@ class AWSSettings(BaseSettings):
     ACCESS_KEY_ID: str
     SECRET_ACCESS_KEY: str
     BUCKET_NAME: str = "files-for-team-project" 
+    # Redirect downloads to a pre-signed S3 URL instead of proxying the bytes.
+    # Needs a CORS rule on the bucket for the frontend origin.
+    S3_PRESIGNED_DOWNLOADS: bool = False
+    S3_PRESIGNED_URL_EXPIRES: int = 300  # seconds
 
 
 class AppSettings(DatabaseSettings, RedisSettings, AWSSettings):
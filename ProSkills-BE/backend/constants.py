@@ -10,4 +10,28 @@ SUPPORTED_IMAGE_TYPES = [
     "image/png", 
     "image/gif", 
     "image/webp"
-] 
\ No newline at end of file
+] 
+# File storage upload limits
+MAX_UPLOAD_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+# Whole multipart request: the file plus the other form fields and framing
+MAX_UPLOAD_REQUEST_SIZE = MAX_UPLOAD_FILE_SIZE + 1024 * 1024
+
+# Largest WebSocket command accepted from a client; commands are tiny JSON objects.
+# Keep uvicorn's --ws-max-size (Dockerfile, start.sh) in step with it
+WS_MAX_MESSAGE_SIZE = 4 * 1024
+# Messages waiting to be sent to one WebSocket client; the oldest are dropped
+# when a slow client falls this far behind
+WS_SEND_QUEUE_SIZE = 1000
+# A client that doesn't take a message within this many seconds is dropped
+WS_SEND_TIMEOUT = 5
+# Seconds between heartbeat messages to idle WebSocket clients
+WS_PING_INTERVAL = 30
+
+# Worker threads for sync endpoints and run_in_threadpool (anyio defaults to 40)
+THREADPOOL_SIZE = 100
+
+# Seconds between refreshes of admin_overview_mv by the celery beat schedule
+ADMIN_OVERVIEW_MV_REFRESH_INTERVAL = 60
+# Older view contents mean nothing refreshes it (e.g. no celery beat running);
+# the overview then falls back to counting live
+ADMIN_OVERVIEW_MV_MAX_AGE = 5 * ADMIN_OVERVIEW_MV_REFRESH_INTERVAL
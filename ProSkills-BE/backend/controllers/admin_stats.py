@@ -2,19 +2,34 @@
 Module for admin panel statistics and monitoring endpoints.
 """
 
+import asyncio
+import logging
 import os
 import re
 import time
+from collections import defaultdict, deque
+from itertools import islice
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, desc
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, desc, exists, func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, selectinload
 from starlette import status
 from datetime import datetime, timedelta
 
+from backend.cache import (
+    ADMIN_OVERVIEW_KEY,
+    admin_courses_detailed_key,
+    dumps,
+    get_cached,
+    redis_client,
+    set_cached,
+)
+from backend.constants import ADMIN_OVERVIEW_MV_MAX_AGE
 from backend.dependencies.getdb import get_db
-from backend.oauth2 import get_current_user_jwt
+from backend.oauth2 import get_current_user_jwt_required
 from backend.models import OurUsers, Course, Enrollment, Assignment, AssignmentProgress
 from backend.schemas.admin import (
     OverviewResponse, ActivityResponse, CourseDetailedResponse, UserDetailedResponse
@@ -23,53 +38,149 @@ from backend.models.progress import AssignmentStatus
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+logger = logging.getLogger(__name__)
+
+
+# In-process fallback; the deque drops the oldest entry once full
+_error_logs = deque(maxlen=100)
+
+# System log kept as one bucket per level so filtering is a dict lookup
+_SYSTEM_LOG_MAX = 1000
+_system_logs = deque(maxlen=_SYSTEM_LOG_MAX)
+_system_logs_by_level = defaultdict(lambda: deque(maxlen=_SYSTEM_LOG_MAX))
+
+# Error log shared by all workers when Redis is available
+_ERROR_LOG_KEY = "admin:errors"
+_ERROR_LOG_MAX = 1000
+# Errors waiting to be written, and how many are written per Redis round trip
+ERROR_LOG_QUEUE_SIZE = 1024
+ERROR_LOG_BATCH_SIZE = 50
+
+# Statuses that count an assignment as done
+_COMPLETED_STATUSES = (AssignmentStatus.COMPLETED, AssignmentStatus.GRADED)
 
-_error_logs = []
 
+# Overview statements have no parameters, so build them once at import.
+# A view that has not been refreshed for ADMIN_OVERVIEW_MV_MAX_AGE reads as empty
+_OVERVIEW_MV_STMT = text(
+    "SELECT * FROM admin_overview_mv"
+    f" WHERE refreshed_at > now() - interval '{ADMIN_OVERVIEW_MV_MAX_AGE} seconds'"
+)
+
+_ROLE_COUNTS_STMT = (
+    select(OurUsers.role, func.count())
+    .group_by(OurUsers.role)
+)
+
+_PLATFORM_TOTALS_STMT = select(
+    select(func.count()).select_from(Course).scalar_subquery().label("courses"),
+    select(func.count()).select_from(Assignment).scalar_subquery().label("assignments"),
+    select(func.count()).select_from(Enrollment).scalar_subquery().label("enrollments"),
+    # Active courses are the ones with at least one enrollment; EXISTS
+    # stops at the first enrollment instead of de-duplicating all of them
+    select(func.count())
+    .select_from(Course)
+    .where(exists().where(Enrollment.course_id == Course.id))
+    .scalar_subquery()
+    .label("active_courses"),
+    select(func.count())
+    .select_from(AssignmentProgress)
+    .where(AssignmentProgress.status.in_(_COMPLETED_STATUSES))
+    .scalar_subquery()
+    .label("completed_assignments"),
+)
 
-def check_admin_permission(current_user: dict):
+
+# The user columns admin listings show; avoids loading password hashes and
+# the rest of the row
+_USER_SUMMARY_COLUMNS = (
+    OurUsers.id,
+    OurUsers.first_name,
+    OurUsers.last_name,
+    OurUsers.email,
+    OurUsers.role,
+    OurUsers.created_at,
+)
+
+_COURSES_FINGERPRINT_STMT = select(func.max(Course.updated_at), func.count())
+
+
+def require_admin(current_user: dict = Depends(get_current_user_jwt_required)) -> dict:
     """
-    Verify that the current user has admin privileges.
+    Dependency that only lets users with admin privileges through.
     """
     if current_user.get("role") != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can access this endpoint"
         )
+    return current_user
+
+
+def _read_overview_mv(db: Session):
+    """
+    Read the precomputed overview counts from admin_overview_mv.
+
+    Returns None when the view has not been created (e.g. the schema was
+    built by create_all without running the migrations) or is stale because
+    nothing refreshes it, so the caller counts live instead.
+    """
+    try:
+        return db.execute(_OVERVIEW_MV_STMT).one_or_none()
+    except DBAPIError:
+        db.rollback()
+        return None
+
+
+def _count_users_by_role(bind) -> Dict[str, int]:
+    """Count users per role in a single grouped query."""
+    with Session(bind) as session:
+        return dict(session.execute(_ROLE_COUNTS_STMT).all())
+
+
+def _count_platform_totals(bind):
+    """Fetch the table-wide counts for the overview in one round trip."""
+    with Session(bind) as session:
+        return session.execute(_PLATFORM_TOTALS_STMT).one()
 
 
 @router.get("/statistics/overview", response_model=OverviewResponse)
 async def get_platform_overview(
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get overview statistics for the admin dashboard.
     
     """
-    check_admin_permission(current_user)
-    
-    # Count total users by role
-    total_students = db.query(func.count(OurUsers.id)).filter(OurUsers.role == "student").scalar()
-    total_teachers = db.query(func.count(OurUsers.id)).filter(OurUsers.role == "teacher").scalar()
-    total_admins = db.query(func.count(OurUsers.id)).filter(OurUsers.role == "admin").scalar()
-    
-    # Count courses, assignments, and enrollments
-    total_courses = db.query(func.count(Course.id)).scalar()
-    total_assignments = db.query(func.count(Assignment.id)).scalar()
-    total_enrollments = db.query(func.count(Enrollment.id)).scalar()
-    
-    # Get active courses (with at least one enrollment)
-    active_courses = db.query(func.count(func.distinct(Enrollment.course_id))).scalar()
-    
-    # Count completed assignments
-    completed_assignments = (
-        db.query(func.count(AssignmentProgress.id))
-        .filter((AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED))
-        .scalar()
-    )
+    cached = get_cached(ADMIN_OVERVIEW_KEY)
+    if cached is not None:
+        return cached
+    
+    totals = _read_overview_mv(db)
+    if totals is not None:
+        total_students = totals.students
+        total_teachers = totals.teachers
+        total_admins = totals.admins
+    else:
+        # The two aggregates are independent, so run them side by side on
+        # their own pooled connections instead of one after the other
+        bind = db.get_bind()
+        role_counts, totals = await asyncio.gather(
+            asyncio.to_thread(_count_users_by_role, bind),
+            asyncio.to_thread(_count_platform_totals, bind),
+        )
+        total_students = role_counts.get("student", 0)
+        total_teachers = role_counts.get("teacher", 0)
+        total_admins = role_counts.get("admin", 0)
+
+    total_courses = totals.courses
+    total_assignments = totals.assignments
+    total_enrollments = totals.enrollments
+    active_courses = totals.active_courses
+    completed_assignments = totals.completed_assignments
     
-    return {
+    overview = {
         "users": {
             "total": total_students + total_teachers + total_admins,
             "students": total_students,
@@ -86,13 +197,15 @@ async def get_platform_overview(
         },
         "enrollments": total_enrollments
     }
+    set_cached(ADMIN_OVERVIEW_KEY, overview)
+    return overview
 
 
 @router.get("/statistics/recent-activity", response_model=ActivityResponse)
 async def get_recent_activity(
     days: Optional[int] = 7,
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get recent platform activity for the specified number of days.
@@ -103,15 +216,13 @@ async def get_recent_activity(
     Returns:
         ActivityResponse: Recent activity statistics
     """
-    check_admin_permission(current_user)
-    
     # Calculate date range
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
     # Recent user registrations
     new_users = (
-        db.query(OurUsers)
+        db.query(*_USER_SUMMARY_COLUMNS)
         .filter(OurUsers.created_at >= start_date)
         .order_by(desc(OurUsers.created_at))
         .limit(10)
@@ -131,7 +242,7 @@ async def get_recent_activity(
     recent_completions = (
         db.query(AssignmentProgress)
         .filter(
-            (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED),
+            AssignmentProgress.status.in_(_COMPLETED_STATUSES),
             AssignmentProgress.completed_at >= start_date
         )
         .order_by(desc(AssignmentProgress.completed_at))
@@ -144,7 +255,7 @@ async def get_recent_activity(
         "new_users": [
             {
                 "id": user.id,
-                "name": user.name,
+                "name": f"{user.first_name} {user.last_name}",
                 "email": user.email,
                 "role": user.role,
                 "created_at": user.created_at
@@ -179,50 +290,77 @@ async def get_recent_activity(
 
 @router.get("/courses/detailed", response_model=List[CourseDetailedResponse])
 async def get_courses_detailed(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get detailed information about all courses.
     
     """
-    check_admin_permission(current_user)
-    
-    # Get all courses
-    courses = db.query(Course).all()
-    
-    result = []
-    for course in courses:
-        # Count enrollments for this course
-        enrollment_count = (
-            db.query(func.count(Enrollment.id))
-            .filter(Enrollment.course_id == course.id)
-            .scalar()
+    # Key the cache on the state of the courses table so new or edited
+    # courses are picked up without waiting for the TTL
+    last_updated, course_count = db.execute(_COURSES_FINGERPRINT_STMT).one()
+    cache_key = admin_courses_detailed_key(last_updated, course_count, skip, limit)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Only aggregate the courses on the requested page
+    page_ids = select(Course.id).order_by(Course.id).offset(skip).limit(limit)
+
+    # Per-course aggregates, each computed once for the whole page
+    enrollment_counts = (
+        select(Enrollment.course_id, func.count().label("total"))
+        .where(Enrollment.course_id.in_(page_ids))
+        .group_by(Enrollment.course_id)
+        .subquery()
+    )
+    assignment_counts = (
+        select(Assignment.course_id, func.count().label("total"))
+        .where(Assignment.course_id.in_(page_ids))
+        .group_by(Assignment.course_id)
+        .subquery()
+    )
+    completion_counts = (
+        select(Assignment.course_id, func.count().label("total"))
+        .join(AssignmentProgress, Assignment.id == AssignmentProgress.assignment_id)
+        .where(
+            Assignment.course_id.in_(page_ids),
+            AssignmentProgress.status.in_(_COMPLETED_STATUSES),
         )
-        
-        # Count assignments for this course
-        assignment_count = (
-            db.query(func.count(Assignment.id))
-            .filter(Assignment.course_id == course.id)
-            .scalar()
+        .group_by(Assignment.course_id)
+        .subquery()
+    )
+
+    # Get all courses together with their teacher and aggregates in one query
+    rows = (
+        db.query(
+            Course,
+            OurUsers.first_name,
+            OurUsers.last_name,
+            func.coalesce(enrollment_counts.c.total, 0).label("enrollment_count"),
+            func.coalesce(assignment_counts.c.total, 0).label("assignment_count"),
+            func.coalesce(completion_counts.c.total, 0).label("actual_completions"),
         )
-        
-        # Get teacher info
-        teacher = db.query(OurUsers).filter(OurUsers.id == course.teacher_id).first()
-        teacher_name = teacher.name if teacher else "Unknown"
+        .outerjoin(OurUsers, OurUsers.id == Course.teacher_id)
+        .outerjoin(enrollment_counts, enrollment_counts.c.course_id == Course.id)
+        .outerjoin(assignment_counts, assignment_counts.c.course_id == Course.id)
+        .outerjoin(completion_counts, completion_counts.c.course_id == Course.id)
+        .order_by(Course.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    
+    result = []
+    for course, first_name, last_name, enrollment_count, assignment_count, actual_completions in rows:
+        teacher_name = f"{first_name} {last_name}" if first_name is not None else "Unknown"
         
         # Calculate completion rate
-        total_possible_completions = enrollment_count * assignment_count if assignment_count > 0 else 0
+        total_possible_completions = enrollment_count * assignment_count
         if total_possible_completions > 0:
-            actual_completions = (
-                db.query(func.count(AssignmentProgress.id))
-                .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
-                .filter(
-                    Assignment.course_id == course.id,
-                    (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED)
-                )
-                .scalar()
-            )
             completion_rate = round((actual_completions / total_possible_completions) * 100, 2)
         else:
             completion_rate = 0
@@ -243,36 +381,77 @@ async def get_courses_detailed(
             "created_at": course.created_at
         })
     
+    set_cached(cache_key, result)
     return result
 
 
 @router.get("/users/detailed", response_model=List[UserDetailedResponse])
 async def get_users_detailed(
     role: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get detailed information about users.
     
     """
-    check_admin_permission(current_user)
-    
     # Base query
-    query = db.query(OurUsers)
+    query = db.query(*_USER_SUMMARY_COLUMNS)
     
     # Apply role filter if specified
     if role and role in ["student", "teacher", "admin"]:
         query = query.filter(OurUsers.role == role)
     
-    # Get users
-    users = query.all()
+    # Get one page of users
+    users = query.order_by(OurUsers.id).offset(skip).limit(limit).all()
+    user_ids = [user.id for user in users]
+    
+    # Pre-compute role-specific statistics for the page, one grouped query per metric
+    student_enrollments = dict(
+        db.query(Enrollment.user_id, func.count())
+        .filter(Enrollment.user_id.in_(user_ids))
+        .group_by(Enrollment.user_id)
+        .all()
+    )
+    student_completed = dict(
+        db.query(AssignmentProgress.student_id, func.count())
+        .filter(
+            AssignmentProgress.student_id.in_(user_ids),
+            AssignmentProgress.status.in_(_COMPLETED_STATUSES),
+        )
+        .group_by(AssignmentProgress.student_id)
+        .all()
+    )
+    # Total assignments available to each student
+    student_assignments = dict(
+        db.query(Enrollment.user_id, func.count())
+        .join(Assignment, Enrollment.course_id == Assignment.course_id)
+        .filter(Enrollment.user_id.in_(user_ids))
+        .group_by(Enrollment.user_id)
+        .all()
+    )
+    # Courses taught and students enrolled in them, per teacher
+    teacher_courses = dict(
+        db.query(Course.teacher_id, func.count())
+        .filter(Course.teacher_id.in_(user_ids))
+        .group_by(Course.teacher_id)
+        .all()
+    )
+    teacher_students = dict(
+        db.query(Course.teacher_id, func.count(func.distinct(Enrollment.user_id)))
+        .join(Enrollment, Course.id == Enrollment.course_id)
+        .filter(Course.teacher_id.in_(user_ids))
+        .group_by(Course.teacher_id)
+        .all()
+    )
     
     result = []
     for user in users:
         user_data = {
             "id": user.id,
-            "name": user.name,
+            "name": f"{user.first_name} {user.last_name}",
             "email": user.email,
             "role": user.role,
             "created_at": user.created_at
@@ -280,59 +459,21 @@ async def get_users_detailed(
         
         # Add role-specific statistics
         if user.role == "student":
-            # Get enrollment count
-            enrollment_count = (
-                db.query(func.count(Enrollment.id))
-                .filter(Enrollment.user_id == user.id)
-                .scalar()
-            )
-            
-            # Get assignment completion stats
-            completed_assignments = (
-                db.query(func.count(AssignmentProgress.id))
-                .filter(
-                    (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED),
-                    AssignmentProgress.student_id == user.id
-                )
-                .scalar()
-            )
-            
-            # Total assignments available to this student
-            total_assignments = (
-                db.query(func.count(Assignment.id))
-                .join(Enrollment, Enrollment.course_id == Assignment.course_id)
-                .filter(Enrollment.user_id == user.id)
-                .scalar() or 0
-            )
-            
+            completed_assignments = student_completed.get(user.id, 0)
+            total_assignments = student_assignments.get(user.id, 0)
             completion_rate = round((completed_assignments / total_assignments) * 100, 2) if total_assignments > 0 else 0
             
             user_data["statistics"] = {
-                "enrollments": enrollment_count,
+                "enrollments": student_enrollments.get(user.id, 0),
                 "completed_assignments": completed_assignments,
                 "total_assignments": total_assignments,
                 "completion_rate": completion_rate
             }
             
         elif user.role == "teacher":
-            # Count courses taught
-            course_count = (
-                db.query(func.count(Course.id))
-                .filter(Course.teacher_id == user.id)
-                .scalar()
-            )
-            
-            # Count students enrolled in their courses
-            student_count = (
-                db.query(func.count(func.distinct(Enrollment.user_id)))
-                .join(Course, Course.id == Enrollment.course_id)
-                .filter(Course.teacher_id == user.id)
-                .scalar()
-            )
-            
             user_data["statistics"] = {
-                "courses": course_count,
-                "students": student_count
+                "courses": teacher_courses.get(user.id, 0),
+                "students": teacher_students.get(user.id, 0)
             }
         
         result.append(user_data)
@@ -343,30 +484,33 @@ async def get_users_detailed(
 @router.get("/courses/{course_id}/statistics")
 async def get_course_statistics(
     course_id: int,
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get detailed statistics for a specific course.
     
     """
-    check_admin_permission(current_user)
-    
-    # Check if course exists
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    # Check if course exists, fetching the teacher's name in the same query
+    row = (
+        db.query(Course, OurUsers.first_name, OurUsers.last_name)
+        .outerjoin(OurUsers, OurUsers.id == Course.teacher_id)
+        .filter(Course.id == course_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
     # Get teacher info
-    teacher = db.query(OurUsers).filter(OurUsers.id == course.teacher_id).first()
-    teacher_name = teacher.name if teacher else "Unknown"
+    course, teacher_first_name, teacher_last_name = row
+    teacher_name = f"{teacher_first_name} {teacher_last_name}" if teacher_first_name is not None else "Unknown"
     
     # Get all students enrolled in this course
     enrolled_students = (
-        db.query(OurUsers)
+        db.query(OurUsers.id, OurUsers.first_name, OurUsers.last_name, OurUsers.email)
         .join(Enrollment, OurUsers.id == Enrollment.user_id)
         .filter(Enrollment.course_id == course_id)
         .all()
@@ -375,48 +519,38 @@ async def get_course_statistics(
     # Get all assignments for this course
     assignments = db.query(Assignment).filter(Assignment.course_id == course_id).all()
     
+    n_students = len(enrolled_students)
+    n_assignments = len(assignments)
+    
+    is_completed = AssignmentProgress.status.in_(_COMPLETED_STATUSES)
+    has_submission = AssignmentProgress.submission_file_key.isnot(None)
+    
+    # Submission, completion, score and review metrics for every assignment at once
+    assignment_metrics = {
+        row.assignment_id: row
+        for row in (
+            db.query(
+                AssignmentProgress.assignment_id,
+                func.sum(case((has_submission, 1), else_=0)).label("submissions"),
+                func.sum(case((is_completed, 1), else_=0)).label("completions"),
+                func.avg(AssignmentProgress.score).label("average_score"),
+                func.sum(case((has_submission & AssignmentProgress.score.is_(None), 1), else_=0)).label("pending_review"),
+            )
+            .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
+            .filter(Assignment.course_id == course_id)
+            .group_by(AssignmentProgress.assignment_id)
+            .all()
+        )
+    }
+    
     # Calculate completion statistics
     assignment_stats = []
     for assignment in assignments:
-        # Count submissions and completions
-        submissions_count = (
-            db.query(func.count(AssignmentProgress.id))
-            .filter(
-                AssignmentProgress.assignment_id == assignment.id,
-                AssignmentProgress.submission_file_key != None
-            )
-            .scalar() or 0
-        )
-        
-        completions_count = (
-            db.query(func.count(AssignmentProgress.id))
-            .filter(
-                AssignmentProgress.assignment_id == assignment.id,
-                (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED)
-            )
-            .scalar() or 0
-        )
-        
-        # Calculate average score
-        avg_score = (
-            db.query(func.avg(AssignmentProgress.score))
-            .filter(
-                AssignmentProgress.assignment_id == assignment.id,
-                AssignmentProgress.score != None
-            )
-            .scalar() or 0
-        )
-        
-        # Get students with pending submissions (submitted but not graded)
-        pending_review_count = (
-            db.query(func.count(AssignmentProgress.id))
-            .filter(
-                AssignmentProgress.assignment_id == assignment.id,
-                AssignmentProgress.submission_file_key != None,
-                AssignmentProgress.score == None
-            )
-            .scalar() or 0
-        )
+        metrics = assignment_metrics.get(assignment.id)
+        submissions_count = (metrics.submissions if metrics else 0) or 0
+        completions_count = (metrics.completions if metrics else 0) or 0
+        avg_score = (metrics.average_score if metrics else 0) or 0
+        pending_review_count = (metrics.pending_review if metrics else 0) or 0
         
         assignment_stats.append({
             "id": assignment.id,
@@ -424,45 +558,56 @@ async def get_course_statistics(
             "due_date": assignment.due_date,
             "submissions": submissions_count,
             "completions": completions_count,
-            "completion_rate": round((completions_count / len(enrolled_students)) * 100, 2) if enrolled_students else 0,
+            "completion_rate": round((completions_count / n_students) * 100, 2) if n_students else 0,
             "average_score": round(float(avg_score), 2),
             "pending_review": pending_review_count
         })
     
+    # Completed assignments and their average score for every student at once
+    student_completion = (
+        select(
+            AssignmentProgress.student_id,
+            func.count().label("completed"),
+            func.avg(AssignmentProgress.score).label("average_score"),
+        )
+        .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
+        .where(Assignment.course_id == course_id, is_completed)
+        .group_by(AssignmentProgress.student_id)
+        .subquery()
+    )
+    student_metrics = {
+        row.student_id: row for row in db.query(student_completion).all()
+    }
+    
+    # Average completion rate across enrolled students, computed by the database
+    overall_completion_rate = 0
+    if n_assignments:
+        overall_completion_rate = (
+            db.query(
+                func.avg(
+                    func.coalesce(student_completion.c.completed, 0) * 100.0 / n_assignments
+                )
+            )
+            .select_from(Enrollment)
+            .outerjoin(student_completion, student_completion.c.student_id == Enrollment.user_id)
+            .filter(Enrollment.course_id == course_id)
+            .scalar()
+        ) or 0
+    
     # Get student progress data
     student_progress = []
     for student in enrolled_students:
-        # Count completed assignments for this student in this course
-        completed_count = (
-            db.query(func.count(AssignmentProgress.id))
-            .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
-            .filter(
-                Assignment.course_id == course_id,
-                (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED),
-                AssignmentProgress.student_id == student.id
-            )
-            .scalar() or 0
-        )
-        
-        # Calculate average score
-        avg_score = (
-            db.query(func.avg(AssignmentProgress.score))
-            .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
-            .filter(
-                Assignment.course_id == course_id,
-                (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED),
-                AssignmentProgress.student_id == student.id
-            )
-            .scalar() or 0
-        )
+        metrics = student_metrics.get(student.id)
+        completed_count = metrics.completed if metrics else 0
+        avg_score = (metrics.average_score if metrics else 0) or 0
         
         student_progress.append({
             "id": student.id,
-            "name": student.name,
+            "name": f"{student.first_name} {student.last_name}",
             "email": student.email,
             "completed_assignments": completed_count,
-            "total_assignments": len(assignments),
-            "completion_rate": round((completed_count / len(assignments)) * 100, 2) if assignments else 0,
+            "total_assignments": n_assignments,
+            "completion_rate": round((completed_count / n_assignments) * 100, 2) if n_assignments else 0,
             "average_score": round(float(avg_score), 2)
         })
     
@@ -486,34 +631,32 @@ async def get_course_statistics(
             "created_at": course.created_at
         },
         "enrollment": {
-            "total_students": len(enrolled_students),
+            "total_students": n_students,
             "last_activity": latest_activity
         },
         "assignments": {
-            "total": len(assignments),
+            "total": n_assignments,
             "details": assignment_stats
         },
         "students": {
             "progress": student_progress
         },
-        "overall_completion_rate": sum(s["completion_rate"] for s in student_progress) / len(student_progress) if student_progress else 0
+        "overall_completion_rate": float(overall_completion_rate)
     }
 
 
 @router.get("/users/{user_id}/statistics")
 async def get_user_statistics(
     user_id: int,
+    _: dict = Depends(require_admin),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
 ):
     """
     Get detailed statistics for a specific user.
     
     """
-    check_admin_permission(current_user)
-    
     # Check if user exists
-    user = db.query(OurUsers).filter(OurUsers.id == user_id).first()
+    user = db.query(*_USER_SUMMARY_COLUMNS).filter(OurUsers.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -523,7 +666,7 @@ async def get_user_statistics(
     result = {
         "user": {
             "id": user.id,
-            "name": user.name,
+            "name": f"{user.first_name} {user.last_name}",
             "email": user.email,
             "role": user.role,
             "created_at": user.created_at
@@ -532,13 +675,33 @@ async def get_user_statistics(
     
     # Role-specific statistics
     if user.role == "student":
-        # Get all enrollments
-        enrollments = (
-            db.query(Enrollment)
+        # Get all enrolled courses together with their assignments
+        rows = (
+            db.query(Course, Assignment)
+            .join(Enrollment, Enrollment.course_id == Course.id)
+            .outerjoin(Assignment, Assignment.course_id == Course.id)
             .filter(Enrollment.user_id == user_id)
+            .order_by(Course.id, Assignment.id)
             .all()
         )
         
+        courses_by_id = {}
+        assignments_by_course = defaultdict(list)
+        for course, assignment in rows:
+            courses_by_id[course.id] = course
+            if assignment is not None:
+                assignments_by_course[course.id].append(assignment)
+        
+        # Get all progress records of this student at once
+        progress_by_assignment = {
+            progress.assignment_id: progress
+            for progress in (
+                db.query(AssignmentProgress)
+                .filter(AssignmentProgress.student_id == user_id)
+                .all()
+            )
+        }
+        
         # Get course details for each enrollment
         courses_data = []
         total_assignments = 0
@@ -546,13 +709,9 @@ async def get_user_statistics(
         total_score_sum = 0
         total_scored_assignments = 0
         
-        for enrollment in enrollments:
-            course = db.query(Course).filter(Course.id == enrollment.course_id).first()
-            if not course:
-                continue
-                
-            # Get assignments for this course
-            assignments = db.query(Assignment).filter(Assignment.course_id == course.id).all()
+        for course in courses_by_id.values():
+            assignments = assignments_by_course[course.id]
+            n_assignments = len(assignments)
             
             # Get progress for each assignment
             assignment_progress = []
@@ -561,21 +720,14 @@ async def get_user_statistics(
             course_scored_assignments = 0
             
             for assignment in assignments:
-                progress = (
-                    db.query(AssignmentProgress)
-                    .filter(
-                        AssignmentProgress.student_id == user_id,
-                        AssignmentProgress.assignment_id == assignment.id
-                    )
-                    .first()
-                )
+                progress = progress_by_assignment.get(assignment.id)
                 
                 is_completed = False
                 score = None
                 submission_date = None
                 
                 if progress:
-                    is_completed = (progress.status == AssignmentStatus.COMPLETED) | (progress.status == AssignmentStatus.GRADED)
+                    is_completed = progress.status in _COMPLETED_STATUSES
                     score = progress.score
                     submission_date = progress.submitted_at
                     
@@ -598,21 +750,22 @@ async def get_user_statistics(
                 })
             
             # Calculate completion rate for this course
-            completion_rate = round((course_completed / len(assignments)) * 100, 2) if assignments else 0
+            completion_rate = round((course_completed / n_assignments) * 100, 2) if n_assignments else 0
             avg_score = round(course_score_sum / course_scored_assignments, 2) if course_scored_assignments > 0 else None
             
             courses_data.append({
                 "course_id": course.id,
                 "title": course.title,
-                "enrollment_date": enrollment.created_at,
-                "assignments_total": len(assignments),
+                # Enrollments are not timestamped
+                "enrollment_date": None,
+                "assignments_total": n_assignments,
                 "assignments_completed": course_completed,
                 "completion_rate": completion_rate,
                 "average_score": avg_score,
                 "assignments": assignment_progress
             })
             
-            total_assignments += len(assignments)
+            total_assignments += n_assignments
         
         # Calculate overall statistics
         overall_completion_rate = round((total_completed / total_assignments) * 100, 2) if total_assignments > 0 else 0
@@ -620,7 +773,7 @@ async def get_user_statistics(
         
         # Add student-specific statistics to result
         result["statistics"] = {
-            "enrollments": len(enrollments),
+            "enrollments": len(courses_by_id),
             "total_assignments": total_assignments,
             "completed_assignments": total_completed,
             "completion_rate": overall_completion_rate,
@@ -629,40 +782,59 @@ async def get_user_statistics(
         result["courses"] = courses_data
         
     elif user.role == "teacher":
-        # Get all courses taught by this teacher
-        courses = db.query(Course).filter(Course.teacher_id == user_id).all()
+        # Get all courses taught by this teacher with their assignments
+        courses = (
+            db.query(Course)
+            .options(selectinload(Course.assignments))
+            .filter(Course.teacher_id == user_id)
+            .all()
+        )
+        course_ids = [course.id for course in courses]
+        
+        # Get enrollments of all these courses at once
+        students_by_course = defaultdict(list)
+        for enrolled_course_id, student_id in (
+            db.query(Enrollment.course_id, Enrollment.user_id)
+            .filter(Enrollment.course_id.in_(course_ids))
+            .all()
+        ):
+            students_by_course[enrolled_course_id].append(student_id)
+        
+        # Completions by enrolled students, grouped per course
+        completed_by_course = dict(
+            db.query(Assignment.course_id, func.count())
+            .join(AssignmentProgress, Assignment.id == AssignmentProgress.assignment_id)
+            .join(
+                Enrollment,
+                (Enrollment.course_id == Assignment.course_id)
+                & (Enrollment.user_id == AssignmentProgress.student_id),
+            )
+            .filter(
+                Assignment.course_id.in_(course_ids),
+                AssignmentProgress.status.in_(_COMPLETED_STATUSES),
+            )
+            .group_by(Assignment.course_id)
+            .all()
+        )
         
         courses_data = []
         total_students = set()
         total_assignments = 0
         
         for course in courses:
-            # Get enrollments for this course
-            enrollments = db.query(Enrollment).filter(Enrollment.course_id == course.id).all()
-            student_ids = [enrollment.user_id for enrollment in enrollments]
+            student_ids = students_by_course[course.id]
             
             # Add to total unique students
             total_students.update(student_ids)
             
-            # Get assignments for this course
-            assignments = db.query(Assignment).filter(Assignment.course_id == course.id).all()
+            assignments = course.assignments
             total_assignments += len(assignments)
             
             # Get completion statistics
-            if student_ids and assignments:
-                completed_count = (
-                    db.query(func.count(AssignmentProgress.id))
-                    .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
-                    .filter(
-                        Assignment.course_id == course.id,
-                        (AssignmentProgress.status == AssignmentStatus.COMPLETED) | (AssignmentProgress.status == AssignmentStatus.GRADED),
-                        AssignmentProgress.student_id.in_(student_ids)
-                    )
-                    .scalar() or 0
-                )
-                
-                total_possible = len(student_ids) * len(assignments)
-                completion_rate = round((completed_count / total_possible) * 100, 2) if total_possible > 0 else 0
+            total_possible = len(student_ids) * len(assignments)
+            if total_possible > 0:
+                completed_count = completed_by_course.get(course.id, 0)
+                completion_rate = round((completed_count / total_possible) * 100, 2)
             else:
                 completion_rate = 0
             
@@ -686,71 +858,119 @@ async def get_user_statistics(
     return result
 
 
+def _latest(entries: deque, limit: int) -> list:
+    """Return the newest ``limit`` entries, oldest first."""
+    latest = list(islice(reversed(entries), limit))
+    latest.reverse()
+    return latest
+
+
+def log_system_event(level: str, message: str, timestamp: Optional[float] = None):
+    """Add an entry to the system log"""
+    entry = {
+        "timestamp": time.time() if timestamp is None else timestamp,
+        "level": level.upper(),
+        "message": message
+    }
+    _system_logs.append(entry)
+    _system_logs_by_level[entry["level"]].append(entry)
+
+
+# моковые данные для тестирования, пока логи сервера сюда не пишутся
+_started_at = time.time()
+for _offset, _level, _message in (
+    (3600, "INFO", "Server started successfully"),
+    (3500, "INFO", "Database connection established"),
+    (3000, "WARNING", "High CPU usage detected"),
+    (2000, "ERROR", "Failed to connect to external API"),
+    (1000, "INFO", "Backup completed successfully"),
+):
+    log_system_event(_level, _message, _started_at - _offset)
+
+
 def log_error(error_data: dict):
     """Add error to the error log"""
-    _error_logs.append({
-        "timestamp": time.time(),
-        "error": error_data
-    })
-    # количество хранимых ошибок
-    if len(_error_logs) > 100:
-        _error_logs.pop(0)
+    log_errors([error_data])
+
+
+def log_errors(errors: List[dict]):
+    """Add several errors to the error log in one Redis round trip"""
+    now = time.time()
+    entries = [{"timestamp": now, "error": error_data} for error_data in errors]
+    if redis_client:
+        try:
+            pipe = redis_client.pipeline()
+            pipe.lpush(_ERROR_LOG_KEY, *(dumps(entry) for entry in entries))
+            pipe.ltrim(_ERROR_LOG_KEY, 0, _ERROR_LOG_MAX - 1)
+            pipe.execute()
+            return
+        except Exception:
+            pass
+
+    _error_logs.extend(entries)
+
+
+async def drain_error_log_queue(queue: asyncio.Queue):
+    """
+    Write errors queued by the global exception handler, so a 500 never
+    waits for Redis. Whatever is queued when one write starts goes in the
+    same batch.
+    """
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < ERROR_LOG_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            await asyncio.to_thread(log_errors, batch)
+        except Exception as e:
+            logger.warning("Error writing error log: %s", e)
 
 
 @router.get("/system/errors")
 async def get_error_logs(
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    _: dict = Depends(require_admin),
 ):
     """
     Get recent error logs.
     
     """
-    check_admin_permission(current_user)
-    
-    return _error_logs[-limit:] if _error_logs else []
+    if redis_client:
+        try:
+            # Newest entries sit at the head of the list
+            raw = redis_client.lrange(_ERROR_LOG_KEY, 0, limit - 1)
+            return [orjson.loads(item) for item in reversed(raw)]
+        except Exception:
+            pass
+    
+    return _latest(_error_logs, limit)
 
 
 @router.get("/system/logs")
 async def get_system_logs(
     limit: int = 50,
     log_type: str = "all",
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    _: dict = Depends(require_admin),
 ):
     """
     Get system logs.
     
     """
-    check_admin_permission(current_user)
-    
-    # возвращаем моковые данные для тестирования
-    
-    # Пример лог-файла сервера (в реальном приложении - чтение файла)
-    server_log = [
-        {"timestamp": time.time() - 3600, "level": "INFO", "message": "Server started successfully"},
-        {"timestamp": time.time() - 3500, "level": "INFO", "message": "Database connection established"},
-        {"timestamp": time.time() - 3000, "level": "WARNING", "message": "High CPU usage detected"},
-        {"timestamp": time.time() - 2000, "level": "ERROR", "message": "Failed to connect to external API"},
-        {"timestamp": time.time() - 1000, "level": "INFO", "message": "Backup completed successfully"},
-    ]
-    
     # Фильтрация по типу логов
-    if log_type != "all":
-        log_type = log_type.upper()
-        server_log = [log for log in server_log if log["level"] == log_type]
+    if log_type == "all":
+        server_log = _system_logs
+    else:
+        server_log = _system_logs_by_level.get(log_type.upper(), ())
     
     return {
-        "logs": server_log[-limit:],
+        "logs": _latest(server_log, limit) if server_log else [],
         "total_count": len(server_log)
     }
 
 
 @router.get("/system/performance")
 async def get_system_performance(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    _: dict = Depends(require_admin),
 ):
     """
     Get system performance metrics.
@@ -758,8 +978,6 @@ async def get_system_performance(
     Returns:
         dict: System performance data
     """
-    check_admin_permission(current_user)
-    
     # В реальном приложении здесь нужно получать метрики из системы мониторинга
     # В данной версии просто возвращаем тестовые данные
     return {
@@ -1,20 +1,44 @@
+import asyncio
 import base64
+import logging
 import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, UploadFile
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func
+from sqlalchemy import exists, func
 from sqlalchemy.orm import Session
 from starlette import status
 
-from backend.controllers.filesForCourse import BUCKET_NAME, s3, validate_file
+from backend.cache import invalidate_task_files
+from backend.controllers.filesForCourse import (
+    BUCKET_NAME,
+    assignment_course_cache,
+    delete_s3_prefix,
+    list_task_files,
+    s3,
+    s3_executor,
+    s3_streaming_response,
+    upload_to_s3,
+    validate_file,
+)
 from backend.dependencies.getdb import get_db
-from backend.models import AssignmentProgress, Course, CourseProgress, OurUsers, Section
+from backend.models import (
+    AssignmentProgress,
+    Course,
+    CourseProgress,
+    Enrollment,
+    OurUsers,
+    Section,
+)
 from backend.models.assignment import Assignment
 from backend.models.comment import Comment
-from backend.oauth2 import get_current_user_jwt, get_current_user_jwt_required
+from backend.oauth2 import (
+    get_current_user_jwt,
+    get_current_user_jwt_required,
+    require_roles,
+)
 from backend.schemas.assignment import (
     AssignmentCreate,
     AssignmentResponse,
@@ -25,6 +49,9 @@ from backend.schemas.assignment import (
 )
 from backend.schemas.file import FileUploadResponse
 from backend.models.progress import AssignmentStatus
+from backend.services.course_progress import update_course_progress
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/courses/{course_id}/assignments",
@@ -33,16 +60,12 @@ router = APIRouter(
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=AssignmentResponse)
-async def create_assignment(
+def create_assignment(
     course_id: int,
     assignment_data: AssignmentCreate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
-    # Check if the user is a teacher or admin
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     # Check if the course exists AND belongs to the teacher (or if the user is an admin)
     course = (
         db.query(Course)
@@ -109,7 +132,6 @@ async def create_assignment(
     db.add(new_assignment)
     try:
         db.commit()
-        db.refresh(new_assignment)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -161,13 +183,9 @@ async def create_assignment_with_file(
     submission_type: Optional[str] = Form("autoComplete"),
     file: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
     """Create a new assignment with an optional file upload"""
-    # Check if the user is a teacher or admin
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     # Check if the course exists AND belongs to the teacher (or if the user is an admin)
     course = (
         db.query(Course)
@@ -238,7 +256,6 @@ async def create_assignment_with_file(
     db.add(new_assignment)
     try:
         db.commit()
-        db.refresh(new_assignment)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -251,20 +268,15 @@ async def create_assignment_with_file(
     if file and file.filename:  # Only process if file is provided and has a filename
         try:
             # Validate file
-            file_content = await validate_file(file)
+            await validate_file(file)
 
             # Create a structured key for assignments with uniqueness
             file_key = f"assignments/{new_assignment.id}/task/{uuid.uuid4().hex}_{file.filename}"
 
-            s3.put_object(
-                Bucket=BUCKET_NAME,
-                Key=file_key,
-                Body=file_content,
-                ContentType=file.content_type,
-            )
+            await asyncio.to_thread(upload_to_s3, file, file_key)
 
         except Exception as e:
-            print(f"Error uploading file: {str(e)}")
+            logger.warning("Error uploading file: %s", e)
             # Don't raise an exception here since file is optional
 
     # Update total assignments count in all student progress records
@@ -313,7 +325,9 @@ async def create_assignment_with_file(
     # Add the uploaded file to the response if it exists
     if file_key:
         try:
-            response = s3.head_object(Bucket=BUCKET_NAME, Key=file_key)
+            response = await asyncio.to_thread(
+                s3.head_object, Bucket=BUCKET_NAME, Key=file_key
+            )
             assignment_dict["files"] = [
                 {
                     "key": file_key,
@@ -323,8 +337,8 @@ async def create_assignment_with_file(
                 },
             ]
         except Exception as e:
-            print(
-                f"Error getting file info for assignment {new_assignment.id}: {str(e)}",
+            logger.warning(
+                "Error getting file info for assignment %s: %s", new_assignment.id, e
             )
             assignment_dict["files"] = []
 
@@ -332,7 +346,7 @@ async def create_assignment_with_file(
 
 
 @router.get("/{assignment_id}", response_model=AssignmentWithCommentsResponse)
-async def get_assignment(
+def get_assignment(
     course_id: int,
     assignment_id: int,
     db: Session = Depends(get_db),
@@ -379,33 +393,13 @@ async def get_assignment(
             assignment_dict["is_completed"] = progress.is_completed
     
     # Get files for this assignment from S3
-    try:
-        prefix = f"assignments/{assignment_id}/task/"
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-        if "Contents" in response:
-            files = []
-            for item in response["Contents"]:
-                files.append(
-                    {
-                        "key": item["Key"],
-                        "size": item["Size"],
-                        "last_modified": item["LastModified"],
-                        "filename": item["Key"].split("/")[-1],
-                    },
-                )
-            assignment_dict["files"] = files
-        else:
-            assignment_dict["files"] = []
-    except Exception as e:
-        print(f"Error getting files for assignment {assignment_id}: {str(e)}")
-        assignment_dict["files"] = []
+    assignment_dict["files"] = list_task_files(assignment_id)
 
     return AssignmentWithCommentsResponse(**assignment_dict)
 
 
 @router.get("/{assignment_id}/progress", response_model=AssignmentWithProgressResponse)
-async def get_assignment_with_progress(
+def get_assignment_with_progress(
     course_id: int,
     assignment_id: int,
     db: Session = Depends(get_db),
@@ -465,7 +459,7 @@ async def get_assignment_with_progress(
 
 
 @router.get("", response_model=List[AssignmentWithProgressResponse])
-async def get_course_assignments(
+def get_course_assignments(
     course_id: int,
     section_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
@@ -484,11 +478,12 @@ async def get_course_assignments(
 
     if not (is_teacher or is_admin):
         # Check if student is enrolled
-        is_enrolled = False
-        for student in course.students:
-            if student.id == user_id:
-                is_enrolled = True
-                break
+        is_enrolled = db.query(
+            exists().where(
+                Enrollment.user_id == user_id,
+                Enrollment.course_id == course.id,
+            )
+        ).scalar()
 
         if not is_enrolled:
             raise HTTPException(
@@ -522,6 +517,11 @@ async def get_course_assignments(
     # Order by section and then by order within section
     assignments = query.order_by(Assignment.section_id, Assignment.order).all()
 
+    # List every assignment's task files concurrently instead of one S3 round
+    # trip after another
+    assignment_ids = [assignment.id for assignment in assignments]
+    task_files = dict(zip(assignment_ids, s3_executor.map(list_task_files, assignment_ids)))
+
     # Get file information for each assignment
     result = []
     for assignment in assignments:
@@ -549,7 +549,7 @@ async def get_course_assignments(
             "created_at": assignment.created_at,
             "updated_at": assignment.updated_at,
             "submission_type": assignment.submission_type,
-            "files": [],
+            "files": task_files[assignment.id],
         }
 
         # Add progress information
@@ -568,31 +568,10 @@ async def get_course_assignments(
                 "feedback": None,
             })
 
-        # Get files for this assignment from S3
-        try:
-            prefix = f"assignments/{assignment.id}/task/"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-            if "Contents" in response:
-                files = []
-                for item in response["Contents"]:
-                    files.append(
-                        {
-                            "key": item["Key"],
-                            "size": item["Size"],
-                            "last_modified": item["LastModified"],
-                            "filename": item["Key"].split("/")[-1],
-                        },
-                    )
-                assignment_dict["files"] = files
-            else:
-                assignment_dict["files"] = []
-        except Exception as e:
-            print(f"Error getting files for assignment {assignment.id}: {str(e)}")
-            assignment_dict["files"] = []
-
-        result.append(AssignmentWithProgressResponse(**assignment_dict))
+        result.append(assignment_dict)
 
+    # Plain dicts: FastAPI validates them once against the response_model,
+    # instead of validating models here and again after dumping them
     return result
 
 
@@ -610,13 +589,9 @@ async def update_assignment(
     file: Optional[UploadFile] = File(None),
     delete_files: bool = Form(False),
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
     """Update an assignment with optional file upload"""
-    # Check if the user is a teacher or admin
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     # Check if assignment exists and belongs to the course
     assignment = (
         db.query(Assignment)
@@ -675,37 +650,32 @@ async def update_assignment(
     try:
         # Delete existing files if requested
         if delete_files:
-            prefix = f"assignments/{assignment_id}/task/"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-            if "Contents" in response:
-                for item in response["Contents"]:
-                    s3.delete_object(Bucket=BUCKET_NAME, Key=item["Key"])
+            await asyncio.to_thread(
+                delete_s3_prefix, f"assignments/{assignment_id}/task/"
+            )
 
         # Upload new file if provided
         if file and file.filename:  # Check both file and filename
             # Validate file
-            file_content = await validate_file(file)
+            await validate_file(file)
 
             # Create a structured key for assignments with uniqueness
             key = f"assignments/{assignment_id}/task/{uuid.uuid4().hex}_{file.filename}"
 
             # Upload to S3
-            s3.put_object(
-                Bucket=BUCKET_NAME,
-                Key=key,
-                Body=file_content,
-                ContentType=file.content_type,
-            )
+            await asyncio.to_thread(upload_to_s3, file, key)
 
     except Exception as e:
-        print(f"Error handling files for assignment {assignment_id}: {str(e)}")
+        logger.warning("Error handling files for assignment %s: %s", assignment_id, e)
         # Don't raise exception for file operations since they're optional
         pass
+    finally:
+        if delete_files or (file and file.filename):
+            invalidate_task_files(assignment_id)
 
     # Commit changes to database
     try:
         db.commit()
-        db.refresh(assignment)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -731,40 +701,19 @@ async def update_assignment(
     }
 
     # Get files for this assignment from S3
-    try:
-        prefix = f"assignments/{assignment_id}/task/"
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-        if "Contents" in response:
-            files = []
-            for item in response["Contents"]:
-                files.append(
-                    {
-                        "key": item["Key"],
-                        "size": item["Size"],
-                        "last_modified": item["LastModified"],
-                        "filename": item["Key"].split("/")[-1],
-                    },
-                )
-            assignment_dict["files"] = files
-    except Exception as e:
-        print(f"Error getting files for assignment {assignment_id}: {str(e)}")
+    assignment_dict["files"] = await asyncio.to_thread(list_task_files, assignment_id)
 
     return AssignmentResponse(**assignment_dict)
 
 
 @router.delete("/{assignment_id}", status_code=status.HTTP_200_OK)
-async def delete_assignment(
+def delete_assignment(
     course_id: int,
     assignment_id: int,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
     """Delete an assignment"""
-    # Check if the user is a teacher or admin
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     # Check if assignment exists and belongs to the course
     assignment = (
         db.query(Assignment)
@@ -820,42 +769,34 @@ async def delete_assignment(
     # Delete associated files from S3
     try:
         # List and delete all files in this assignment's folder
-        prefix = f"assignments/{assignment_id}/"
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-        
-        if "Contents" in response:
-            # Create batch delete request
-            delete_objects = {
-                "Objects": [{"Key": item["Key"]} for item in response["Contents"]]
-            }
-            
-            # Delete objects if there are any
-            if delete_objects["Objects"]:
-                s3.delete_objects(Bucket=BUCKET_NAME, Delete=delete_objects)
+        delete_s3_prefix(f"assignments/{assignment_id}/")
     except Exception as e:
-        print(f"Error deleting S3 files for assignment {assignment_id}: {str(e)}")
+        logger.warning("Error deleting S3 files for assignment %s: %s", assignment_id, e)
         # Continue with deletion even if S3 fails
 
     # Delete the assignment itself
     try:
         db.delete(assignment)
         db.commit()
-        
-        # Update all student progress records for this course
-        from backend.controllers.progress import update_course_progress
+        assignment_course_cache.pop(assignment_id)
+        invalidate_task_files(assignment_id)
         
         # If no students had progress records for this specific assignment,
         # update all enrolled students' progress records
         if not students_to_update:
-            for student in course.students:
-                students_to_update.add(student.id)
+            students_to_update.update(
+                user_id
+                for (user_id,) in db.query(Enrollment.user_id).filter(
+                    Enrollment.course_id == course_id
+                )
+            )
         
         # Update progress for all affected students
         for student_id in students_to_update:
             try:
                 update_course_progress(db, student_id, course_id)
             except Exception as e:
-                print(f"Error updating progress for student {student_id}: {str(e)}")
+                logger.warning("Error updating progress for student %s: %s", student_id, e)
                 # Continue with other students even if one fails
         
         return {"message": "Assignment deleted successfully"}
@@ -868,10 +809,11 @@ async def delete_assignment(
 
 
 @router.get("/{assignment_id}/files/{file_key:path}", response_class=StreamingResponse)
-async def download_assignment_file(
+def download_assignment_file(
     course_id: int,
     assignment_id: int,
     file_key: str,
+    accept_encoding: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt_required),
 ):
@@ -908,16 +850,7 @@ async def download_assignment_file(
         # Get file from S3
         response = s3.get_object(Bucket=BUCKET_NAME, Key=file_key)
 
-        def iterfile():
-            yield from response["Body"]
-
-        return StreamingResponse(
-            iterfile(),
-            media_type=response.get("ContentType", "application/octet-stream"),
-            headers={
-                "Content-Disposition": f'attachment; filename="{file_key.split("/")[-1]}"',
-            },
-        )
+        return s3_streaming_response(response, file_key.split("/")[-1], accept_encoding)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -8,6 +8,7 @@ from jose import jwt
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
+from backend.cache import invalidate_admin_stats
 from backend.celery_app import send_reset_password_email_task
 from backend.dependencies.getdb import get_db
 from backend.models.ourusers import OurUsers
@@ -108,7 +109,7 @@ async def create_user(
     )
     db.add(create_user_model)
     db.commit()
-    db.refresh(create_user_model)
+    invalidate_admin_stats()
     return create_user_model
 
 
@@ -229,6 +230,7 @@ async def register_teacher(
 
     db.add(create_user_model)
     db.commit()
+    invalidate_admin_stats()
     return create_user_model
 
 
@@ -260,6 +262,7 @@ async def register_admin(
 
     db.add(create_user_model)
     db.commit()
+    invalidate_admin_stats()
     return create_user_model
 
 
@@ -301,6 +304,5 @@ async def reset_password(token: str, new_password: str, db: Session = Depends(ge
     user.reset_token = None
     user.reset_token_expires_at = None
     db.commit()
-    db.refresh(user)
 
     return {"message": "Password was changed!"}
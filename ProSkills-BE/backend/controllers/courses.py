@@ -1,27 +1,73 @@
+import asyncio
+import logging
 import os
-from typing import List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional
 
 import boto3
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    UploadFile,
+    status,
+)
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
-
+from sqlalchemy import (
+    and_,
+    bindparam,
+    exists,
+    false,
+    func,
+    null,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session, joinedload, noload
+
+from backend.cache import (
+    COURSES_TTL,
+    course_detail_key,
+    course_list_key,
+    get_cached,
+    invalidate_admin_stats,
+    invalidate_course_reviews,
+    invalidate_courses,
+    set_cached,
+)
 from backend.constants import (
     COURSE_IMAGES_PATH,
     COURSE_MAX_IMAGE_SIZE,
     SUPPORTED_IMAGE_TYPES,
 )
+from backend.controllers.filesForCourse import (
+    assignment_course_cache,
+    course_owner_cache,
+)
 from backend.dependencies.getdb import get_db
-from backend.dependencies.s3 import S3Dependencies
-from backend.models import Assignment, Course, CourseProgress, Enrollment, OurUsers
+from backend.dependencies.s3 import S3_CLIENT_CONFIG, S3Dependencies
+from backend.models import (
+    Assignment,
+    AssignmentProgress,
+    Course,
+    CourseProgress,
+    Enrollment,
+    OurUsers,
+)
 from backend.models.rating import Rating
-from backend.oauth2 import get_current_user_jwt, get_current_user_jwt_required
+from backend.oauth2 import (
+    get_current_user_jwt,
+    get_current_user_jwt_required,
+    require_roles,
+)
 from backend.schemas.course import (
     CourseCreate,
     CourseInfo,
     CourseResponse,
     CourseUpdate,
-    TeacherOfCourse,
 )
 from backend.schemas.rating import RatingCreate, RatingResponse
 from backend.schemas.user import UserResponse
@@ -29,30 +75,121 @@ from backend.services.websocket import manager
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
-# Initialize S3 client
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("SECRET_ACCESS_KEY"),
-)
+logger = logging.getLogger(__name__)
+
+# S3 client, created on first use
+_s3_client = None
+_s3_client_lock = threading.Lock()
 BUCKET_NAME = os.getenv("BUCKET_NAME", "files-for-team-project")
 
+# The catalog only serializes these columns (see CourseInfo)
+COURSE_INFO_COLUMNS = (
+    Course.id,
+    Course.title,
+    Course.category,
+    Course.rating,
+    Course.teacher_id,
+)
+
+# Hot lookups built once at import; only the bound parameters vary per request
+_COURSE_PAGE_STMT = (
+    select(Course)
+    .options(joinedload(Course.teacher), noload(Course.sections))
+    .where(Course.id == bindparam("course_id"))
+)
+_COURSE_EXISTS_STMT = select(exists().where(Course.id == bindparam("course_id")))
+_IS_ENROLLED_STMT = select(
+    exists().where(
+        Enrollment.user_id == bindparam("user_id"),
+        Enrollment.course_id == bindparam("course_id"),
+    )
+)
+_COMPLETION_PERCENTAGE_STMT = select(CourseProgress.completion_percentage).where(
+    CourseProgress.student_id == bindparam("user_id"),
+    CourseProgress.course_id == bindparam("course_id"),
+)
+_ALREADY_RATED_STMT = select(
+    exists().where(
+        Rating.user_id == bindparam("user_id"),
+        Rating.course_id == bindparam("course_id"),
+    )
+)
+
+# delete_objects accepts at most this many keys per request
+S3_DELETE_BATCH_SIZE = 1000
+# Concurrent S3 list/delete calls made by delete_course
+S3_DELETE_WORKERS = 16
+
+
+def get_s3():
+    """
+    Return the shared S3 client, creating it on first use.
+
+    boto3 sessions are not thread safe but the clients made from them are,
+    so the client is built once from a dedicated session under a lock and
+    then shared by the cleanup worker threads.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.session.Session().client(
+                    "s3",
+                    aws_access_key_id=os.getenv("ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("SECRET_ACCESS_KEY"),
+                    config=S3_CLIENT_CONFIG,
+                )
+    return _s3_client
+
+
+def _s3_key_batches(prefix: str) -> Iterator[List[dict]]:
+    """Yield delete_objects-sized batches of keys under ``prefix``, page by page."""
+    batch = []
+    paginator = get_s3().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for item in page.get("Contents", []):
+            batch.append({"Key": item["Key"]})
+            if len(batch) == S3_DELETE_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _delete_s3_batch(batch: List[dict]) -> int:
+    get_s3().delete_objects(Bucket=BUCKET_NAME, Delete={"Objects": batch, "Quiet": True})
+    return len(batch)
+
+
+def _delete_s3_prefix(prefix: str, executor: ThreadPoolExecutor) -> List[Future]:
+    """
+    List ``prefix`` and hand each full batch to ``executor`` straight away,
+    so deleting one page overlaps listing the next.
+    """
+    return [executor.submit(_delete_s3_batch, batch) for batch in _s3_key_batches(prefix)]
+
+
+def _delete_s3_prefixes(prefixes: List[str]) -> int:
+    """Purge several prefixes in parallel; returns the number of keys deleted."""
+    with ThreadPoolExecutor(max_workers=S3_DELETE_WORKERS) as executor:
+        listings = [executor.submit(_delete_s3_prefix, prefix, executor) for prefix in prefixes]
+        return sum(
+            deletion.result()
+            for listing in listings
+            for deletion in listing.result()
+        )
+
 
 @router.post("", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
-async def create_course(
+def create_course(
     create_course_request: CourseCreate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized",
-        )
-
     course = Course(
         **create_course_request.model_dump(),
         teacher_id=current_user.get("user_id"),  # get an id of teacher
+        sections=[],  # a new course has none; skips a lazy load when serializing
     )
 
     db.add(course)
@@ -61,11 +198,10 @@ async def create_course(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating course: {e}")
-    db.refresh(course)
+    invalidate_admin_stats()
+    invalidate_courses()
 
-    course_dict = course.to_dict()
-    course_dict["teacher"] = TeacherOfCourse.model_validate(course.teacher.to_dict())
-    return CourseResponse.model_validate(course_dict)
+    return CourseResponse.model_validate(course, from_attributes=True)
 
 
 @router.get(
@@ -73,59 +209,45 @@ async def create_course(
     response_model=CourseResponse,
     status_code=status.HTTP_200_OK,
 )
-async def get_course_by_id(
+def get_course_by_id(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_jwt),
 ):
+    user_id = current_user.get("user_id") if current_user else None
+    cache_key = course_detail_key(course_id, user_id)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return cached
+
     # Use joinedload specifically for the teacher relationship
-    course = (
-        db.query(Course)
-        .options(joinedload(Course.teacher))
-        .filter(Course.id == course_id)
-        .first()
-    )
+    course = db.execute(
+        _COURSE_PAGE_STMT, {"course_id": course_id}
+    ).scalar_one_or_none()
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found",
         )
 
-    course_dict = course.to_dict()
-    course_dict["teacher"] = TeacherOfCourse.model_validate(course.teacher.to_dict())
+    # For public access is_enrolled / completion_percentage keep their defaults
+    response = CourseResponse.model_validate(course, from_attributes=True)
 
-    # For public access, set default values
-    course_dict["is_enrolled"] = False
-    course_dict["completion_percentage"] = 0.0
-    
     # If user is authenticated, check enrollment status
-    if current_user:
-        user_id = current_user.get("user_id")
-        if user_id:
-            # Check if the user is enrolled in the course
-            enrollment = (
-                db.query(Enrollment)
-                .filter(Enrollment.user_id == user_id, Enrollment.course_id == course_id)
-                .first()
-            )
-            
-            course_dict["is_enrolled"] = enrollment is not None
-            
-            # If enrolled, get completion percentage
-            if enrollment:
-                progress = (
-                    db.query(CourseProgress)
-                    .filter(
-                        CourseProgress.student_id == user_id,
-                        CourseProgress.course_id == course_id,
-                    )
-                    .first()
-                )
-                
-                if progress:
-                    course_dict["completion_percentage"] = progress.completion_percentage()
+    if user_id:
+        params = {"user_id": user_id, "course_id": course_id}
+        response.is_enrolled = db.execute(_IS_ENROLLED_STMT, params).scalar()
+
+        # If enrolled, get completion percentage
+        if response.is_enrolled:
+            completion_percentage = db.execute(
+                _COMPLETION_PERCENTAGE_STMT, params
+            ).scalar()
+            if completion_percentage is not None:
+                response.completion_percentage = float(completion_percentage)
 
-    return CourseResponse.model_validate(course_dict)
+    set_cached(cache_key, response.model_dump(mode="json"), COURSES_TTL)
+    return response
 
 
 @router.put(
@@ -133,20 +255,16 @@ async def get_course_by_id(
     response_model=CourseResponse,
     status_code=status.HTTP_200_OK,
 )
-async def update_course(
+def update_course(
     course_id: int,
     update_course_request: CourseUpdate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
-
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access Denied",
-        )
-
-    course = db.query(Course).filter(Course.id == course_id).first()
+    # Teacher is loaded up front so the response needs no further queries
+    course = db.execute(
+        _COURSE_PAGE_STMT, {"course_id": course_id}
+    ).scalar_one_or_none()
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,90 +281,87 @@ async def update_course(
 
     try:
         db.commit()
-        db.refresh(course)
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating course: {e}",
         )
-    return course
+    invalidate_courses()
+    return CourseResponse.model_validate(course, from_attributes=True)
 
 
 @router.get("", response_model=List[CourseInfo])
-async def get_all_courses(
+def get_all_courses(
     db: Session = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_jwt),
 ):
+    user_id = current_user.get("user_id") if current_user else None
+    cache_key = course_list_key(user_id)
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        courses = db.query(Course).options(joinedload(Course.teacher)).all()
-        
-        # If user is authenticated, get their enrollments for quick lookup
-        enrollments = {}
-        course_progress = {}
-        if current_user:
-            user_id = current_user.get("user_id")
-            if user_id:
-                # Get all enrollments for this user
-                user_enrollments = (
-                    db.query(Enrollment)
-                    .filter(Enrollment.user_id == user_id)
-                    .all()
+        if user_id:
+            # Courses with this user's enrollment and progress in a single query
+            stmt = (
+                select(
+                    *COURSE_INFO_COLUMNS,
+                    Enrollment.user_id.isnot(None).label("is_enrolled"),
+                    CourseProgress.completion_percentage,
+                )
+                .outerjoin(
+                    Enrollment,
+                    and_(Enrollment.course_id == Course.id, Enrollment.user_id == user_id),
                 )
-                
-                enrollments = {e.course_id: True for e in user_enrollments}
-                
-                # Get all course progress entries for this user
-                progress_entries = (
-                    db.query(CourseProgress)
-                    .filter(CourseProgress.student_id == user_id)
-                    .all()
+                .outerjoin(
+                    CourseProgress,
+                    and_(
+                        CourseProgress.course_id == Course.id,
+                        CourseProgress.student_id == user_id,
+                    ),
                 )
-                
-                course_progress = {
-                    p.course_id: p.completion_percentage()
-                    for p in progress_entries
-                }
-        
-        courses_info = []
-        for course in courses:
-            # Check if user is enrolled in this course
-            is_enrolled = course.id in enrollments if enrollments else False
-            
-            # Get completion percentage if enrolled
-            completion_percentage = course_progress.get(course.id, 0.0) if is_enrolled else 0.0
-            
-            courses_info.append(
-                CourseInfo(
-                    id=course.id,
-                    title=course.title,
-                    category=course.category,
-                    rating=course.rating,
-                    teacher_id=course.teacher_id,
-                    is_enrolled=is_enrolled,
-                    completion_percentage=completion_percentage,
+            )
+        else:
+            stmt = select(
+                *COURSE_INFO_COLUMNS,
+                false().label("is_enrolled"),
+                null().label("completion_percentage"),
+            )
+
+        # Plain rows: no ORM instances or identity map for a read-only list
+        courses_info = [
+            CourseInfo(
+                id=row.id,
+                title=row.title,
+                category=row.category,
+                rating=row.rating,
+                teacher_id=row.teacher_id,
+                is_enrolled=bool(row.is_enrolled),
+                # Completion percentage only applies to enrolled courses
+                completion_percentage=(
+                    float(row.completion_percentage)
+                    if row.is_enrolled and row.completion_percentage is not None
+                    else 0.0
                 ),
             )
+            for row in db.execute(stmt)
+        ]
+        set_cached(cache_key, [info.model_dump() for info in courses_info], COURSES_TTL)
         return courses_info
 
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("Error listing courses")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.delete("/{course_id}", status_code=status.HTTP_200_OK)
 async def delete_course(
     course_id: int,
-    current_user: dict = Depends(get_current_user_jwt_required),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
     db: Session = Depends(get_db),
 ):
-
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied",
-        )
-
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:  # Check if the course exists
         raise HTTPException(
@@ -256,37 +371,24 @@ async def delete_course(
 
     # Delete all course files from S3
     try:
-        # 1. Delete course-level files
-        course_prefix = f"course_{course_id}/"
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=course_prefix)
-        if "Contents" in response:
-            for item in response["Contents"]:
-                s3.delete_object(Bucket=BUCKET_NAME, Key=item["Key"])
-                print(f"Deleted course file: {item['Key']}")
-
-        # 2. Get all assignments in the course and delete their files
-        assignments = (
-            db.query(Assignment).filter(Assignment.course_id == course_id).all()
-        )
-        for assignment in assignments:
-            # Delete assignment task files
-            assignment_prefix = f"assignments/{assignment.id}/task/"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=assignment_prefix)
-            if "Contents" in response:
-                for item in response["Contents"]:
-                    s3.delete_object(Bucket=BUCKET_NAME, Key=item["Key"])
-                    print(f"Deleted assignment file: {item['Key']}")
-
-            # Delete student submissions for this assignment
-            submissions_prefix = f"assignments/{assignment.id}/student_"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=submissions_prefix)
-            if "Contents" in response:
-                for item in response["Contents"]:
-                    s3.delete_object(Bucket=BUCKET_NAME, Key=item["Key"])
-                    print(f"Deleted submission file: {item['Key']}")
+        # Course-level files plus task files and student submissions of every assignment
+        assignment_ids = [
+            assignment_id
+            for (assignment_id,) in db.query(Assignment.id)
+            .filter(Assignment.course_id == course_id)
+            .all()
+        ]
+        prefixes = [f"course_{course_id}/"]
+        for assignment_id in assignment_ids:
+            prefixes.append(f"assignments/{assignment_id}/task/")
+            prefixes.append(f"assignments/{assignment_id}/student_")
+
+        # boto3 blocks, so keep the purge off the event loop
+        deleted = await asyncio.to_thread(_delete_s3_prefixes, prefixes)
+        logger.info("Deleted %s files for course %s", deleted, course_id)
 
     except Exception as e:
-        print(f"Error deleting files for course {course_id}: {str(e)}")
+        logger.warning("Error deleting files for course %s: %s", course_id, e)
         # Continue with course deletion even if file deletion fails
 
     try:
@@ -294,6 +396,9 @@ async def delete_course(
         db.query(Enrollment).filter(Enrollment.course_id == course_id).delete()
 
         # Delete any progress records for this course
+        db.query(AssignmentProgress).filter(
+            AssignmentProgress.course_id == course_id
+        ).delete()
         db.query(CourseProgress).filter(CourseProgress.course_id == course_id).delete()
 
         # Delete ratings for this course if any
@@ -308,31 +413,49 @@ async def delete_course(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting course: {str(e)}",
         )
+    invalidate_admin_stats()
+    invalidate_courses()
+    invalidate_course_reviews(course_id)
+    course_owner_cache.pop(course_id)
+    assignment_course_cache.clear()
 
     return {"message": "Course deleted successfully"}
 
 
+async def _broadcast_rating_update(course_id: int, new_average, ratings_count: int):
+    try:
+        await manager.broadcast_to_room(
+            {
+                "event": "rating_updated",
+                "course_id": course_id,
+                "new_rating": new_average,  # Send the actual average rating value
+                "ratings_count": ratings_count
+            },
+            f"course_{course_id}",
+        )
+    except Exception as e:
+        # Log the exception; the rating itself is already stored
+        logger.warning("Error broadcasting rating update: %s", e)
+
+
 @router.post("/{course_id}/rate", response_model=RatingResponse, status_code=201)
-async def rate_course(
+def rate_course(
     course_id: int,
     rating_data: RatingCreate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user_jwt_required),
     db: Session = Depends(get_db),
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    course_exists = db.execute(_COURSE_EXISTS_STMT, {"course_id": course_id}).scalar()
+    if not course_exists:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    existing_rating = (
-        db.query(Rating)
-        .filter(
-            Rating.user_id == current_user["user_id"],
-            Rating.course_id == course_id,
-        )
-        .first()
-    )
+    already_rated = db.execute(
+        _ALREADY_RATED_STMT,
+        {"user_id": current_user["user_id"], "course_id": course_id},
+    ).scalar()
 
-    if existing_rating:
+    if already_rated:
         raise HTTPException(status_code=400, detail="User already rated this course")
 
     new_rating = Rating(
@@ -341,19 +464,9 @@ async def rate_course(
         rating=rating_data.rating,
     )
     db.add(new_rating)
-    db.commit()
-    db.refresh(new_rating)
-
-    # Update course rating
-    all_ratings = db.query(Rating).filter(Rating.course_id == course_id).all()
-    total_rating = sum(r.rating for r in all_ratings)
-    course.ratings_count = len(all_ratings)
-    course.rating = (
-        total_rating / course.ratings_count if course.ratings_count else 0.0
-    )  # Calculate the new average
-    db.commit()
+    db.flush()
 
-    # Create response data before WebSocket broadcast
+    # Create response data before the commit expires the new rating
     response_data = {
         "id": new_rating.id,
         "user_id": new_rating.user_id,
@@ -361,21 +474,37 @@ async def rate_course(
         "rating": new_rating.rating
     }
 
-    # Send WebSocket notification
-    try:
-        room_id = f"course_{course_id}"
-        await manager.broadcast_to_room(
-            {
-                "event": "rating_updated",
-                "course_id": course_id,
-                "new_rating": course.rating,  # Send the actual average rating value
-                "ratings_count": course.ratings_count
-            },
-            room_id
+    # Update course rating in the same transaction. The aggregates run in the
+    # database, so no rating rows are loaded; a running mean would drift
+    # because course.rating is stored as an integer.
+    new_average, ratings_count = db.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .values(
+            rating=func.coalesce(
+                select(func.avg(Rating.rating))
+                .where(Rating.course_id == course_id)
+                .scalar_subquery(),
+                0,
+            ),
+            ratings_count=select(func.count())
+            .select_from(Rating)
+            .where(Rating.course_id == course_id)
+            .scalar_subquery(),
         )
-    except Exception as e:
-        # Log the exception but don't fail the request
-        print(f"Error broadcasting rating update: {str(e)}")
-    
+        .returning(Course.rating, Course.ratings_count)
+        .execution_options(synchronize_session=False)
+    ).one()
+    db.commit()
+    invalidate_courses()
+
+    # Push the new rating to the course room once the response is sent
+    background_tasks.add_task(
+        _broadcast_rating_update,
+        course_id,
+        new_average,
+        ratings_count,
+    )
+
     # Return the response data
     return response_data
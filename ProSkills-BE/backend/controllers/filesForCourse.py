@@ -1,14 +1,37 @@
-from typing import List, Optional, Tuple
+import asyncio
+import gzip
+import logging
+import shutil
+import tempfile
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from uuid import uuid4
 from datetime import datetime
+import mimetypes
 import os
+import re
 
 import boto3
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, Query, status
-from fastapi.responses import FileResponse, Response, StreamingResponse
+from boto3.s3.transfer import TransferConfig
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, Header, HTTPException, UploadFile, Query, status
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from sqlalchemy import exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from backend.cache import (
+    TASK_FILES_TTL,
+    TTLCache,
+    get_cached,
+    invalidate_task_files,
+    set_cached,
+    task_files_key,
+)
+from backend.constants import MAX_UPLOAD_FILE_SIZE
 from backend.dependencies.getdb import get_db
+from backend.dependencies.s3 import S3_CLIENT_CONFIG
 from backend.models import Assignment, AssignmentProgress, Course, Enrollment, OurUsers
 from backend.models.progress import AssignmentStatus
 from backend.oauth2 import get_current_user_jwt
@@ -17,53 +40,126 @@ from backend.schemas.file import (
     FileDeleteResponse,
     FileResponseSchema,
     FileUploadResponse,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    SubmissionConfirmRequest,
     SubmissionResponseSchema,
+    SubmissionUploadRequest,
 )
+from backend.services.course_progress import update_course_progress_in_background
 
 # Get AWS credentials from settings
 settings = get_settings()
 BUCKET_NAME = settings.BUCKET_NAME
 
-# Initialize S3 client
+# Initialize S3 client; one client is shared by all requests and threads
 s3 = boto3.client(
     "s3",
     aws_access_key_id=settings.ACCESS_KEY_ID,
     aws_secret_access_key=settings.SECRET_ACCESS_KEY,
     region_name="us-east-1",  # Specify your region
+    config=S3_CLIENT_CONFIG,
 )
 
+# Shared pool for fanning out independent S3 requests; they are network bound,
+# so threads overlap the round trips
+S3_MAX_WORKERS = 32
+s3_executor = ThreadPoolExecutor(max_workers=S3_MAX_WORKERS, thread_name_prefix="s3")
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/file-storage", tags=["file-storage"])
 
-TEMP_DOWNLOAD_DIR = "temp_downloads"
+# Access-check lookups shared by the file handlers (see get_assignment_course)
+assignment_course_cache = TTLCache(maxsize=1024, ttl=60)
+course_owner_cache = TTLCache(maxsize=1024, ttl=60)
 
-os.makedirs(TEMP_DOWNLOAD_DIR, exist_ok=True)
+# Submission keys: assignments/<assignment_id>/student_<student_id>/.../<filename>
+SUBMISSION_KEY_RE = re.compile(r"^assignments/\d+/student_(\d+)/(?:.*/)?([^/]+)$")
+# Owner prefixes checked before deleting a file
+ASSIGNMENT_KEY_RE = re.compile(r"assignments/(\d+)/")
+COURSE_KEY_RE = re.compile(r"course_(\d+)/")
+TASK_FILE_KEY_RE = re.compile(r"assignments/(\d+)/task/")
 
 # File size limits (in bytes)
-MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
-ALLOWED_CONTENT_TYPES = [
-    "application/pdf",
-    "application/msword",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "application/vnd.ms-excel",
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    "application/vnd.ms-powerpoint",
-    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    "application/zip",
-    "text/plain",
-    "text/csv",
-    "image/jpeg",
-    "image/png",
-    "image/gif",
-    "application/x-python-code",
-    "text/x-python",
-    "application/json",
-    "application/xml",
-    "text/markdown",
-]
-
-
-# Helper function to check file type and size
-async def validate_file(file: Optional[UploadFile] = None):
+MAX_FILE_SIZE = MAX_UPLOAD_FILE_SIZE  # 50 MB
+# Lifetime of pre-signed upload forms (in seconds)
+PRESIGNED_UPLOAD_EXPIRES = 600
+# Multipart settings for uploads
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+# Read size when streaming downloads; iterating the S3 body directly yields 1 KB pieces
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+ALLOWED_CONTENT_TYPES = frozenset(
+    {
+        "application/pdf",
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/vnd.ms-excel",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "application/vnd.ms-powerpoint",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        "application/zip",
+        "text/plain",
+        "text/csv",
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "application/x-python-code",
+        "text/x-python",
+        "application/json",
+        "application/xml",
+        "text/markdown",
+    }
+)
+# Plain-text types; they have no signature, but must not contain NUL bytes
+TEXT_CONTENT_TYPES = frozenset(
+    {
+        "text/plain",
+        "text/csv",
+        "text/markdown",
+        "text/x-python",
+        "application/x-python-code",
+        "application/json",
+        "application/xml",
+    }
+)
+# Leading bytes every file of a binary type starts with; checked so that a
+# client can't pass arbitrary content off under an allowed Content-Type
+OLE2_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # .doc, .xls, .ppt
+ZIP_SIGNATURES = (b"PK\x03\x04", b"PK\x05\x06")  # .zip and Office Open XML
+MAGIC_SIGNATURES = {
+    "application/pdf": (b"%PDF-",),
+    "application/msword": (OLE2_SIGNATURE,),
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ZIP_SIGNATURES,
+    "application/vnd.ms-excel": (OLE2_SIGNATURE,),
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": ZIP_SIGNATURES,
+    "application/vnd.ms-powerpoint": (OLE2_SIGNATURE,),
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": ZIP_SIGNATURES,
+    "application/zip": ZIP_SIGNATURES,
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+}
+# How much of an upload is read to check its type
+SNIFF_SIZE = 512
+# Text uploads are stored gzip-compressed (Content-Encoding: gzip) with their
+# uncompressed length in the object metadata. Downloads pass the encoding on
+# to clients that accept gzip and decompress for the rest. Listings and upload
+# responses report the stored size, which list_objects_v2 returns for free.
+COMPRESSIBLE_CONTENT_TYPES = TEXT_CONTENT_TYPES
+GZIP_COMPRESSLEVEL = 6
+ORIGINAL_SIZE_METADATA = "original-size"
+
+
+# Helper function to check file type and size. Only the first SNIFF_SIZE bytes
+# are read; the body stays in the upload's spooled temp file and is streamed
+# to S3 by upload_to_s3.
+async def validate_file(file: Optional[UploadFile] = None) -> Optional[int]:
     # If no file provided, return None to indicate optional file
     if not file or not file.filename:
         return None
@@ -77,47 +173,211 @@ async def validate_file(file: Optional[UploadFile] = None):
         )
 
     # Check file size
-    try:
-        # Read first chunk to check size without loading entire file
-        first_chunk = await file.read(MAX_FILE_SIZE + 1)
-        if len(first_chunk) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024)} MB",
-            )
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    await file.seek(0)
+    if size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024)} MB",
+        )
 
-        # Reset file position for later reading
-        await file.seek(0)
-        return first_chunk
-    except Exception as e:
+    # Check that the content matches the declared type
+    head = await file.read(SNIFF_SIZE)
+    await file.seek(0)
+    signatures = MAGIC_SIGNATURES.get(content_type)
+    if (signatures and not head.startswith(signatures)) or (
+        content_type in TEXT_CONTENT_TYPES and b"\x00" in head
+    ):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error validating file: {str(e)}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File content does not match type {content_type}",
+        )
+    return size
+
+
+# Stream an uploaded file to S3; files above the multipart threshold go up in
+# parallel parts, so memory use stays at a few chunks whatever the file size.
+# Returns the stored size, i.e. the compressed size for texts.
+def upload_to_s3(file: UploadFile, key: str) -> int:
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    extra_args = {"ContentType": file.content_type}
+    if file.content_type not in COMPRESSIBLE_CONTENT_TYPES:
+        s3.upload_fileobj(
+            file.file,
+            BUCKET_NAME,
+            key,
+            ExtraArgs=extra_args,
+            Config=UPLOAD_TRANSFER_CONFIG,
         )
+        return size
+
+    # Compress into a spooled temp file first; it only spills to disk for
+    # texts that are large even after compression
+    with tempfile.SpooledTemporaryFile(
+        max_size=UPLOAD_TRANSFER_CONFIG.multipart_threshold,
+    ) as body:
+        with gzip.GzipFile(fileobj=body, mode="wb", compresslevel=GZIP_COMPRESSLEVEL) as gz:
+            shutil.copyfileobj(file.file, gz, DOWNLOAD_CHUNK_SIZE)
+        stored_size = body.tell()
+        body.seek(0)
+        extra_args["ContentEncoding"] = "gzip"
+        extra_args["Metadata"] = {ORIGINAL_SIZE_METADATA: str(size)}
+        s3.upload_fileobj(
+            body,
+            BUCKET_NAME,
+            key,
+            ExtraArgs=extra_args,
+            Config=UPLOAD_TRANSFER_CONFIG,
+        )
+    return stored_size
+
+
+# Whether an Accept-Encoding header allows a gzip-encoded response
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip().lower()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+# Decompress a gzip-encoded S3 body chunk by chunk
+def gunzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+# Stream a get_object response to the client in DOWNLOAD_CHUNK_SIZE pieces.
+# Compressed texts keep their Content-Encoding for clients that accept gzip
+# and are decompressed on the fly for the others.
+def s3_streaming_response(
+    response: dict, filename: str, accept_encoding: Optional[str] = None
+) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    body = response["Body"].iter_chunks(DOWNLOAD_CHUNK_SIZE)
+    encoding = response.get("ContentEncoding")
+    if encoding:
+        headers["Vary"] = "Accept-Encoding"
+        if encoding == "gzip" and not accepts_gzip(accept_encoding):
+            body = gunzip_chunks(body)
+        else:
+            headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        body,
+        media_type=response.get("ContentType", "application/octet-stream"),
+        headers=headers,
+    )
+
+
+# Content type of a stored object, derived from its key. Uploads are limited
+# to ALLOWED_CONTENT_TYPES, all of which map from the file extension, so
+# listings don't need a head_object round trip per file.
+def guess_content_type(file_key: str) -> str:
+    return mimetypes.guess_type(file_key)[0] or "application/octet-stream"
+
+
+# Every object under a prefix, page by page; a single list_objects_v2 call
+# stops at 1000 keys
+def iter_s3_objects(prefix: str = "") -> Iterator[dict]:
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+# Same as iter_s3_objects but fully listed, e.g. when run on s3_executor
+def list_s3_objects(prefix: str) -> List[dict]:
+    return list(iter_s3_objects(prefix))
+
+
+def list_task_files(assignment_id: int) -> List[dict]:
+    """
+    Task files attached to an assignment; an S3 error yields an empty list.
+    Listings are cached briefly in Redis, since assignment responses list
+    the files of every assignment they contain.
+    """
+    cached = get_cached(task_files_key(assignment_id))
+    if cached is not None:
+        return cached
+
+    try:
+        prefix = f"assignments/{assignment_id}/task/"
+        files = [
+            {
+                "key": item["Key"],
+                "size": item["Size"],
+                # ISO string, so cached and fresh listings serialize alike
+                "last_modified": item["LastModified"].isoformat(),
+                "filename": item["Key"].split("/")[-1],
+            }
+            for item in list_s3_objects(prefix)
+        ]
+    except Exception as e:
+        logger.warning("Error getting files for assignment %s: %s", assignment_id, e)
+        return []
+
+    set_cached(task_files_key(assignment_id), files, TASK_FILES_TTL)
+    return files
+
+
+# Delete every object under a prefix, one delete_objects call per listed page
+def delete_s3_prefix(prefix: str) -> None:
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        keys = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+        if keys:
+            s3.delete_objects(Bucket=BUCKET_NAME, Delete={"Objects": keys, "Quiet": True})
+
+
+# Access checks are repeated across handlers within one request; the session
+# lives for exactly one request, so its info dict serves as the memo
+def _memoized_check(db: Session, key: tuple, check) -> bool:
+    memo = db.info.setdefault("access_checks", {})
+    if key not in memo:
+        memo[key] = bool(check())
+    return memo[key]
 
 
 # Helper function to check course enrollment
 def check_enrollment(db: Session, user_id: int, course_id: int) -> bool:
-    return (
-        db.query(Enrollment)
-        .filter(Enrollment.user_id == user_id, Enrollment.course_id == course_id)
-        .first()
-        is not None
+    return _memoized_check(
+        db,
+        ("enrolled", user_id, course_id),
+        lambda: db.query(
+            exists().where(
+                Enrollment.user_id == user_id, Enrollment.course_id == course_id
+            )
+        ).scalar(),
     )
 
 
-# Helper function to check course ownership
+# Helper function to check course ownership. A course's teacher never
+# changes, so this goes through the cross-request owner cache; enrollment
+# above is only memoized per request because it can be revoked.
 def check_course_ownership(db: Session, user_id: int, course_id: int) -> bool:
-    return (
-        db.query(Course)
-        .filter(Course.id == course_id, Course.teacher_id == user_id)
-        .first()
-        is not None
-    )
+    course = get_course_owner(db, course_id)
+    return course is not None and course.teacher_id == user_id
 
 
 @router.get("", response_model=List[FileResponseSchema])
-async def get_all_files(
+def get_all_files(
     course_id: Optional[int] = None,
     current_user: dict = Depends(get_current_user_jwt),
     db: Session = Depends(get_db),
@@ -131,7 +391,7 @@ async def get_all_files(
 
         # If course_id provided, verify course exists and user has access
         if course_id:
-            course = db.query(Course).filter(Course.id == course_id).first()
+            course = get_course_owner(db, course_id)
             if not course:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -151,7 +411,6 @@ async def get_all_files(
 
             # Filter by course prefix in S3
             prefix = f"course_{course_id}/"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
         else:
             # For non-admin/teacher users, only show files from their courses
             if user_role not in ["teacher", "admin"]:
@@ -161,19 +420,16 @@ async def get_all_files(
                 )
 
             # Get all files
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME)
-
-        if "Contents" not in response:
-            return []
+            prefix = ""
 
         files = []
-        for item in response.get("Contents", []):
+        for item in iter_s3_objects(prefix):
             files.append(
                 FileResponseSchema(
                     filename=item["Key"].split("/")[-1],
                     file_key=item["Key"],
                     file_size=item["Size"],
-                    content_type=s3.head_object(Bucket=BUCKET_NAME, Key=item["Key"]).get("ContentType", "application/octet-stream"),
+                    content_type=guess_content_type(item["Key"]),
                     upload_time=item["LastModified"],
                 ),
             )
@@ -186,6 +442,85 @@ async def get_all_files(
         )
 
 
+# Course id and teacher of an assignment in one round trip; None if the
+# assignment doesn't exist. Neither changes once the assignment is created,
+# so hits are kept for a minute (dropped early when the assignment is deleted).
+def get_assignment_course(db: Session, assignment_id: int):
+    course = assignment_course_cache.get(assignment_id)
+    if course is None:
+        course = (
+            db.query(Assignment.course_id, Course.teacher_id)
+            .join(Course, Course.id == Assignment.course_id)
+            .filter(Assignment.id == assignment_id)
+            .first()
+        )
+        if course is not None:
+            assignment_course_cache.set(assignment_id, course)
+    return course
+
+
+# Teacher of a course, cached the same way; None if the course doesn't exist
+def get_course_owner(db: Session, course_id: int):
+    course = course_owner_cache.get(course_id)
+    if course is None:
+        course = (
+            db.query(Course.id, Course.teacher_id)
+            .filter(Course.id == course_id)
+            .first()
+        )
+        if course is not None:
+            course_owner_cache.set(course_id, course)
+    return course
+
+
+# Helper function to authorize an upload and pick its S3 key
+def build_upload_key(
+    db: Session,
+    current_user: dict,
+    course_id: Optional[int],
+    filename: str,
+) -> str:
+    user_id = current_user.get("user_id")
+    user_role = current_user.get("role")
+
+    # If course_id provided, verify course exists and user has permissions
+    if course_id:
+        course = get_course_owner(db, course_id)
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found",
+            )
+
+        # Verify user has permission to upload to this course
+        if user_role not in ["teacher", "admin"] and not check_course_ownership(
+            db,
+            user_id,
+            course_id,
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to upload to this course",
+            )
+
+        # Create a prefix for this course
+        key = f"course_{course_id}/{uuid4().hex}_{filename}"
+    else:
+        # Only admins and teachers can upload general files
+        if user_role not in ["teacher", "admin"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to upload general files",
+            )
+
+        # Generate a unique filename with a folder structure to avoid collisions
+        timestamp = datetime.now().strftime("%Y%m%d")
+        unique_filename = f"{uuid4().hex}_{filename}"
+        key = f"general/{timestamp}/{unique_filename}"
+
+    return key
+
+
 @router.post("", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
     file: UploadFile = File(...),
@@ -198,53 +533,12 @@ async def upload_file(
     """
     try:
         # Validate file
-        file_content = await validate_file(file)
-
-        user_id = current_user.get("user_id")
-        user_role = current_user.get("role")
-
-        # If course_id provided, verify course exists and user has permissions
-        if course_id:
-            course = db.query(Course).filter(Course.id == course_id).first()
-            if not course:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Course not found",
-                )
-
-            # Verify user has permission to upload to this course
-            if user_role not in ["teacher", "admin"] and not check_course_ownership(
-                db,
-                user_id,
-                course_id,
-            ):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not authorized to upload to this course",
-                )
+        await validate_file(file)
 
-            # Create a prefix for this course
-            key = f"course_{course_id}/{uuid4().hex}_{file.filename}"
-        else:
-            # Only admins and teachers can upload general files
-            if user_role not in ["teacher", "admin"]:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not authorized to upload general files",
-                )
-
-            # Generate a unique filename with a folder structure to avoid collisions
-            timestamp = datetime.now().strftime("%Y%m%d")
-            unique_filename = f"{uuid4().hex}_{file.filename}"
-            key = f"general/{timestamp}/{unique_filename}"
+        key = build_upload_key(db, current_user, course_id, file.filename)
 
-        # Upload directly from memory to S3
-        s3.put_object(
-            Bucket=BUCKET_NAME,
-            Key=key,
-            Body=file_content,
-            ContentType=file.content_type,
-        )
+        # Stream the upload to S3
+        await asyncio.to_thread(upload_to_s3, file, key)
 
         return FileUploadResponse(message="File uploaded successfully", file_key=key)
 
@@ -257,10 +551,103 @@ async def upload_file(
         )
 
 
+@router.post("/presign-upload", response_model=PresignedUploadResponse)
+def presign_upload(
+    upload_request: PresignedUploadRequest,
+    current_user: dict = Depends(get_current_user_jwt),
+    db: Session = Depends(get_db),
+):
+    """
+    Authorize an upload and return a pre-signed S3 POST for it, so the
+    client sends the file straight to S3 instead of through this API.
+    Type and size limits are enforced by the POST policy.
+    """
+    content_type = upload_request.content_type
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {content_type} not allowed",
+        )
+
+    key = build_upload_key(db, current_user, upload_request.course_id, upload_request.filename)
+
+    try:
+        presigned = s3.generate_presigned_post(
+            BUCKET_NAME,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                ["content-length-range", 1, MAX_FILE_SIZE],
+                {"Content-Type": content_type},
+            ],
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRES,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"S3 service error: {str(e)}",
+        )
+
+    return PresignedUploadResponse(
+        url=presigned["url"],
+        fields=presigned["fields"],
+        file_key=key,
+    )
+
+
+def check_submission_access(db: Session, assignment_id: int, user_id: int) -> int:
+    """Check that the student may submit the assignment; returns its course id."""
+    assignment = get_assignment_course(db, assignment_id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+
+    if not check_enrollment(db, user_id, assignment.course_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not enrolled in this course"
+        )
+
+    return assignment.course_id
+
+
+def submission_key_prefix(assignment_id: int, user_id: int) -> str:
+    return f"assignments/{assignment_id}/student_{user_id}/"
+
+
+def record_submission(
+    db: Session, user_id: int, assignment_id: int, course_id: int, file_key: str
+) -> None:
+    # Create or update assignment progress in a single UPSERT; the unique
+    # (student_id, assignment_id) index arbitrates concurrent submits
+    submitted = {
+        "submission_file_key": file_key,
+        "status": AssignmentStatus.SUBMITTED,
+        "submitted_at": datetime.now(),
+    }
+    db.execute(
+        pg_insert(AssignmentProgress)
+        .values(
+            student_id=user_id,
+            assignment_id=assignment_id,
+            course_id=course_id,
+            **submitted,
+        )
+        .on_conflict_do_update(
+            index_elements=["student_id", "assignment_id"],
+            set_=submitted,
+        )
+    )
+    db.commit()
+
+
 @router.post("/assignments/{assignment_id}/submit", response_model=FileResponseSchema)
 async def submit_assignment(
     assignment_id: int,
     file: UploadFile,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt),
 ):
@@ -270,82 +657,39 @@ async def submit_assignment(
     This endpoint:
     1. Uploads the submission file
     2. Automatically marks the assignment as submitted (but not completed)
-    3. Updates the course progress
+    3. Updates the course progress once the response is sent
     
     Note: For assignments that don't require a file submission,
     use /progress/mark-assignment-complete/{assignment_id} instead.
+    Large files are better sent straight to S3 through
+    /assignments/{assignment_id}/upload-url and confirm-upload.
     """
-    from backend.controllers.progress import update_course_progress
-    
     user_id = current_user.get("user_id")
-
-    # Check if assignment exists
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
-    if not assignment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Assignment not found"
-        )
-
-    # Check if student is enrolled in the course
-    if not check_enrollment(db, user_id, assignment.course_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not enrolled in this course"
-        )
+    course_id = check_submission_access(db, assignment_id, user_id)
 
     try:
         # 1. Upload the file
-        file_key = f"assignments/{assignment_id}/student_{user_id}/{file.filename}"
-        file_content = await validate_file(file)
+        file_key = f"{submission_key_prefix(assignment_id, user_id)}{file.filename}"
+        await validate_file(file)
         
         # Upload to S3
-        s3.put_object(
-            Bucket=BUCKET_NAME,
-            Key=file_key,
-            Body=file_content,
-            ContentType=file.content_type,
-        )
-
-        # 2. Create or update assignment progress with row locking to prevent concurrent modifications
-        progress = (
-            db.query(AssignmentProgress)
-            .filter(
-                AssignmentProgress.student_id == user_id,
-                AssignmentProgress.assignment_id == assignment_id
-            )
-            .with_for_update()  # Lock the row to prevent concurrent updates
-            .first()
-        )
-
-        if not progress:
-            progress = AssignmentProgress(
-                student_id=user_id,
-                assignment_id=assignment_id,
-                submission_file_key=file_key,
-                status=AssignmentStatus.SUBMITTED,
-                submitted_at=datetime.now()
-            )
-            db.add(progress)
-        else:
-            progress.submission_file_key = file_key
-            progress.status = AssignmentStatus.SUBMITTED
-            progress.submitted_at = datetime.now()
+        stored_size = await asyncio.to_thread(upload_to_s3, file, file_key)
 
-        # Explicitly flush changes to database before commit
-        db.flush()
-        db.commit()
-        
-        # Get a fresh copy of the progress object to ensure we have the latest data
-        db.refresh(progress)
+        # 2. Mark the assignment as submitted
+        record_submission(db, user_id, assignment_id, course_id, file_key)
 
-        # 3. Update course progress
-        update_course_progress(db, user_id, assignment.course_id)
+        # 3. Update course progress in a session of its own; the client
+        # doesn't need to wait for it
+        background_tasks.add_task(
+            update_course_progress_in_background,
+            user_id,
+            course_id,
+        )
 
         return FileResponseSchema(
             filename=file.filename,
             file_key=file_key,
-            file_size=file.size,
+            file_size=stored_size,
             content_type=file.content_type,
             upload_time=datetime.now(),
         )
@@ -357,11 +701,124 @@ async def submit_assignment(
         )
 
 
+@router.post(
+    "/assignments/{assignment_id}/upload-url",
+    response_model=PresignedUploadResponse,
+)
+def presign_submission_upload(
+    assignment_id: int,
+    upload_request: SubmissionUploadRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_jwt),
+):
+    """
+    Return a pre-signed S3 POST for an assignment submission, so the file
+    goes straight to S3 instead of through this API. Once the upload is
+    done the client calls confirm-upload to record the submission.
+    """
+    user_id = current_user.get("user_id")
+    check_submission_access(db, assignment_id, user_id)
+
+    content_type = upload_request.content_type
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {content_type} not allowed",
+        )
+
+    filename = os.path.basename(upload_request.filename)
+    if not filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filename is required",
+        )
+    key = f"{submission_key_prefix(assignment_id, user_id)}{filename}"
+
+    try:
+        presigned = s3.generate_presigned_post(
+            BUCKET_NAME,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                ["content-length-range", 1, MAX_FILE_SIZE],
+                {"Content-Type": content_type},
+            ],
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRES,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"S3 service error: {str(e)}",
+        )
+
+    return PresignedUploadResponse(
+        url=presigned["url"],
+        fields=presigned["fields"],
+        file_key=key,
+    )
+
+
+@router.post(
+    "/assignments/{assignment_id}/confirm-upload",
+    response_model=FileResponseSchema,
+)
+def confirm_submission_upload(
+    assignment_id: int,
+    confirm_request: SubmissionConfirmRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_jwt),
+):
+    """
+    Record a submission the client uploaded with a pre-signed POST from
+    upload-url, and mark the assignment as submitted.
+    """
+    user_id = current_user.get("user_id")
+    course_id = check_submission_access(db, assignment_id, user_id)
+
+    file_key = confirm_request.file_key
+    if not file_key.startswith(submission_key_prefix(assignment_id, user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to submit this file",
+        )
+
+    # Make sure the upload actually reached S3 before recording it
+    try:
+        head = s3.head_object(Bucket=BUCKET_NAME, Key=file_key)
+    except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Uploaded file not found",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"S3 service error: {str(e)}",
+        )
+
+    record_submission(db, user_id, assignment_id, course_id, file_key)
+    background_tasks.add_task(
+        update_course_progress_in_background,
+        user_id,
+        course_id,
+    )
+
+    return FileResponseSchema(
+        filename=file_key.rsplit("/", 1)[-1],
+        file_key=file_key,
+        file_size=head["ContentLength"],
+        content_type=head.get("ContentType", "application/octet-stream"),
+        upload_time=head["LastModified"],
+        assignment_id=assignment_id,
+    )
+
+
 @router.get(
     "/assignments/{assignment_id}/task",
     response_model=List[FileResponseSchema],
 )
-async def get_assignment_files(
+def get_assignment_files(
     assignment_id: int,
     current_user: dict = Depends(get_current_user_jwt),
     db: Session = Depends(get_db),
@@ -373,27 +830,19 @@ async def get_assignment_files(
         user_id = current_user.get("user_id")
         user_role = current_user.get("role")
 
-        # Check if assignment exists
-        assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
-        if not assignment:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Assignment not found",
-            )
-
-        # Get the associated course
-        course = db.query(Course).filter(Course.id == assignment.course_id).first()
+        # Check if assignment exists, along with its course
+        course = get_assignment_course(db, assignment_id)
         if not course:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found",
+                detail="Assignment not found",
             )
 
         # Verify access permissions
         if (
             user_role not in ["teacher", "admin"]
             and course.teacher_id != user_id
-            and not check_enrollment(db, user_id, course.id)
+            and not check_enrollment(db, user_id, course.course_id)
         ):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -402,19 +851,15 @@ async def get_assignment_files(
 
         # Filter by assignment prefix in S3
         prefix = f"assignments/{assignment_id}/task/"
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-        if "Contents" not in response:
-            return []
 
         files = []
-        for item in response.get("Contents", []):
+        for item in iter_s3_objects(prefix):
             files.append(
                 FileResponseSchema(
                     filename=item["Key"].split("/")[-1],
                     file_key=item["Key"],
                     file_size=item["Size"],
-                    content_type=s3.head_object(Bucket=BUCKET_NAME, Key=item["Key"]).get("ContentType", "application/octet-stream"),
+                    content_type=guess_content_type(item["Key"]),
                     upload_time=item["LastModified"],
                 ),
             )
@@ -431,7 +876,7 @@ async def get_assignment_files(
     "/assignments/{assignment_id}/submissions",
     response_model=List[FileResponseSchema],
 )
-async def get_assignment_submissions(
+def get_assignment_submissions(
     assignment_id: int,
     student_id: Optional[int] = Query(None),
     current_user: dict = Depends(get_current_user_jwt),
@@ -444,20 +889,12 @@ async def get_assignment_submissions(
         user_id = current_user.get("user_id")
         user_role = current_user.get("role")
 
-        # Check if assignment exists
-        assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
-        if not assignment:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Assignment not found",
-            )
-
-        # Get the associated course
-        course = db.query(Course).filter(Course.id == assignment.course_id).first()
+        # Check if assignment exists, along with its course
+        course = get_assignment_course(db, assignment_id)
         if not course:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found",
+                detail="Assignment not found",
             )
 
         # Teachers and admins can see all submissions, students can only see their own
@@ -475,7 +912,7 @@ async def get_assignment_submissions(
                 )
 
             # Check if student is enrolled in the course
-            if not check_enrollment(db, user_id, course.id):
+            if not check_enrollment(db, user_id, course.course_id):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You are not enrolled in this course",
@@ -489,19 +926,15 @@ async def get_assignment_submissions(
             )
 
         # Get submissions from S3
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-        if "Contents" not in response:
-            return []
 
         files = []
-        for item in response.get("Contents", []):
+        for item in iter_s3_objects(prefix):
             files.append(
                 FileResponseSchema(
                     filename=item["Key"].split("/")[-1],
                     file_key=item["Key"],
                     file_size=item["Size"],
-                    content_type=s3.head_object(Bucket=BUCKET_NAME, Key=item["Key"]).get("ContentType", "application/octet-stream"),
+                    content_type=guess_content_type(item["Key"]),
                     upload_time=item["LastModified"],
                 ),
             )
@@ -518,7 +951,7 @@ async def get_assignment_submissions(
     "/course/{course_id}/submissions",
     response_model=List[SubmissionResponseSchema],
 )
-async def get_course_submissions(
+def get_course_submissions(
     course_id: int,
     student_id: Optional[int] = Query(None),
     current_user: dict = Depends(get_current_user_jwt),
@@ -535,7 +968,7 @@ async def get_course_submissions(
         user_role = current_user.get("role")
 
         # Check if course exists
-        course = db.query(Course).filter(Course.id == course_id).first()
+        course = get_course_owner(db, course_id)
         if not course:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -543,7 +976,11 @@ async def get_course_submissions(
             )
 
         # Get all assignments for this course
-        assignments = db.query(Assignment).filter(Assignment.course_id == course_id).all()
+        assignments = (
+            db.query(Assignment.id, Assignment.title)
+            .filter(Assignment.course_id == course_id)
+            .all()
+        )
         if not assignments:
             return []  # No assignments in this course
 
@@ -581,104 +1018,86 @@ async def get_course_submissions(
                 detail="Not authorized to view submissions",
             )
 
-        # Если запрашиваются конкретные студенты, получаем информацию о них
-        students_info = {}
+        # Students with a SUBMITTED (not yet graded) submission, per assignment,
+        # fetched for all assignments in one query
+        progress_query = db.query(
+            AssignmentProgress.assignment_id,
+            AssignmentProgress.student_id,
+        ).filter(
+            AssignmentProgress.assignment_id.in_(assignment_titles),
+            AssignmentProgress.status == AssignmentStatus.SUBMITTED,
+        )
         if target_student_id:
-            student = db.query(OurUsers).filter(OurUsers.id == target_student_id).first()
-            if student:
-                students_info[student.id] = f"{student.first_name} {student.last_name}"
-        
+            progress_query = progress_query.filter(
+                AssignmentProgress.student_id == target_student_id
+            )
+        submitted_by_assignment = defaultdict(set)
+        for assignment_id, submitted_student_id in progress_query:
+            submitted_by_assignment[assignment_id].add(submitted_student_id)
+
+        if not submitted_by_assignment:
+            return []  # Nothing waiting to be checked
+
+        # Names of every student that can appear below, in one query
+        all_student_ids = set().union(*submitted_by_assignment.values())
+        students_info = {
+            id_: f"{first_name} {last_name}"
+            for id_, first_name, last_name in db.query(
+                OurUsers.id, OurUsers.first_name, OurUsers.last_name
+            ).filter(OurUsers.id.in_(all_student_ids))
+        }
+
+        # Only assignments with ungraded submissions (for this student) are listed
+        pending = [
+            assignment
+            for assignment in assignments
+            if submitted_by_assignment.get(assignment.id)
+        ]
+        if target_student_id:
+            # Build the S3 prefix for this student
+            prefixes = [
+                f"assignments/{assignment.id}/student_{target_student_id}/"
+                for assignment in pending
+            ]
+        else:
+            # Get all submissions for each assignment (teacher/admin only)
+            prefixes = [f"assignments/{assignment.id}/student_" for assignment in pending]
+
+        # Query S3 for all assignments concurrently
+        listings = s3_executor.map(list_s3_objects, prefixes)
+
         # Collect all files across assignments
         all_files = []
-        
-        for assignment in assignments:
-            # Get assignment progress records to filter out already graded/completed submissions
-            if target_student_id:
-                # For specific student, get their progress
-                progress_records = (
-                    db.query(AssignmentProgress)
-                    .filter(
-                        AssignmentProgress.assignment_id == assignment.id,
-                        AssignmentProgress.student_id == target_student_id,
-                        AssignmentProgress.status.in_([AssignmentStatus.SUBMITTED])  # Only get SUBMITTED status
-                    )
-                    .all()
-                )
-                # Skip if this student's submission is already graded or not submitted
-                if not progress_records:
+
+        for assignment, items in zip(pending, listings):
+            student_ids = submitted_by_assignment[assignment.id]
+            for item in items:
+                # Извлекаем ID студента и имя файла из ключа
+                match = SUBMISSION_KEY_RE.match(item["Key"])
+                if not match:
                     continue
-                
-                # Build the S3 prefix for this student
-                prefix = f"assignments/{assignment.id}/student_{target_student_id}/"
-            else:
-                # For all students, get progress records with SUBMITTED status
-                progress_records = (
-                    db.query(AssignmentProgress)
-                    .filter(
-                        AssignmentProgress.assignment_id == assignment.id,
-                        AssignmentProgress.status.in_([AssignmentStatus.SUBMITTED])  # Only get SUBMITTED status
-                    )
-                    .all()
-                )
-                
-                # Skip if no submissions or all submissions are already graded
-                if not progress_records:
+                file_student_id = int(match[1])
+                filename = match[2]
+
+                # Skip if this student's submission has already been graded
+                # (when we're fetching all students' submissions)
+                if not target_student_id and file_student_id not in student_ids:
                     continue
-                
-                # Get student IDs with ungraded submissions
-                student_ids = [record.student_id for record in progress_records]
-                
-                # Get student info for all these students
-                students = db.query(OurUsers).filter(OurUsers.id.in_(student_ids)).all()
-                for student in students:
-                    students_info[student.id] = f"{student.first_name} {student.last_name}"
-                
-                # Get all submissions for this assignment (teacher/admin only)
-                prefix = f"assignments/{assignment.id}/student_"
-            
-            # Query S3 for files
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-            
-            if "Contents" in response:
-                for item in response.get("Contents", []):
-                    # Извлекаем ID студента из ключа файла, если возможно
-                    file_key_parts = item["Key"].split("/")
-                    file_student_id = None
-                    if len(file_key_parts) >= 3 and file_key_parts[2].startswith("student_"):
-                        try:
-                            file_student_id = int(file_key_parts[2].split("_")[1])
-                            
-                            # Skip if this student's submission has already been graded
-                            # (when we're fetching all students' submissions)
-                            if not target_student_id:
-                                # Check if this student's submission appears in our ungraded list
-                                if file_student_id not in student_ids:
-                                    continue
-                            
-                            # Если этого студента нет в нашем кэше, получаем его имя
-                            if file_student_id not in students_info:
-                                student = db.query(OurUsers).filter(OurUsers.id == file_student_id).first()
-                                if student:
-                                    students_info[file_student_id] = f"{student.first_name} {student.last_name}"
-                        except (IndexError, ValueError):
-                            pass
-
-                    # Create file response object with assignment information
-                    file_info = SubmissionResponseSchema(
-                        filename=item["Key"].split("/")[-1],
-                        file_key=item["Key"],
-                        file_size=item["Size"],
-                        content_type=s3.head_object(Bucket=BUCKET_NAME, Key=item["Key"]).get(
-                            "ContentType", "application/octet-stream"
-                        ),
-                        upload_time=item["LastModified"],
-                        assignment_id=assignment.id,
-                        assignment_title=assignment_titles.get(assignment.id, ""),
-                        student_id=file_student_id,
-                        student_name=students_info.get(file_student_id, "")
-                    )
-                    all_files.append(file_info)
-        
+
+                # Create file response object with assignment information
+                file_info = SubmissionResponseSchema(
+                    filename=filename,
+                    file_key=item["Key"],
+                    file_size=item["Size"],
+                    content_type=guess_content_type(item["Key"]),
+                    upload_time=item["LastModified"],
+                    assignment_id=assignment.id,
+                    assignment_title=assignment_titles.get(assignment.id, ""),
+                    student_id=file_student_id,
+                    student_name=students_info.get(file_student_id, "")
+                )
+                all_files.append(file_info)
+
         return all_files
 
     except Exception as e:
@@ -717,7 +1136,7 @@ def validate_file_access(
         )
 
     # Get course
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = get_course_owner(db, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -739,26 +1158,17 @@ def validate_file_access(
     return course, is_teacher or is_admin
 
 
-def get_file_from_s3(file_key: str) -> Tuple[StreamingResponse, str]:
+def get_file_from_s3(
+    file_key: str, accept_encoding: Optional[str] = None
+) -> Tuple[StreamingResponse, str]:
     """
     Get a file from S3 by its key and return it as a StreamingResponse
     """
     try:
         response = s3.get_object(Bucket=BUCKET_NAME, Key=file_key)
-        content_type = response["ContentType"]
         filename = file_key.split("/")[-1]
 
-        def iterfile():
-            yield from response["Body"]
-
-        return (
-            StreamingResponse(
-                iterfile(),
-                media_type=content_type,
-                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-            ),
-            filename,
-        )
+        return s3_streaming_response(response, filename, accept_encoding), filename
     except s3.exceptions.NoSuchKey:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -772,39 +1182,50 @@ def get_file_from_s3(file_key: str) -> Tuple[StreamingResponse, str]:
 
 
 @router.get("/download/{file_key:path}")
-async def download_file(
+def download_file(
     file_key: str,
+    accept_encoding: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt),
-) -> StreamingResponse:
+) -> Response:
     """
     Download a file from S3.
 
     Args:
         file_key: Key of the file in S3
+        accept_encoding: Accept-Encoding header; gzipped texts are
+            decompressed for clients that don't accept gzip
         db: Database session
         current_user: Current authenticated user
 
     Returns:
-        StreamingResponse: File streaming response
+        StreamingResponse: File streaming response, or a redirect to a
+        pre-signed S3 URL when S3_PRESIGNED_DOWNLOADS is enabled
 
     Raises:
         HTTPException: If file access not allowed or file not found
     """
+    filename = file_key.split("/")[-1]
+    content_disposition = f'attachment; filename="{filename}"'
+
+    if settings.S3_PRESIGNED_DOWNLOADS:
+        # Let the client fetch the object from S3 directly
+        url = s3.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": BUCKET_NAME,
+                "Key": file_key,
+                "ResponseContentDisposition": content_disposition,
+            },
+            ExpiresIn=settings.S3_PRESIGNED_URL_EXPIRES,
+        )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
     try:
         # Get file from S3
         response = s3.get_object(Bucket=BUCKET_NAME, Key=file_key)
-        content_type = response["ContentType"]
-        filename = file_key.split("/")[-1]
-
-        def iterfile():
-            yield from response["Body"]
 
-        return StreamingResponse(
-            iterfile(),
-            media_type=content_type,
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
+        return s3_streaming_response(response, filename, accept_encoding)
     except s3.exceptions.NoSuchKey:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -822,24 +1243,16 @@ async def download_file(
     response_model=FileDeleteResponse,
     status_code=status.HTTP_200_OK,
 )
-async def delete_file(
+def delete_file(
     file_key: str,
     current_user: dict = Depends(get_current_user_jwt),
     db: Session = Depends(get_db),
 ):
     """
-    Delete a file from S3
+    Delete a file from S3. Deleting a key that is already gone succeeds, as
+    it does in S3, so no existence check is made first.
     """
     try:
-        # Check if file exists
-        try:
-            s3.head_object(Bucket=BUCKET_NAME, Key=file_key)
-        except Exception as error:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"File not found: {str(error)}",
-            )
-
         user_id = current_user.get("user_id")
         user_role = current_user.get("role")
 
@@ -852,30 +1265,22 @@ async def delete_file(
 
         # Additional checks for assignment/course-specific files
         if file_key.startswith("assignments/"):
-            match = re.match(r"assignments/(\d+)/", file_key)
+            match = ASSIGNMENT_KEY_RE.match(file_key)
             if match:
                 assignment_id = int(match.group(1))
 
                 # Verify assignment exists and user has rights to it
-                assignment = (
-                    db.query(Assignment).filter(Assignment.id == assignment_id).first()
-                )
-                if assignment:
-                    course = (
-                        db.query(Course)
-                        .filter(Course.id == assignment.course_id)
-                        .first()
-                    )
-
+                course = get_assignment_course(db, assignment_id)
+                if course:
                     # If not admin, verify teacher owns the course
-                    if user_role != "admin" and course and course.teacher_id != user_id:
+                    if user_role != "admin" and course.teacher_id != user_id:
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
                             detail="Not authorized to delete files for this assignment",
                         )
 
         elif file_key.startswith("course_"):
-            match = re.match(r"course_(\d+)/", file_key)
+            match = COURSE_KEY_RE.match(file_key)
             if match:
                 course_id = int(match.group(1))
 
@@ -899,6 +1304,10 @@ async def delete_file(
                 detail=f"S3 service error: {str(error)}",
             )
 
+        match = TASK_FILE_KEY_RE.match(file_key)
+        if match:
+            invalidate_task_files(int(match.group(1)))
+
         return FileDeleteResponse(message="File deleted successfully")
 
     except HTTPException:
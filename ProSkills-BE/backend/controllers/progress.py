@@ -5,13 +5,20 @@ Module for handling course and assignment progress tracking.
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, raiseload
 from starlette import status
 from pydantic import BaseModel
 
+from backend.controllers.filesForCourse import (
+    check_enrollment,
+    get_course_owner,
+    list_task_files,
+    s3_executor,
+)
 from backend.dependencies.getdb import get_db
-from backend.models import Assignment, AssignmentProgress, Course, CourseProgress, Enrollment
+from backend.models import Assignment, AssignmentProgress, Enrollment
 from backend.oauth2 import get_current_user_jwt, get_current_user_jwt_required
 from backend.schemas.assignment import AssignmentWithProgressResponse
 from backend.schemas.progress import (
@@ -21,6 +28,11 @@ from backend.schemas.progress import (
     CourseProgressResponse,
 )
 from backend.models.progress import AssignmentStatus
+from backend.services.course_progress import (
+    get_or_create_course_progress,
+    update_course_progress,
+    update_course_progress_bulk,
+)
 
 # Import WebSocket manager
 from backend.services.websocket import manager
@@ -28,118 +40,41 @@ from backend.services.websocket import manager
 router = APIRouter(prefix="/progress", tags=["progress"])
 
 
-def check_enrollment(db: Session, student_id: int, course_id: int) -> bool:
+def get_assignment_enrollment_progress(db: Session, assignment_id: int, student_id: int):
     """
-    Check if a student is enrolled in a course.
-
-    Args:
-        db: Database session
-        student_id: ID of the student
-        course_id: ID of the course
+    Load an assignment, whether the student is enrolled in its course, and
+    the student's progress on it in one round trip.
 
-    Returns:
-        bool: True if student is enrolled, False otherwise
+    Returns (assignment, is_enrolled, progress); assignment is None when it
+    does not exist and progress is None when there is no record yet.
     """
-    return (
-        db.query(Enrollment)
-        .filter(Enrollment.user_id == student_id, Enrollment.course_id == course_id)
-        .first()
-        is not None
-    )
-
-
-# Helper function to ensure course progress record exists
-def get_or_create_course_progress(db: Session, student_id: int, course_id: int):
-    progress = (
-        db.query(CourseProgress)
-        .filter(
-            CourseProgress.student_id == student_id,
-            CourseProgress.course_id == course_id,
-        )
-        .first()
-    )
-
-    if not progress:
-        # Get total assignments for this course
-        total_assignments = (
-            db.query(Assignment).filter(Assignment.course_id == course_id).count()
-        )
-
-        # Create new progress record
-        progress = CourseProgress(
-            student_id=student_id,
-            course_id=course_id,
-            total_assignments=total_assignments,
-            completed_assignments=0,
-            last_activity=datetime.now(),
-        )
-        db.add(progress)
-        db.commit()
-        db.refresh(progress)
-
-    return progress
-
-
-# Helper function to update course progress after assignment completion
-def update_course_progress(db: Session, student_id: int, course_id: int):
-    course_progress = (
-        db.query(CourseProgress)
-        .filter(
-            CourseProgress.student_id == student_id,
-            CourseProgress.course_id == course_id,
+    row = (
+        db.query(Assignment, Enrollment.user_id, AssignmentProgress)
+        .outerjoin(
+            Enrollment,
+            and_(
+                Enrollment.course_id == Assignment.course_id,
+                Enrollment.user_id == student_id,
+            ),
+        )
+        .outerjoin(
+            AssignmentProgress,
+            and_(
+                AssignmentProgress.assignment_id == Assignment.id,
+                AssignmentProgress.student_id == student_id,
+            ),
         )
+        .filter(Assignment.id == assignment_id)
         .first()
     )
-
-    if course_progress:
-        # Count completed assignments (either COMPLETED or GRADED status)
-        completed_count = (
-            db.query(AssignmentProgress)
-            .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
-            .filter(
-                Assignment.course_id == course_id,
-                AssignmentProgress.student_id == student_id,
-                (AssignmentProgress.status == AssignmentStatus.COMPLETED) | 
-                (AssignmentProgress.status == AssignmentStatus.GRADED)
-            )
-            .count()
-        )
-        
-        print(f"Completed assignments count: {completed_count}")
-
-        # Get total assignments
-        total_assignments = (
-            db.query(Assignment)
-            .filter(Assignment.course_id == course_id)
-            .count()
-        )
-        print(f"Total assignments in course: {total_assignments}")
-
-        # Calculate completion percentage with proper type conversion
-        try:
-            completion_percentage = float(completed_count) / float(total_assignments) * 100.0 if total_assignments > 0 else 0.0
-        except (TypeError, ZeroDivisionError):
-            completion_percentage = 0.0
-        
-        print(f"Raw completion percentage: {completion_percentage}")
-        
-        # Update course progress with explicit type conversion
-        course_progress.completed_assignments = int(completed_count)
-        course_progress.total_assignments = int(total_assignments)
-        course_progress.last_activity = datetime.now()
-        
-        db.commit()
-        db.refresh(course_progress)
-        
-        print(f"Updated progress - Completed: {course_progress.completed_assignments}")
-        print(f"Total: {course_progress.total_assignments}")
-        print(f"Final Percentage: {course_progress.completion_percentage}%")
-
-    return course_progress
+    if row is None:
+        return None, False, None
+    assignment, enrolled_user_id, progress = row
+    return assignment, enrolled_user_id is not None, progress
 
 
 @router.post("/assignments/{assignment_id}", response_model=AssignmentProgressResponse)
-async def create_or_update_assignment_progress(
+def create_or_update_assignment_progress(
     assignment_id: int,
     progress_data: AssignmentProgressCreate,
     db: Session = Depends(get_db),
@@ -158,8 +93,10 @@ async def create_or_update_assignment_progress(
             detail="Not authorized to update progress for other students",
         )
 
-    # Check if assignment exists
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    # Load the assignment, enrollment and any existing progress together
+    assignment, is_enrolled, progress = get_assignment_enrollment_progress(
+        db, assignment_id, progress_data.student_id
+    )
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -167,27 +104,20 @@ async def create_or_update_assignment_progress(
         )
 
     # Check if student is enrolled in the course
-    if not check_enrollment(db, progress_data.student_id, assignment.course_id):
+    if not is_enrolled:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Student is not enrolled in this course",
         )
 
-    # Check if progress record already exists
-    progress = (
-        db.query(AssignmentProgress)
-        .filter(
-            AssignmentProgress.student_id == progress_data.student_id,
-            AssignmentProgress.assignment_id == assignment_id,
-        )
-        .first()
-    )
-
+    now = datetime.now()
     if progress:
         # Update existing progress
         update_data = progress_data.model_dump(exclude_unset=True)
         update_data.pop("student_id", None)  # Cannot change student ID
         update_data.pop("assignment_id", None)  # Cannot change assignment ID
+        update_data.pop("course_id", None)  # Always the assignment's course
+        update_data.pop("is_completed", None)  # Derived from status
 
         for key, value in update_data.items():
             setattr(progress, key, value)
@@ -195,35 +125,36 @@ async def create_or_update_assignment_progress(
         # Update status based on submission and completion
         if progress_data.submission_file_key and progress.status == AssignmentStatus.NOT_STARTED:
             progress.status = AssignmentStatus.SUBMITTED
-            progress.submitted_at = datetime.now()
+            progress.submitted_at = now
 
         # Set timestamps based on status
         if progress.status == AssignmentStatus.COMPLETED or progress.status == AssignmentStatus.GRADED:
             if not progress.completed_at:
-                progress.completed_at = datetime.now()
+                progress.completed_at = now
 
         db.commit()
-        db.refresh(progress)
     else:
         # Create new progress record
         progress = AssignmentProgress(
             student_id=progress_data.student_id,
             assignment_id=assignment_id,
-            **progress_data.model_dump(exclude={"student_id", "assignment_id"}),
+            course_id=assignment.course_id,
+            **progress_data.model_dump(
+                exclude={"student_id", "assignment_id", "course_id", "is_completed"}
+            ),
         )
 
         # Set initial status and timestamps
         if progress.submission_file_key:
             if progress.status == AssignmentStatus.NOT_STARTED:
                 progress.status = AssignmentStatus.SUBMITTED
-            progress.submitted_at = progress.submitted_at or datetime.now()
+            progress.submitted_at = progress.submitted_at or now
         
         if progress.status in [AssignmentStatus.COMPLETED, AssignmentStatus.GRADED]:
-            progress.completed_at = progress.completed_at or datetime.now()
+            progress.completed_at = progress.completed_at or now
 
         db.add(progress)
         db.commit()
-        db.refresh(progress)
 
     # Update course progress
     update_course_progress(db, progress_data.student_id, assignment.course_id)
@@ -235,7 +166,7 @@ async def create_or_update_assignment_progress(
     "/assignments/{assignment_id}/student/{student_id}",
     response_model=AssignmentProgressResponse,
 )
-async def get_assignment_progress(
+def get_assignment_progress(
     assignment_id: int,
     student_id: int,
     db: Session = Depends(get_db),
@@ -272,7 +203,7 @@ async def get_assignment_progress(
 
 
 @router.put("/assignments/{assignment_id}", response_model=AssignmentProgressResponse)
-async def update_assignment_progress(
+def update_assignment_progress(
     assignment_id: int,
     progress_data: AssignmentProgressUpdate,
     student_id: int = None,
@@ -293,8 +224,10 @@ async def update_assignment_progress(
             detail="Not authorized to update progress for other students",
         )
 
-    # Check if assignment exists
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    # Load the assignment, enrollment and progress together
+    assignment, is_enrolled, progress = get_assignment_enrollment_progress(
+        db, assignment_id, student_id
+    )
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -302,15 +235,12 @@ async def update_assignment_progress(
         )
 
     # Check if student is enrolled in the course
-    if not check_enrollment(db, student_id, assignment.course_id):
+    if not is_enrolled:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Student is not enrolled in this course",
         )
 
-    # Get progress
-    progress = get_student_assignment_progress(db, student_id, assignment_id)
-
     if not progress:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -324,10 +254,11 @@ async def update_assignment_progress(
         setattr(progress, key, value)
 
     # Automatic status updates based on other field changes
+    now = datetime.now()
 
     # If marking as complete or graded, set completed_at
     if progress.status in [AssignmentStatus.COMPLETED, AssignmentStatus.GRADED] and not progress.completed_at:
-        progress.completed_at = datetime.now()
+        progress.completed_at = now
             
     # If submitting file, set submitted_at
     if (
@@ -338,10 +269,9 @@ async def update_assignment_progress(
         if progress.status not in [AssignmentStatus.GRADED, AssignmentStatus.COMPLETED]:
             progress.status = AssignmentStatus.SUBMITTED
         
-        progress.submitted_at = datetime.now()
+        progress.submitted_at = now
 
     db.commit()
-    db.refresh(progress)
 
     # Update course progress
     update_course_progress(db, student_id, assignment.course_id)
@@ -353,7 +283,7 @@ async def update_assignment_progress(
     "/courses/{course_id}/student/{student_id}",
     response_model=CourseProgressResponse,
 )
-async def get_course_progress(
+def get_course_progress(
     course_id: int,
     student_id: int,
     db: Session = Depends(get_db),
@@ -370,7 +300,7 @@ async def get_course_progress(
         )
 
     # Check if course exists
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = get_course_owner(db, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -394,18 +324,16 @@ async def get_course_progress(
     "/courses/{course_id}/assignments",
     response_model=List[AssignmentWithProgressResponse],
 )
-async def get_assignments_with_progress(
+def get_assignments_with_progress(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt_required),
 ):
     """Get all assignments for a course with progress for the current user"""
-    from backend.controllers.filesForCourse import BUCKET_NAME, s3
-    
     user_id = current_user.get("user_id")
 
     # Check if course exists
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = get_course_owner(db, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -424,51 +352,38 @@ async def get_assignments_with_progress(
                 detail="Not authorized to view this course",
             )
 
-    # Get all assignments for the course
-    assignments = db.query(Assignment).filter(Assignment.course_id == course_id).all()
+    # Get all assignments for the course. Only column attributes are read
+    # below; raiseload turns any relationship access into an error instead
+    # of a lazy load per assignment
+    assignments = (
+        db.query(Assignment)
+        .options(raiseload("*"))
+        .filter(Assignment.course_id == course_id)
+        .all()
+    )
+
+    # The user's progress on all of them, in one query
+    progress_rows = (
+        db.query(AssignmentProgress)
+        .options(raiseload("*"))
+        .filter(
+            AssignmentProgress.student_id == user_id,
+            AssignmentProgress.assignment_id.in_([a.id for a in assignments]),
+        )
+        .all()
+    )
+    progress_by_assignment = {progress.assignment_id: progress for progress in progress_rows}
+
+    # Task files of all assignments, listed concurrently
+    assignment_ids = [assignment.id for assignment in assignments]
+    task_files = dict(zip(assignment_ids, s3_executor.map(list_task_files, assignment_ids)))
 
-    # Get progress for each assignment with an explicit flush to ensure data is current
-    db.flush()
-    
-    # Refresh the session to ensure we get the latest data
-    db.expire_all()
-    
     result = []
     for assignment in assignments:
-        # Use a fresh query to get the most up-to-date progress
-        progress = (
-            db.query(AssignmentProgress)
-            .filter(
-                AssignmentProgress.student_id == user_id,
-                AssignmentProgress.assignment_id == assignment.id,
-            )
-            .first()
-        )
+        progress = progress_by_assignment.get(assignment.id)
 
         assignment_dict = assignment.to_dict()
-        
-        # Ensure files field exists
-        assignment_dict["files"] = []
-        
-        # Try to get files from S3 if they exist
-        try:
-            prefix = f"assignments/{assignment.id}/task/"
-            response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-
-            if "Contents" in response:
-                files = []
-                for item in response["Contents"]:
-                    files.append(
-                        {
-                            "key": item["Key"],
-                            "size": item["Size"],
-                            "last_modified": item["LastModified"],
-                            "filename": item["Key"].split("/")[-1],
-                        },
-                    )
-                assignment_dict["files"] = files
-        except Exception as e:
-            print(f"Error getting files for assignment {assignment.id}: {str(e)}")
+        assignment_dict["files"] = task_files[assignment.id]
 
         if progress:
             assignment_dict.update(
@@ -491,13 +406,15 @@ async def get_assignments_with_progress(
                 },
             )
 
-        result.append(AssignmentWithProgressResponse(**assignment_dict))
+        result.append(assignment_dict)
 
+    # Plain dicts: FastAPI validates them once against the response_model,
+    # instead of validating models here and again after dumping them
     return result
 
 
 @router.post("/mark-assignment-complete/{assignment_id}", response_model=AssignmentProgressResponse)
-async def mark_assignment_complete(
+def mark_assignment_complete(
     assignment_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt_required),
@@ -509,8 +426,21 @@ async def mark_assignment_complete(
     """
     user_id = current_user.get("user_id")
 
-    # Check if assignment exists
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    # Check if assignment exists and the student is enrolled in its course.
+    # The progress row is locked separately below: Postgres cannot lock the
+    # nullable side of an outer join.
+    assignment = (
+        db.query(Assignment.course_id, Enrollment.user_id.label("enrolled_user_id"))
+        .outerjoin(
+            Enrollment,
+            and_(
+                Enrollment.course_id == Assignment.course_id,
+                Enrollment.user_id == user_id,
+            ),
+        )
+        .filter(Assignment.id == assignment_id)
+        .first()
+    )
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -518,7 +448,7 @@ async def mark_assignment_complete(
         )
 
     # Check if student is enrolled in the course
-    if not check_enrollment(db, user_id, assignment.course_id):
+    if assignment.enrolled_user_id is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not enrolled in this course"
@@ -535,27 +465,24 @@ async def mark_assignment_complete(
         .first()
     )
 
+    now = datetime.now()
     if progress:
         # Update existing record
         progress.status = AssignmentStatus.COMPLETED
         if not progress.completed_at:
-            progress.completed_at = datetime.now()
+            progress.completed_at = now
     else:
         # Create new progress record
         progress = AssignmentProgress(
             student_id=user_id,
             assignment_id=assignment_id,
+            course_id=assignment.course_id,
             status=AssignmentStatus.COMPLETED,
-            completed_at=datetime.now()
+            completed_at=now
         )
         db.add(progress)
 
-    # Explicitly flush changes to database before commit
-    db.flush()
     db.commit()
-    
-    # Get a fresh copy of the progress to ensure we have the latest data
-    db.refresh(progress)
 
     # Update course progress
     update_course_progress(db, user_id, assignment.course_id)
@@ -595,14 +522,19 @@ class AssignmentGradeRequest(BaseModel):
     feedback: Optional[str] = None
 
 
+class AssignmentBulkGradeItem(AssignmentGradeRequest):
+    student_id: int
+
+
 @router.post(
     "/assignments/{assignment_id}/student/{student_id}/grade",
     response_model=AssignmentProgressResponse,
 )
-async def grade_assignment(
+def grade_assignment(
     assignment_id: int,
     student_id: int,
     grade_data: AssignmentGradeRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_jwt_required),
 ):
@@ -622,7 +554,7 @@ async def grade_assignment(
         )
 
     # Get the course
-    course = db.query(Course).filter(Course.id == assignment.course_id).first()
+    course = get_course_owner(db, assignment.course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -673,17 +605,132 @@ async def grade_assignment(
         progress.completed_at = datetime.now()
 
     # Commit changes
-    db.flush()
     db.commit()
-    db.refresh(progress)
     
     # Update course progress to ensure completed_assignments is updated
     update_course_progress(db, student_id, course.id)
 
-    # Notify the student through WebSocket if they're connected
-    try:
-        student_room_id = f"user_{student_id}"
-        await manager.broadcast_to_room(
+    # Notify the student through WebSocket if they're connected. This runs
+    # after the response is sent, so slow sockets don't delay the grader.
+    background_tasks.add_task(
+        manager.broadcast_to_room,
+        {
+            "event": "assignment_graded",
+            "assignment_id": assignment_id,
+            "course_id": course.id,
+            "score": progress.score,
+            "feedback": progress.feedback,
+            "status": progress.status
+        },
+        f"user_{student_id}",
+    )
+
+    return progress
+
+
+@router.post(
+    "/assignments/{assignment_id}/grade-bulk",
+    response_model=List[AssignmentProgressResponse],
+)
+def grade_assignments_bulk(
+    assignment_id: int,
+    grades: List[AssignmentBulkGradeItem],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_jwt_required),
+):
+    """
+    Grade one assignment for several students in a single transaction.
+    Only teachers or admins can grade assignments.
+    """
+    user_id = current_user.get("user_id")
+    user_role = current_user.get("role")
+
+    student_ids = [grade.student_id for grade in grades]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each student can only be graded once per request"
+        )
+
+    # Check if assignment exists
+    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+
+    # Verify permission to grade (teacher of the course or admin)
+    course = get_course_owner(db, assignment.course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+
+    if course.teacher_id != user_id and user_role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the course teacher or an admin can grade assignments"
+        )
+
+    if not grades:
+        return []
+
+    # Check that every student is enrolled in the course
+    enrolled = {
+        enrolled_id
+        for (enrolled_id,) in db.query(Enrollment.user_id).filter(
+            Enrollment.course_id == course.id,
+            Enrollment.user_id.in_(student_ids),
+        )
+    }
+    not_enrolled = [sid for sid in student_ids if sid not in enrolled]
+    if not_enrolled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Students not enrolled in this course: {not_enrolled}"
+        )
+
+    # Lock all the progress records at once
+    progress_by_student = {
+        progress.student_id: progress
+        for progress in db.query(AssignmentProgress)
+        .filter(
+            AssignmentProgress.assignment_id == assignment_id,
+            AssignmentProgress.student_id.in_(student_ids),
+        )
+        .with_for_update()
+    }
+    missing = [sid for sid in student_ids if sid not in progress_by_student]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No submission found for students: {missing}"
+        )
+
+    # Update grades and feedback; the UPDATEs are flushed together on commit
+    now = datetime.now()
+    graded = []
+    for grade in grades:
+        progress = progress_by_student[grade.student_id]
+        progress.score = grade.score
+        progress.feedback = grade.feedback
+        progress.status = AssignmentStatus.GRADED
+        if not progress.completed_at:
+            progress.completed_at = now
+        graded.append(progress)
+
+    db.commit()
+
+    # Re-count course progress for all graded students in one statement
+    update_course_progress_bulk(db, student_ids, course.id)
+
+    # Notify each student after the response is sent
+    for progress in graded:
+        background_tasks.add_task(
+            manager.broadcast_to_room,
             {
                 "event": "assignment_graded",
                 "assignment_id": assignment_id,
@@ -692,10 +739,7 @@ async def grade_assignment(
                 "feedback": progress.feedback,
                 "status": progress.status
             },
-            student_room_id
+            f"user_{progress.student_id}",
         )
-    except Exception as e:
-        # Log the error but don't fail the request
-        print(f"Error sending WebSocket notification: {str(e)}")
 
-    return progress
+    return graded
@@ -1,24 +1,39 @@
+import asyncio
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, Query
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.dependencies.getdb import get_db
-from backend.models import Course
-from backend.models.review import Review
-from backend.oauth2 import get_current_user_jwt
+from backend.cache import (
+    REVIEWS_TTL,
+    course_reviews_key,
+    get_cached,
+    invalidate_course_reviews,
+    redis_client,
+    set_cached,
+)
+from backend.dependencies.getdb import get_async_db
+from backend.oauth2 import get_jwt_claims
 from backend.schemas.review import ReviewCreate, ReviewResponse, ReviewUpdate, ReviewWithUserInfo
 from backend.services import review as review_service
 from backend.services.websocket import manager
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+# Курсор следующей страницы; списки отзывов остаются массивами
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Страница отзывов курса целиком проверяется и сериализуется одним вызовом
+REVIEW_PAGE = TypeAdapter(List[ReviewWithUserInfo])
+
 
 @router.post("/courses/{course_id}", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_course_review(
     course_id: int,
     review_data: ReviewCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_jwt_claims),
 ):
     """
     Создать новый отзыв для курса.
@@ -26,32 +41,21 @@ async def create_course_review(
     """
     user_id = current_user.get("user_id")
     
-    # Check if course exists
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Курс не найден"
-        )
+    # Create review; the service answers 404 for a missing course
+    new_review = await review_service.create_review(db, user_id, course_id, review_data)
+    await asyncio.to_thread(invalidate_course_reviews, course_id)
     
-    # Create review
-    new_review = review_service.create_review(db, user_id, course_id, review_data)
-    
-    # Send WebSocket notification
-    try:
-        room_id = f"course_{course_id}"
-        await manager.broadcast_to_room(
-            {
-                "event": "review_created",
-                "course_id": course_id,
-                "review_id": new_review.id,
-                "user_id": user_id
-            },
-            room_id
-        )
-    except Exception as e:
-        # Log the exception but don't fail the request
-        print(f"Error broadcasting review creation: {str(e)}")
+    # Send WebSocket notification after the response is sent
+    background_tasks.add_task(
+        manager.broadcast_to_room,
+        {
+            "event": "review_created",
+            "course_id": course_id,
+            "review_id": new_review.id,
+            "user_id": user_id
+        },
+        f"course_{course_id}",
+    )
     
     return new_review
 
@@ -59,22 +63,43 @@ async def create_course_review(
 @router.get("/courses/{course_id}", response_model=List[ReviewWithUserInfo])
 async def get_course_reviews(
     course_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Получить все отзывы для курса вместе с информацией о пользователях.
+    Следующая страница запрашивается по курсору из заголовка X-Next-Cursor.
     """
-    # Check if course exists
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Курс не найден"
-        )
-    
-    reviews = review_service.get_course_reviews(db, course_id, skip, limit)
+    # Кэшируются страницы без курсора: с них начинается каждая страница курса.
+    # Redis-клиент синхронный, поэтому обращения к нему идут в потоке
+    cache_key = None
+    if redis_client and not cursor:
+        cache_key = await asyncio.to_thread(course_reviews_key, course_id, skip, limit)
+    if cache_key:
+        cached = await asyncio.to_thread(get_cached, cache_key)
+        if cached is not None:
+            if cached["next_cursor"]:
+                response.headers[NEXT_CURSOR_HEADER] = cached["next_cursor"]
+            return cached["reviews"]
+
+    # The service answers 404 for a missing course
+    reviews = await review_service.get_course_reviews(db, course_id, skip, limit, cursor)
+    next_cursor = None
+    if len(reviews) == limit:
+        last = reviews[-1]
+        next_cursor = review_service.encode_review_cursor(last.created_at, last.id)
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    if cache_key:
+        reviews = REVIEW_PAGE.validate_python(reviews)
+        page = {
+            "reviews": REVIEW_PAGE.dump_python(reviews, mode="json"),
+            "next_cursor": next_cursor,
+        }
+        await asyncio.to_thread(set_cached, cache_key, page, REVIEWS_TTL)
     return reviews
 
 
@@ -82,8 +107,9 @@ async def get_course_reviews(
 async def update_review(
     review_id: int,
     review_data: ReviewUpdate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_jwt_claims),
 ):
     """
     Обновить существующий отзыв.
@@ -91,25 +117,20 @@ async def update_review(
     """
     user_id = current_user.get("user_id")
     
-    updated_review = review_service.update_review(db, review_id, user_id, review_data)
+    updated_review = await review_service.update_review(db, review_id, user_id, review_data)
+    await asyncio.to_thread(invalidate_course_reviews, updated_review.course_id)
     
-    # Send WebSocket notification
-    try:
-        review = db.query(Review).filter(Review.id == review_id).first()
-        if review:
-            room_id = f"course_{review.course_id}"
-            await manager.broadcast_to_room(
-                {
-                    "event": "review_updated",
-                    "course_id": review.course_id,
-                    "review_id": review_id,
-                    "user_id": user_id
-                },
-                room_id
-            )
-    except Exception as e:
-        # Log the exception but don't fail the request
-        print(f"Error broadcasting review update: {str(e)}")
+    # Send WebSocket notification after the response is sent
+    background_tasks.add_task(
+        manager.broadcast_to_room,
+        {
+            "event": "review_updated",
+            "course_id": updated_review.course_id,
+            "review_id": review_id,
+            "user_id": user_id
+        },
+        f"course_{updated_review.course_id}",
+    )
     
     return updated_review
 
@@ -117,8 +138,9 @@ async def update_review(
 @router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_review(
     review_id: int,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_jwt_claims),
 ):
     """
     Удалить существующий отзыв.
@@ -128,34 +150,21 @@ async def delete_review(
     user_id = current_user.get("user_id")
     is_admin = current_user.get("role") == "admin"
     
-    # Get course_id for WebSocket notification before deletion
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if not review:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Отзыв не найден"
-        )
-    
-    course_id = review.course_id
-    
-    # Delete review
-    review_service.delete_review(db, review_id, user_id, is_admin)
+    # Delete review; the course_id comes back for the WebSocket notification
+    course_id = await review_service.delete_review(db, review_id, user_id, is_admin)
+    await asyncio.to_thread(invalidate_course_reviews, course_id)
     
-    # Send WebSocket notification
-    try:
-        room_id = f"course_{course_id}"
-        await manager.broadcast_to_room(
-            {
-                "event": "review_deleted",
-                "course_id": course_id,
-                "review_id": review_id,
-                "user_id": user_id
-            },
-            room_id
-        )
-    except Exception as e:
-        # Log the exception but don't fail the request
-        print(f"Error broadcasting review deletion: {str(e)}")
+    # Send WebSocket notification after the response is sent
+    background_tasks.add_task(
+        manager.broadcast_to_room,
+        {
+            "event": "review_deleted",
+            "course_id": course_id,
+            "review_id": review_id,
+            "user_id": user_id
+        },
+        f"course_{course_id}",
+    )
     
     return None
 
@@ -163,14 +172,17 @@ async def delete_review(
 @router.get("/users/{user_id}", response_model=List[ReviewResponse])
 async def get_user_reviews(
     user_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_jwt_claims),
 ):
     """
     Получить все отзывы, оставленные пользователем.
     Пользователи могут видеть только свои отзывы, администраторы - отзывы всех пользователей.
+    Следующая страница запрашивается по курсору из заголовка X-Next-Cursor.
     """
     current_user_id = current_user.get("user_id")
     is_admin = current_user.get("role") == "admin"
@@ -182,5 +194,10 @@ async def get_user_reviews(
             detail="Вы можете просматривать только свои отзывы"
         )
     
-    reviews = review_service.get_user_reviews(db, user_id, skip, limit)
+    reviews = await review_service.get_user_reviews(db, user_id, skip, limit, cursor)
+    if len(reviews) == limit:
+        last = reviews[-1]
+        response.headers[NEXT_CURSOR_HEADER] = review_service.encode_review_cursor(
+            last.created_at, last.id
+        )
     return reviews 
\ No newline at end of file
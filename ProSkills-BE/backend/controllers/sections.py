@@ -1,12 +1,13 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, selectinload
 from starlette import status
 
 from backend.dependencies.getdb import get_db
-from backend.models import Course, Section
-from backend.oauth2 import get_current_user_jwt
+from backend.models import Course, Enrollment, Section
+from backend.oauth2 import get_current_user_jwt, require_roles
 from backend.schemas.section import (
     SectionCreate,
     SectionResponse,
@@ -22,16 +23,9 @@ async def create_section(
     course_id: int,
     section_data: SectionCreate,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
     """Create a new section for a course"""
-    # Check if user is teacher or admin
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create sections",
-        )
-
     # Check if course exists and user is the teacher of the course
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:
@@ -55,7 +49,6 @@ async def create_section(
     try:
         db.add(section)
         db.commit()
-        db.refresh(section)
         return section
     except Exception as e:
         db.rollback()
@@ -88,11 +81,12 @@ async def get_section(
 
     if not (is_teacher or is_admin):
         # Check if student is enrolled in the course
-        is_enrolled = False
-        for student in course.students:
-            if student.id == current_user.get("user_id"):
-                is_enrolled = True
-                break
+        is_enrolled = db.query(
+            exists().where(
+                Enrollment.user_id == current_user.get("user_id"),
+                Enrollment.course_id == course.id,
+            )
+        ).scalar()
 
         if not is_enrolled:
             raise HTTPException(
@@ -124,11 +118,12 @@ async def get_course_sections(
 
     if not (is_teacher or is_admin):
         # Check if student is enrolled in the course
-        is_enrolled = False
-        for student in course.students:
-            if student.id == current_user.get("user_id"):
-                is_enrolled = True
-                break
+        is_enrolled = db.query(
+            exists().where(
+                Enrollment.user_id == current_user.get("user_id"),
+                Enrollment.course_id == course.id,
+            )
+        ).scalar()
 
         if not is_enrolled:
             raise HTTPException(
@@ -136,9 +131,11 @@ async def get_course_sections(
                 detail="Not authorized to view sections for this course",
             )
 
-    # Get all sections for the course
+    # Get all sections for the course; assignments come in one IN query
+    # instead of a lazy load per section
     sections = (
         db.query(Section)
+        .options(selectinload(Section.assignments))
         .filter(Section.course_id == course_id)
         .order_by(Section.order)
         .all()
@@ -180,7 +177,6 @@ async def update_section(
 
     try:
         db.commit()
-        db.refresh(section)
         return section
     except Exception as e:
         db.rollback()
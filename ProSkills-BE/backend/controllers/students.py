@@ -2,17 +2,19 @@
 Module for handling student-related operations including course enrollment and management.
 """
 
-from typing import List, Optional
+from typing import List
 
 from fastapi import APIRouter, HTTPException
 from fastapi.params import Depends
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from starlette import status
 
+from backend.cache import invalidate_admin_stats, invalidate_courses
 from backend.database import get_db
 from backend.models import Course, OurUsers
 from backend.models.enrollment import Enrollment
-from backend.oauth2 import get_current_user_jwt
+from backend.oauth2 import get_current_user_jwt, require_roles
 from backend.schemas.course import CourseResponse
 from backend.schemas.user import UserLoginResponse
 
@@ -26,37 +28,37 @@ async def enroll_in_course(
     current_user: dict = Depends(get_current_user_jwt),
 ) -> dict:
 
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    user_id = current_user["user_id"]
+    # Existence probes only; no rows are loaded
+    course_exists, student_exists, already_enrolled = db.query(
+        exists().where(Course.id == course_id),
+        exists().where(OurUsers.id == user_id),
+        exists().where(Enrollment.user_id == user_id, Enrollment.course_id == course_id),
+    ).one()
+
+    if not course_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="This course does not exist",
         )
 
-    student: Optional[OurUsers] = (
-        db.query(OurUsers).filter(OurUsers.id == current_user["user_id"]).first()
-    )
-    if student is None:
+    if not student_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
-    existing_enrollment = (
-        db.query(Enrollment)
-        .filter(Enrollment.user_id == student.id, Enrollment.course_id == course_id)
-        .first()
-    )
-
-    if existing_enrollment:
+    if already_enrolled:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are already enrolled in this course",
         )
 
-    new_enrollment = Enrollment(user_id=student.id, course_id=course_id)
+    new_enrollment = Enrollment(user_id=user_id, course_id=course_id)
     db.add(new_enrollment)
     db.commit()
+    invalidate_admin_stats()
+    invalidate_courses(user_id)
 
     return {"message": "User successfully enrolled in the course"}
 
@@ -121,20 +123,17 @@ async def check_enrollment_status(
             detail="Invalid user token. Missing user ID.",
         )
 
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    course_exists, is_enrolled = db.query(
+        exists().where(Course.id == course_id),
+        exists().where(Enrollment.user_id == user_id, Enrollment.course_id == course_id),
+    ).one()
+    if not course_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found",
         )
 
-    enrollment = (
-        db.query(Enrollment)
-        .filter(Enrollment.user_id == user_id, Enrollment.course_id == course_id)
-        .first()
-    )
-
-    return {"is_enrolled": enrollment is not None}
+    return {"is_enrolled": is_enrolled}
 
 
 @router.get(
@@ -154,8 +153,7 @@ async def get_enrolled_courses(
             detail="Invalid user token. Missing student ID.",
         )
 
-    student = db.query(OurUsers).filter(OurUsers.id == student_id).first()
-    if not student:
+    if not db.query(exists().where(OurUsers.id == student_id)).scalar():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found.",
@@ -201,41 +199,37 @@ async def remove_student_enrollment(
     course_id: int,
     student_id: int,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    current_user: dict = Depends(require_roles("teacher", "admin")),
 ):
     """Remove a student's enrollment from a course"""
-    if current_user.get("role") not in ["teacher", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied",
-        )
-
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="This course does not exist",
-        )
-
-    student = db.query(OurUsers).filter(OurUsers.id == student_id).first()
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="This student does not exist",
-        )
-
-    enrollment = (
+    # Delete straight away; course and student are only looked up to explain a miss
+    deleted = (
         db.query(Enrollment)
         .filter(Enrollment.course_id == course_id, Enrollment.user_id == student_id)
-        .first()
+        .delete(synchronize_session=False)
     )
-    if not enrollment:
+    if not deleted:
+        course_exists, student_exists = db.query(
+            exists().where(Course.id == course_id),
+            exists().where(OurUsers.id == student_id),
+        ).one()
+        if not course_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="This course does not exist",
+            )
+        if not student_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="This student does not exist",
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student is not enrolled in this course",
         )
 
-    db.delete(enrollment)
     db.commit()
+    invalidate_admin_stats()
+    invalidate_courses(student_id)
 
     return {"message": "Student successfully removed from the course"}
@@ -1,24 +1,63 @@
 import os
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from backend import config
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('DATABASE_PORT')}/{os.getenv('POSTGRES_DB')}"
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
 
 # Create a synchronous engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True)
+if config.config.DB_USE_NULL_POOL:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True, poolclass=NullPool)
+else:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        echo=True,
+        pool_size=config.config.DB_POOL_SIZE,
+        max_overflow=config.config.DB_MAX_OVERFLOW,
+        pool_timeout=config.config.DB_POOL_TIMEOUT,
+        pool_recycle=config.config.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine (asyncpg) for handlers that await their queries on the event
+# loop instead of holding a worker thread for every database round trip
+if config.config.DB_USE_NULL_POOL:
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, echo=True, poolclass=NullPool)
+else:
+    async_engine = create_async_engine(
+        ASYNC_SQLALCHEMY_DATABASE_URL,
+        echo=True,
+        pool_size=config.config.DB_ASYNC_POOL_SIZE,
+        max_overflow=config.config.DB_ASYNC_MAX_OVERFLOW,
+        pool_timeout=config.config.DB_POOL_TIMEOUT,
+        pool_recycle=config.config.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+# Create a session factory. Sessions are request scoped, so objects are kept
+# loaded after commit instead of being re-SELECTed on the next attribute access.
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Base model
 Base = declarative_base()
 
-Base.metadata.create_all(engine)
-
 
 # Dependency for getting the database session
 def get_db():
@@ -1,6 +1,7 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.database import SessionLocal
+from backend.database import AsyncSessionLocal, SessionLocal
 
 
 def get_db():
@@ -9,3 +10,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,15 +2,31 @@
 S3 dependencies for FastAPI application.
 """
 
+import asyncio
 import os
+from functools import lru_cache
+
 import boto3
+from botocore.config import Config
 from fastapi import Depends
 
+# Shared by every S3 client in the app. Clients are thread safe and are
+# reused across worker threads, so the connection pool has to be at least as
+# large as the thread pools fanning out S3 calls (botocore's default is 10).
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={"mode": "standard", "max_attempts": 5},
+    tcp_keepalive=True,
+)
+
+
 class S3Dependencies:
     """
     Dependency class for S3 operations.
     
     This class provides access to AWS S3 client and common operations.
+    boto3 calls block, so the async methods run them in worker threads to
+    keep the event loop free.
     """
     
     def __init__(self):
@@ -19,7 +35,8 @@ class S3Dependencies:
             "s3",
             aws_access_key_id=os.getenv("ACCESS_KEY_ID"),
             aws_secret_access_key=os.getenv("SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION", "us-east-1")
+            region_name=os.getenv("AWS_REGION", "us-east-1"),
+            config=S3_CLIENT_CONFIG,
         )
         self.bucket_name = os.getenv("BUCKET_NAME", "files-for-team-project")
     
@@ -28,13 +45,25 @@ class S3Dependencies:
         Upload a file to S3.
         
         Args:
-            file_content: File content to upload
+            file_content: File content to upload, as bytes or a file-like
+                object; file-like objects are streamed in multipart chunks
+                instead of being read into memory
             key: S3 object key
             content_type: Optional content type
             
         Returns:
-            Response from S3
+            Response from S3 (None for streamed uploads)
         """
+        if hasattr(file_content, "read"):
+            extra_args = {"ContentType": content_type} if content_type else None
+            return await asyncio.to_thread(
+                self.client.upload_fileobj,
+                file_content,
+                self.bucket_name,
+                key,
+                ExtraArgs=extra_args,
+            )
+
         params = {
             "Bucket": self.bucket_name,
             "Key": key,
@@ -44,8 +73,8 @@ class S3Dependencies:
         if content_type:
             params["ContentType"] = content_type
             
-        return self.client.put_object(**params)
-    
+        return await asyncio.to_thread(self.client.put_object, **params)
+
     async def delete_file(self, key):
         """
         Delete a file from S3.
@@ -56,7 +85,9 @@ class S3Dependencies:
         Returns:
             Response from S3
         """
-        return self.client.delete_object(Bucket=self.bucket_name, Key=key)
+        return await asyncio.to_thread(
+            self.client.delete_object, Bucket=self.bucket_name, Key=key
+        )
     
     async def get_file(self, key):
         """
@@ -68,25 +99,43 @@ class S3Dependencies:
         Returns:
             Response from S3
         """
-        return self.client.get_object(Bucket=self.bucket_name, Key=key)
+        return await asyncio.to_thread(
+            self.client.get_object, Bucket=self.bucket_name, Key=key
+        )
     
-    async def list_files(self, prefix=None):
+    async def list_files(self, prefix=None, start_after=None):
         """
         List files in S3 bucket.
-        
+
+        Pages are fetched one at a time in a worker thread, so a large
+        bucket is neither truncated at 1000 keys nor held in memory whole.
+
         Args:
             prefix: Optional prefix to filter results
-            
-        Returns:
-            Response from S3
+            start_after: Optional key to start listing after
+
+        Yields:
+            Object entries from S3 (dicts with Key, Size, LastModified, ...)
         """
         params = {"Bucket": self.bucket_name}
         if prefix:
             params["Prefix"] = prefix
-            
-        return self.client.list_objects_v2(**params)
+        if start_after:
+            params["StartAfter"] = start_after
+
+        pages = iter(self.client.get_paginator("list_objects_v2").paginate(**params))
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                return
+            for item in page.get("Contents", []):
+                yield item
 
-# Dependency to inject S3 client
-def get_s3_client():
+# Dependency to inject S3 client. Building a boto3 client is expensive
+# (endpoint and credential resolution), so one instance is shared by all
+# requests; the client is thread safe.
+@lru_cache()
+def get_s3_client() -> S3Dependencies:
     """Dependency for FastAPI to inject S3 client."""
-    return S3Dependencies() 
\ No newline at end of file
+    return S3Dependencies()
+ 
\ No newline at end of file
@@ -0,0 +1,28 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+# Every module logs through logging.getLogger(__name__), i.e. below "backend"
+LOGGER_NAME = "backend"
+LOG_FORMAT = "%(levelname)s | %(asctime)s | %(name)s | %(message)s"
+
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Send backend log records through a queue to a stderr handler.
+
+    Callers, including the event loop, only enqueue the record; the
+    returned listener writes it out from its own thread. Start it at
+    startup and stop it at shutdown to flush what is left.
+    """
+    queue = SimpleQueue()
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    logger.addHandler(QueueHandler(queue))
+    logger.propagate = False
+
+    return QueueListener(queue, handler, respect_handler_level=True)
@@ -1,10 +1,19 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette import status
 from starlette.websockets import WebSocket, WebSocketDisconnect
 import traceback
 import time
 
+import anyio
+import orjson
+
 from backend.controllers import (
     admin_stats,
     assignments,
@@ -16,17 +25,79 @@ from backend.controllers import (
     sections,
     students,
 )
-from backend.database import Base, engine
+from backend.config import config
+from backend.constants import THREADPOOL_SIZE, WS_MAX_MESSAGE_SIZE
+from backend.database import Base, async_engine, engine
 from backend.dependencies.getdb import get_db
+from backend.logger import setup_logging
 from backend.middlewares.cors import setup_cors
+from backend.middlewares.upload_limit import setup_upload_limit
 from backend.services.websocket import manager
 from backend.utils import create_admin_user
-from backend.controllers.admin_stats import log_error
+from backend.controllers.admin_stats import (
+    ERROR_LOG_QUEUE_SIZE,
+    drain_error_log_queue,
+    log_error,
+    log_errors,
+)
+
+logger = logging.getLogger(__name__)
+log_listener = setup_logging()
+
+
+def warm_up_database():
+    """Create tables if asked to, open a pooled connection and seed the admin"""
+    if config.DB_AUTO_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
+
+    # The first request shouldn't pay for connecting to Postgres
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    db = next(get_db())
+    try:
+        # Create admin user if it doesn't exist
+        create_admin_user(db)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize application data on startup"""
+    log_listener.start()
+
+    # Sync endpoints run in anyio's threadpool; size it for DB-bound load
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    await anyio.to_thread.run_sync(warm_up_database)
+
+    # WebSocket broadcasts reach the clients of every worker through Redis
+    await manager.start()
+
+    # Unhandled errors are logged for the admin panel in the background
+    app.state.error_log_queue = asyncio.Queue(maxsize=ERROR_LOG_QUEUE_SIZE)
+    error_log_task = asyncio.create_task(drain_error_log_queue(app.state.error_log_queue))
+    try:
+        yield
+    finally:
+        await manager.stop()
+        error_log_task.cancel()
+        queue, app.state.error_log_queue = app.state.error_log_queue, None
+        # Write whatever the task didn't get to
+        leftovers = [queue.get_nowait() for _ in range(queue.qsize())]
+        if leftovers:
+            log_errors(leftovers)
+        await async_engine.dispose()
+        log_listener.stop()
 
-app = FastAPI()
+
+# Responses are encoded with orjson; it handles datetimes natively and is
+# several times faster than the stdlib json encoder
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 setup_cors(app)
-Base.metadata.create_all(bind=engine)
+setup_upload_limit(app)
 app.include_router(auth.router)
 app.include_router(courses.router)
 app.include_router(students.router)
@@ -38,15 +109,34 @@ app.include_router(admin_stats.router)
 app.include_router(reviews.router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application data on startup"""
-    db = next(get_db())
-    try:
-        # Create admin user if it doesn't exist
-        create_admin_user(db)
-    finally:
-        db.close()
+def _join_room(websocket: WebSocket, data: dict):
+    room_id = data.get("room_id")
+    if room_id:
+        manager.join_room(websocket, room_id)
+        return {"event": "joined_room", "room_id": room_id}
+
+
+def _leave_room(websocket: WebSocket, data: dict):
+    room_id = data.get("room_id")
+    if room_id:
+        manager.leave_room(websocket, room_id)
+        return {"event": "left_room", "room_id": room_id}
+
+
+def _join_user_room(websocket: WebSocket, data: dict):
+    user_id = data.get("user_id")
+    if user_id:
+        manager.join_room(websocket, f"user_{user_id}")
+        return {"event": "joined_user_room", "user_id": user_id}
+
+
+# Команды клиента: обработчик меняет комнаты и возвращает подтверждение
+WS_COMMANDS = {
+    "join_room": _join_room,
+    "leave_room": _leave_room,
+    "join_user_room": _join_user_room,
+}
+
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -56,49 +146,31 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         while True:
-            # Ожидаем сообщение от клиента
-            data = await websocket.receive_json()
+            # Ожидаем сообщение от клиента. Размер кадра ограничивает uvicorn
+            # (--ws-max-size); проверка ниже лишь не дает разбирать большие
+            # сообщения, если сервер запущен без этого ограничения
+            message = await websocket.receive_text()
+            if len(message) > WS_MAX_MESSAGE_SIZE:
+                await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+                return
+            data = orjson.loads(message)
             
-            # Обрабатываем различные команды от клиента
-            if data.get("command") == "join_room":
-                room_id = data.get("room_id")
-                if room_id:
-                    manager.join_room(websocket, room_id)
-                    
-                    # Отправляем подтверждение
-                    await manager.send_personal_message(
-                        {"event": "joined_room", "room_id": room_id},
-                        websocket
-                    )
-            
-            elif data.get("command") == "leave_room":
-                room_id = data.get("room_id")
-                if room_id:
-                    manager.leave_room(websocket, room_id)
-                    
-                    # Отправляем подтверждение
-                    await manager.send_personal_message(
-                        {"event": "left_room", "room_id": room_id},
-                        websocket
-                    )
-            
-            elif data.get("command") == "join_user_room":
-                user_id = data.get("user_id")
-                if user_id:
-                    user_room_id = f"user_{user_id}"
-                    manager.join_room(websocket, user_room_id)
-                    
-                    # Отправляем подтверждение
-                    await manager.send_personal_message(
-                        {"event": "joined_user_room", "user_id": user_id},
-                        websocket
-                    )
+            # Обрабатываем команду и отправляем подтверждение
+            handler = WS_COMMANDS.get(data.get("command"))
+            if handler:
+                ack = handler(websocket, data)
+                if ack:
+                    await manager.send_personal_message(ack, websocket)
                     
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     
     except Exception as e:
-        print(f"Error in WebSocket connection: {e}")
+        logger.exception("Error in WebSocket connection: %s", e)
+
+    finally:
+        # Любой выход из цикла, включая отмену задачи при остановке сервера,
+        # освобождает очередь, relay-задачу и комнаты соединения
         manager.disconnect(websocket)
 
 @app.exception_handler(Exception)
@@ -106,22 +178,30 @@ async def global_exception_handler(request: Request, exc: Exception):
     """
     Global exception handler to log all unhandled exceptions
     """
-    # Generate error details
+    # Generate error details; the traceback is formatted once for both logs
+    formatted_traceback = "".join(traceback.format_exception(exc))
     error_detail = {
         "url": str(request.url),
         "method": request.method,
         "exception_type": str(type(exc).__name__),
         "exception_msg": str(exc),
-        "traceback": traceback.format_exc(),
+        "traceback": formatted_traceback,
         "timestamp": time.time()
     }
     
-    # Log error for admin panel
-    log_error(error_detail)
+    # Log error for admin panel without waiting for Redis; when the queue
+    # is full the error is only printed below
+    queue = getattr(request.app.state, "error_log_queue", None)
+    if queue is None:
+        await anyio.to_thread.run_sync(log_error, error_detail)
+    else:
+        try:
+            queue.put_nowait(error_detail)
+        except asyncio.QueueFull:
+            pass
     
-    # Print to console for debugging
-    print(f"Unhandled exception: {exc}")
-    print(traceback.format_exc())
+    # Log to console for debugging
+    logger.error("Unhandled exception: %s\n%s", exc, formatted_traceback)
     
     # Return error response to client
     return JSONResponse(
@@ -26,6 +26,8 @@ def setup_cors(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["*"],
+        # Browsers read "*" literally on credentialed responses, so headers
+        # the frontend reads have to be listed by name
+        expose_headers=["*", "X-Next-Cursor"],
         max_age=3600,
     )
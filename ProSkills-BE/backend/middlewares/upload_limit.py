@@ -0,0 +1,27 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from backend.constants import MAX_UPLOAD_FILE_SIZE, MAX_UPLOAD_REQUEST_SIZE
+
+
+def setup_upload_limit(app):
+    # Multipart bodies are parsed (and spooled to disk) before a handler runs,
+    # so an oversized upload is only rejected cheaply if it is refused here,
+    # from its Content-Length, before the body is read
+    @app.middleware("http")
+    async def reject_oversized_uploads(request: Request, call_next):
+        content_length = request.headers.get("content-length")
+        if (
+            content_length
+            and content_length.isdigit()
+            and int(content_length) > MAX_UPLOAD_REQUEST_SIZE
+            and request.headers.get("content-type", "").startswith("multipart/form-data")
+        ):
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={
+                    "detail": "File too large. Maximum size is "
+                    f"{MAX_UPLOAD_FILE_SIZE // (1024 * 1024)} MB",
+                },
+            )
+        return await call_next(request)
@@ -1,6 +1,7 @@
 from backend.database import Base
 
 from .assignment import Assignment
+from .comment import Comment
 from .course import Course
 from .enrollment import Enrollment
 from .ourusers import OurUsers
@@ -27,19 +27,3 @@ class Assignment(BaseModel):
     # Relationships
     course = relationship("Course", back_populates="assignments")
     section = relationship("Section", back_populates="assignments")
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "course_id": self.course_id,
-            "section_id": self.section_id,
-            "title": self.title,
-            "description": self.description,
-            "due_date": self.due_date,
-            "teacher_comments": self.teacher_comments,
-            "order": self.order,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "is_completed": self.is_completed,
-            "submission_type": self.submission_type,
-        }
@@ -27,6 +27,7 @@ class Course(BaseModel):
         Integer,
         ForeignKey("our_users.id"),
         nullable=False,
+        index=True,
     )
 
     teacher = relationship(
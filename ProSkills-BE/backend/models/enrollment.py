@@ -16,6 +16,7 @@ class Enrollment(Base):
         Integer,
         ForeignKey("courses.id"),
         primary_key=True,
+        index=True,
     )
 
     ### Preventing Duplicate Course Enrollment ###
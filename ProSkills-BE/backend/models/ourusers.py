@@ -20,7 +20,7 @@ class OurUsers(BaseModel):
     last_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
-    role = Column(String, default=UserRole.STUDENT.value)
+    role = Column(String, default=UserRole.STUDENT.value, index=True)
     reset_token = Column(String, nullable=True)
     reset_token_expires_at = Column(DateTime(timezone=True), nullable=True)
 
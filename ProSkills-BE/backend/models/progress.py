@@ -1,7 +1,19 @@
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models.basemodel import BaseModel
@@ -33,6 +45,14 @@ class AssignmentProgress(BaseModel):
         ForeignKey("assignments.id"),
         nullable=False,
     )
+    # Copied from the assignment so progress can be filtered and returned
+    # per course without loading the assignment
+    course_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("courses.id"),
+        nullable=False,
+        index=True,
+    )
     status: Mapped[str] = mapped_column(String, default=AssignmentStatus.NOT_STARTED)
     submission_file_key: Mapped[str] = mapped_column(
         String,
@@ -45,35 +65,32 @@ class AssignmentProgress(BaseModel):
 
     # Relationships
     student = relationship("OurUsers", backref="assignment_progress")
-    assignment = relationship("Assignment", backref="student_progress")
+    # Never lazy-loaded; course_id above covers what callers used it for
+    assignment = relationship("Assignment", backref="student_progress", lazy="raise")
+
+    __table_args__ = (
+        # One progress row per student and assignment; also the conflict
+        # target of the submission UPSERT
+        Index(
+            "ux_assignment_progress_student_assignment",
+            "student_id",
+            "assignment_id",
+            unique=True,
+        ),
+        # Partial index backing the completed/graded counts
+        Index(
+            "ix_assignment_progress_completed",
+            "assignment_id",
+            "student_id",
+            postgresql_where=text("status IN ('completed', 'graded')"),
+        ),
+    )
 
-    @property
-    def course_id(self) -> int:
-        """Get the course_id through the assignment relationship"""
-        if self.assignment:
-            return self.assignment.course_id
-        return None
-            
     @property
     def is_completed(self) -> bool:
         """Backward compatibility property for is_completed"""
         return self.status in [AssignmentStatus.COMPLETED, AssignmentStatus.GRADED]
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "student_id": self.student_id,
-            "assignment_id": self.assignment_id,
-            "course_id": self.course_id,
-            "is_completed": self.is_completed,
-            "status": self.status,
-            "submission_file_key": self.submission_file_key,
-            "score": self.score,
-            "feedback": self.feedback,
-            "completed_at": self.completed_at,
-            "submitted_at": self.submitted_at,
-        }
-
 
 class CourseProgress(BaseModel):
     __tablename__ = "course_progress"
@@ -97,35 +114,28 @@ class CourseProgress(BaseModel):
     completed_assignments: Mapped[int] = mapped_column(Integer, default=0)
     total_assignments: Mapped[int] = mapped_column(Integer, default=0)
     last_activity: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # Generated by the database from the two counters on every write
+    completion_percentage: Mapped[Decimal] = mapped_column(
+        Numeric(5, 2),
+        Computed(
+            "CASE WHEN total_assignments > 0"
+            " THEN round(completed_assignments * 100.0 / total_assignments, 2)"
+            " ELSE 0 END",
+            persisted=True,
+        ),
+    )
 
     # Relationships
     student = relationship("OurUsers", backref="course_progress")
     course = relationship("Course", backref="student_progress")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "student_id": self.student_id,
-            "course_id": self.course_id,
-            "completed_assignments": self.completed_assignments,
-            "total_assignments": self.total_assignments,
-            "last_activity": self.last_activity,
-            "completion_percentage": self.completion_percentage(),
-        }
-
-    def completion_percentage(self):
-        """Calculate completion percentage with proper type handling"""
-        try:
-            if not isinstance(
-                self.completed_assignments,
-                (int, float),
-            ) or not isinstance(self.total_assignments, (int, float)):
-                return 0.0
-            if self.total_assignments <= 0:
-                return 0.0
-            percentage = (
-                float(self.completed_assignments) / float(self.total_assignments)
-            ) * 100.0
-            return float(round(percentage, 2))
-        except Exception:
-            return 0.0
+    __table_args__ = (
+        # One progress row per student and course; per-student lookups always
+        # filter on both columns, and get_or_create_course_progress upserts on it
+        Index(
+            "ux_course_progress_student_course",
+            "student_id",
+            "course_id",
+            unique=True,
+        ),
+    )
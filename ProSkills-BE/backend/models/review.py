@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, Text, ForeignKey
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from backend.models.basemodel import BaseModel
@@ -10,7 +10,6 @@ class Review(BaseModel):
     id: Mapped[int] = mapped_column(
         Integer,
         primary_key=True,
-        index=True,
         autoincrement=True,
     )
     text = Column(Text, nullable=False)
@@ -18,15 +17,14 @@ class Review(BaseModel):
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
 
     # Relationships
-    user = relationship("OurUsers", back_populates="reviews")
+    # Review lists join the user columns in; never lazy-load per review
+    user = relationship("OurUsers", back_populates="reviews", lazy="raise")
     course = relationship("Course", back_populates="reviews")
-    
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "text": self.text,
-            "user_id": self.user_id,
-            "course_id": self.course_id,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-        } 
\ No newline at end of file
+
+    __table_args__ = (
+        # One review per user and course; also serves the per-user lists
+        Index("ux_reviews_user_course", "user_id", "course_id", unique=True),
+        # Course review lists, in creation order; id completes the
+        # (created_at, id) page cursor, so the seek stays inside the index
+        Index("ix_reviews_course_created_id", "course_id", "created_at", "id"),
+    )
@@ -1,10 +1,11 @@
 import os
 from datetime import datetime, timedelta, timezone
 
-from fastapi import Cookie, Depends, HTTPException
+from fastapi import Cookie, Depends, HTTPException, Request
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import EmailStr
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from starlette import status
 
@@ -60,40 +61,32 @@ def create_refresh_token(user_id: int):
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-### Get current user from cookie ###
-async def get_current_user_jwt(
-    access_token: str = Cookie(None, alias="access_token"),
-    db: Session = Depends(get_db),
-):
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
 
-    if not access_token:
-        return None
 
+### Decode and check an access token; no database access ###
+def decode_access_token(access_token: str) -> dict:
     try:
         # Check if token is blacklisted
         if is_blacklisted(access_token):
-            raise credentials_exception
+            raise credentials_exception()
 
         payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise credentials_exception()
         user_id: int = payload.get("id")
         if user_id is None:
-            raise credentials_exception
+            raise credentials_exception()
         user_role: str = payload.get("role")
         if user_role is None:
-            raise credentials_exception
+            raise credentials_exception()
     except JWTError:
-        raise credentials_exception
-
-    user = db.query(OurUsers).filter(OurUsers.email == email).first()
-    if user is None:
-        raise credentials_exception
+        raise credentials_exception()
 
     return {
         "user_id": user_id,
@@ -102,43 +95,60 @@ async def get_current_user_jwt(
     }
 
 
-### Get current user from cookie (required version) ###
-async def get_current_user_jwt_required(
+### Claims of the access token cookie, decoded once per request ###
+# For endpoints that only need user_id/role: unlike get_current_user_jwt*
+# it doesn't look the user up in the database.
+def get_jwt_claims(
+    request: Request,
+    access_token: str = Cookie(None, alias="access_token"),
+) -> dict:
+    claims = getattr(request.state, "jwt_claims", None)
+    if claims is None:
+        if not access_token:
+            raise credentials_exception()
+        claims = decode_access_token(access_token)
+        request.state.jwt_claims = claims
+    return claims
+
+
+def _check_user_exists(db: Session, email: str) -> None:
+    if not db.query(exists().where(OurUsers.email == email)).scalar():
+        raise credentials_exception()
+
+
+### Get current user from cookie ###
+def get_current_user_jwt(
+    request: Request,
     access_token: str = Cookie(None, alias="access_token"),
     db: Session = Depends(get_db),
 ):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
-
     if not access_token:
-        raise credentials_exception
-
-    try:
-        # Check if token is blacklisted
-        if is_blacklisted(access_token):
-            raise credentials_exception
+        return None
 
-        payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        user_id: int = payload.get("id")
-        if user_id is None:
-            raise credentials_exception
-        user_role: str = payload.get("role")
-        if user_role is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    claims = get_jwt_claims(request, access_token)
+    _check_user_exists(db, claims["email"])
+    return claims
 
-    user = db.query(OurUsers).filter(OurUsers.email == email).first()
-    if user is None:
-        raise credentials_exception
 
-    return {
-        "user_id": user_id,
-        "email": email,
-        "role": user_role,
-    }
+### Get current user from cookie (required version) ###
+def get_current_user_jwt_required(
+    claims: dict = Depends(get_jwt_claims),
+    db: Session = Depends(get_db),
+):
+    _check_user_exists(db, claims["email"])
+    return claims
+
+
+### Role guard for endpoints restricted to some roles ###
+def require_roles(*roles: str):
+    async def role_checker(
+        current_user: dict = Depends(get_current_user_jwt_required),
+    ) -> dict:
+        if current_user.get("role") not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized",
+            )
+        return current_user
+
+    return role_checker
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import BaseModel, Field
 
@@ -40,6 +40,35 @@ class FileUploadResponse(BaseModel):
     file_key: str
 
 
+class PresignedUploadRequest(BaseModel):
+    """Schema for requesting a direct browser-to-S3 upload"""
+
+    filename: str
+    content_type: str
+    course_id: Optional[int] = None
+
+
+class PresignedUploadResponse(BaseModel):
+    """Schema for a pre-signed S3 POST the client sends the file to"""
+
+    url: str
+    fields: Dict[str, str]
+    file_key: str
+
+
+class SubmissionUploadRequest(BaseModel):
+    """Schema for requesting a direct browser-to-S3 assignment submission"""
+
+    filename: str
+    content_type: str
+
+
+class SubmissionConfirmRequest(BaseModel):
+    """Schema for confirming a submission the client uploaded to S3"""
+
+    file_key: str
+
+
 class FileDeleteResponse(BaseModel):
     """Schema for successful file deletion response"""
 
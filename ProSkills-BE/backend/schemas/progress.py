@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional, Literal
 from enum import Enum
 
-from pydantic import BaseModel, ConfigDict, Field, validator, computed_field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 
 class AssignmentStatusEnum(str, Enum):
@@ -78,16 +78,7 @@ class CourseProgressInDB(CourseProgressBase):
 
 
 class CourseProgressResponse(CourseProgressInDB):
-    completion_percentage: float = Field(default=0.0, ge=0.0, le=100.0)
-
-    @validator("completion_percentage", pre=True)
-    def validate_completion_percentage(cls, v):
-        if v is None:
-            return 0.0
-        try:
-            value = float(v)
-            return round(max(0.0, min(100.0, value)), 2)
-        except (TypeError, ValueError):
-            return 0.0
+    # Generated column, already rounded to two places by the database
+    completion_percentage: float = 0.0
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.cache import invalidate_admin_stats, invalidate_courses
+from backend.database import SessionLocal
+from backend.models import Assignment, AssignmentProgress, CourseProgress
+from backend.models.progress import AssignmentStatus
+
+
+# Helper function to ensure course progress record exists
+def get_or_create_course_progress(db: Session, student_id: int, course_id: int):
+    progress = (
+        db.query(CourseProgress)
+        .filter(
+            CourseProgress.student_id == student_id,
+            CourseProgress.course_id == course_id,
+        )
+        .first()
+    )
+
+    if not progress:
+        # Create the record, counting the course's assignments in the same
+        # statement; if a concurrent request created it first nothing is
+        # inserted and that row is read instead
+        progress = db.scalars(
+            pg_insert(CourseProgress)
+            .values(
+                student_id=student_id,
+                course_id=course_id,
+                total_assignments=select(func.count(Assignment.id))
+                .where(Assignment.course_id == course_id)
+                .scalar_subquery(),
+                completed_assignments=0,
+                last_activity=datetime.now(),
+            )
+            .on_conflict_do_nothing(index_elements=["student_id", "course_id"])
+            .returning(CourseProgress)
+        ).first()
+        db.commit()
+        if progress is None:
+            progress = (
+                db.query(CourseProgress)
+                .filter(
+                    CourseProgress.student_id == student_id,
+                    CourseProgress.course_id == course_id,
+                )
+                .one()
+            )
+
+    return progress
+
+
+# Helper function to update course progress after assignment completion
+def update_course_progress(db: Session, student_id: int, course_id: int):
+    updated = update_course_progress_bulk(db, [student_id], course_id)
+    return updated[0] if updated else None
+
+
+# Same for several students of one course; returns the updated rows
+def update_course_progress_bulk(db: Session, student_ids: List[int], course_id: int):
+    # All assignments of the course, and the ones each student has completed
+    # (either COMPLETED or GRADED status); the second subquery correlates to
+    # the course_progress row being updated
+    total_assignments = (
+        select(func.count(Assignment.id))
+        .where(Assignment.course_id == course_id)
+        .scalar_subquery()
+    )
+    completed_assignments = (
+        select(func.count(AssignmentProgress.id))
+        .join(Assignment, Assignment.id == AssignmentProgress.assignment_id)
+        .where(
+            Assignment.course_id == course_id,
+            AssignmentProgress.student_id == CourseProgress.student_id,
+            AssignmentProgress.status.in_(
+                [AssignmentStatus.COMPLETED, AssignmentStatus.GRADED]
+            ),
+        )
+        .scalar_subquery()
+    )
+
+    # Count and write in one UPDATE and read the rows back through RETURNING,
+    # so the whole refresh is a single statement
+    course_progress = db.scalars(
+        update(CourseProgress)
+        .where(
+            CourseProgress.student_id.in_(student_ids),
+            CourseProgress.course_id == course_id,
+        )
+        .values(
+            completed_assignments=completed_assignments,
+            total_assignments=total_assignments,
+            last_activity=datetime.now(),
+        )
+        .returning(CourseProgress),
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    ).all()
+
+    if course_progress:
+        db.commit()
+        invalidate_admin_stats()
+        invalidate_courses(*(row.student_id for row in course_progress))
+
+    return course_progress
+
+
+def update_course_progress_in_background(student_id: int, course_id: int):
+    """Run update_course_progress in its own session, after the response is sent."""
+    db = SessionLocal()
+    try:
+        update_course_progress(db, student_id, course_id)
+    finally:
+        db.close()
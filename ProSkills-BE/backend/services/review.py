@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import Row, delete, exists, insert, select, tuple_, update
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
 
 from backend.models.review import Review
@@ -10,156 +13,207 @@ from backend.models.course import Course
 from backend.schemas.review import ReviewCreate, ReviewUpdate, ReviewWithUserInfo
 
 
-def create_review(db: Session, user_id: int, course_id: int, review_data: ReviewCreate) -> Review:
+# Колонки отзыва с автором для ReviewWithUserInfo: все колонки reviews берутся
+# из таблицы, поэтому новые поля модели не нужно добавлять сюда вручную
+REVIEW_WITH_USER_COLUMNS = (
+    *Review.__table__.columns,
+    OurUsers.first_name.label("user_first_name"),
+    OurUsers.last_name.label("user_last_name"),
+)
+
+
+def encode_review_cursor(created_at: datetime, review_id: int) -> str:
+    """
+    Курсор страницы отзывов: позиция (created_at, id) последнего отзыва
+    """
+    raw = f"{created_at.isoformat()}|{review_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_review_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, review_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(review_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+
+
+def _paginate(query, skip: int, limit: int, cursor: Optional[str]):
+    # С курсором страница ищется по индексу, без пропуска skip строк
+    query = query.order_by(Review.created_at, Review.id)
+    if cursor:
+        query = query.where(tuple_(Review.created_at, Review.id) > decode_review_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+async def create_review(db: AsyncSession, user_id: int, course_id: int, review_data: ReviewCreate) -> Review:
     """
     Создать новый отзыв для курса
     """
-    # Проверяем существование курса
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    # Сразу вставляем отзыв; RETURNING отдает и серверные created_at/updated_at.
+    # Курс, уникальный индекс (user_id, course_id) и пользователя проверяют
+    # ограничения таблицы, поэтому удачное создание стоит одного запроса
+    try:
+        new_review = (await db.scalars(
+            insert(Review)
+            .values(user_id=user_id, course_id=course_id, text=review_data.text)
+            .returning(Review)
+        )).one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+    else:
+        return new_review
+
+    # Вставка не прошла: выясняем причину одним запросом
+    course_exists, already_reviewed = (await db.execute(select(
+        exists().where(Course.id == course_id),
+        exists().where(Review.user_id == user_id, Review.course_id == course_id),
+    ))).one()
+
+    if not course_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Курс с ID {course_id} не найден"
+            detail="Курс не найден"
         )
-    
-    # Проверяем, не оставлял ли пользователь уже отзыв на этот курс
-    existing_review = db.query(Review).filter(
-        Review.user_id == user_id,
-        Review.course_id == course_id
-    ).first()
-    
-    if existing_review:
+
+    if already_reviewed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Вы уже оставили отзыв на этот курс"
         )
-    
-    # Создаем новый отзыв
-    new_review = Review(
-        user_id=user_id,
-        course_id=course_id,
-        text=review_data.text
+
+    # Отзыв мог не создаться только у пользователя, удаленного после выдачи токена
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
     )
-    
-    db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
-    return new_review
 
 
-def get_course_reviews(db: Session, course_id: int, skip: int = 0, limit: int = 100) -> List[dict]:
+async def get_course_reviews(
+    db: AsyncSession,
+    course_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> List[Row]:
     """
     Получить все отзывы для курса с информацией о пользователях
     """
-    # Проверяем существование курса
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    # Плоские строки одного JOIN (без N+1 и без ORM-объектов); схема
+    # ReviewWithUserInfo читает их как атрибуты
+    reviews = (await db.execute(_paginate(
+        select(*REVIEW_WITH_USER_COLUMNS)
+        .join(OurUsers, Review.user_id == OurUsers.id)
+        .where(Review.course_id == course_id),
+        skip,
+        limit,
+        cursor,
+    ))).all()
+
+    # Существование курса проверяем, только если отзывов нет
+    if not reviews and not await db.scalar(select(exists().where(Course.id == course_id))):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Курс с ID {course_id} не найден"
+            detail="Курс не найден"
         )
     
-    # Получаем отзывы с информацией о пользователях
-    reviews = (
-        db.query(
-            Review.id,
-            Review.text,
-            Review.user_id,
-            Review.course_id,
-            Review.created_at,
-            Review.updated_at,
-            OurUsers.first_name.label("user_first_name"),
-            OurUsers.last_name.label("user_last_name")
-        )
-        .join(OurUsers, Review.user_id == OurUsers.id)
-        .filter(Review.course_id == course_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    
-    return [
-        {
-            "id": review.id,
-            "text": review.text,
-            "user_id": review.user_id,
-            "course_id": review.course_id,
-            "created_at": review.created_at,
-            "updated_at": review.updated_at,
-            "user_first_name": review.user_first_name,
-            "user_last_name": review.user_last_name
-        }
-        for review in reviews
-    ]
-
-
-def update_review(db: Session, review_id: int, user_id: int, review_data: ReviewUpdate) -> Review:
+    return reviews
+
+
+async def update_review(db: AsyncSession, review_id: int, user_id: int, review_data: ReviewUpdate) -> Review:
     """
     Обновить существующий отзыв
     """
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if not review:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Отзыв с ID {review_id} не найден"
-        )
-    
-    # Проверяем, принадлежит ли отзыв пользователю
-    if review.user_id != user_id:
+    # Обновляем только свой отзыв; RETURNING заменяет отдельный SELECT
+    review = (await db.scalars(
+        update(Review)
+        .where(Review.id == review_id, Review.user_id == user_id)
+        .values(text=review_data.text)
+        .returning(Review),
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    )).first()
+
+    if review is None:
+        # Ничего не обновлено: отзыва нет или он чужой
+        if not await review_exists(db, review_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Отзыв с ID {review_id} не найден"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Вы можете редактировать только свои отзывы"
         )
-    
-    # Обновляем отзыв
-    review.text = review_data.text
-    
-    db.commit()
-    db.refresh(review)
+
+    await db.commit()
     return review
 
 
-def delete_review(db: Session, review_id: int, user_id: int, is_admin: bool = False) -> bool:
+async def delete_review(db: AsyncSession, review_id: int, user_id: int, is_admin: bool = False) -> int:
     """
-    Удалить существующий отзыв
+    Удалить существующий отзыв и вернуть ID его курса
     """
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if not review:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Отзыв с ID {review_id} не найден"
-        )
-    
-    # Проверяем, принадлежит ли отзыв пользователю или является ли пользователь администратором
-    if review.user_id != user_id and not is_admin:
+    # Администраторы удаляют любые отзывы, остальные - только свои
+    stmt = delete(Review).where(Review.id == review_id)
+    if not is_admin:
+        stmt = stmt.where(Review.user_id == user_id)
+
+    course_id = await db.scalar(
+        stmt.returning(Review.course_id),
+        execution_options={"synchronize_session": False},
+    )
+
+    if course_id is None:
+        # Ничего не удалено: отзыва нет или он чужой
+        if not await review_exists(db, review_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Отзыв не найден"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Вы можете удалять только свои отзывы"
         )
-    
-    # Удаляем отзыв
-    db.delete(review)
-    db.commit()
-    return True
 
+    await db.commit()
+    return course_id
 
-def get_user_reviews(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Review]:
+
+async def get_user_reviews(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> List[Review]:
     """
     Получить все отзывы, оставленные пользователем
     """
-    reviews = (
-        db.query(Review)
-        .filter(Review.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    reviews = (await db.scalars(_paginate(
+        select(Review).where(Review.user_id == user_id),
+        skip,
+        limit,
+        cursor,
+    ))).all()
     
     return reviews
 
 
-def get_review_by_id(db: Session, review_id: int) -> Optional[Review]:
+async def review_exists(db: AsyncSession, review_id: int) -> bool:
+    """
+    Проверить, что отзыв существует, не загружая его
+    """
+    return await db.scalar(select(exists().where(Review.id == review_id)))
+
+
+async def get_review_by_id(db: AsyncSession, review_id: int) -> Optional[Review]:
     """
     Получить отзыв по его ID
     """
-    return db.query(Review).filter(Review.id == review_id).first() 
\ No newline at end of file
+    return await db.scalar(select(Review).where(Review.id == review_id)) 
\ No newline at end of file
@@ -1,4 +1,5 @@
 from fastapi import HTTPException, status
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 
 from backend.models.ourusers import OurUsers
@@ -6,8 +7,7 @@ from backend.models.ourusers import OurUsers
 
 def check_if_user_exists(db: Session, email: str, create_user_request=None):
     if email:  # Перевіряємо email, тільки якщо він переданий
-        existing_email = db.query(OurUsers).filter(OurUsers.email == email).first()
-        if existing_email:
+        if db.query(exists().where(OurUsers.email == email)).scalar():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already in use.",
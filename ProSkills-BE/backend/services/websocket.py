@@ -1,94 +1,261 @@
-from fastapi import WebSocket
-from typing import Dict, List, Set
-import json
+import asyncio
+import contextlib
+import logging
 
+from fastapi import WebSocket, WebSocketDisconnect, status
+from typing import Dict, Iterable, Optional, Set
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+
+from backend.config import RedisSettings
+from backend.constants import WS_PING_INTERVAL, WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Каналы Redis, через которые рассылки доходят до соединений всех воркеров
+ROOM_CHANNEL_PREFIX = "ws:room:"
+BROADCAST_CHANNEL = "ws:broadcast"
+# Пауза перед переподключением подписчика после ошибки Redis, в секундах
+PUBSUB_RETRY_DELAY = 1
+
+# Ошибки отправки, после которых соединение считается мертвым: клиент
+# отключился (Starlette превращает ошибку сокета в WebSocketDisconnect),
+# сокет уже закрыт (RuntimeError) или клиент не принял сообщение за
+# WS_SEND_TIMEOUT (TimeoutError - подкласс OSError)
+TERMINAL_SEND_ERRORS = (WebSocketDisconnect, OSError, RuntimeError)
 
 
 class WebSocketManager:
     def __init__(self):
         # Активные соединения (все подключенные клиенты)
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
         
         # Словарь для хранения соединений по комнатам
-        # Ключ = ID комнаты (например, "course_1"), Значение = список соединений
-        self.room_connections: Dict[str, List[WebSocket]] = {}
+        # Ключ = ID комнаты (например, "course_1"), Значение = множество соединений
+        self.room_connections: Dict[str, Set[WebSocket]] = {}
+
+        # Обратный индекс: комнаты каждого соединения, чтобы при отключении
+        # не обходить все комнаты сервера
+        self.connection_rooms: Dict[WebSocket, Set[str]] = {}
+
+        # Очередь исходящих сообщений и задача, которая отправляет их клиенту.
+        # Рассылка только кладет сообщение в очереди и не ждет медленных клиентов
+        self.send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.relay_tasks: Dict[WebSocket, asyncio.Task] = {}
+
+        # Redis pub/sub: рассылка публикуется один раз, а подписчик каждого
+        # воркера раздает ее своим соединениям. Без Redis рассылка локальная
+        self.redis: Optional[aioredis.Redis] = None
+        self.subscriber_task: Optional[asyncio.Task] = None
+        self.heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Запускает пинг соединений, подключается к Redis и запускает подписчика рассылок"""
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+
+        settings = RedisSettings()
+        client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+        )
+        try:
+            await client.ping()
+        except (redis.RedisError, OSError) as e:
+            logger.warning("Redis not available, WebSocket broadcasts stay within this worker: %s", e)
+            await client.aclose()
+            return
+
+        self.redis = client
+        self.subscriber_task = asyncio.create_task(self._subscribe())
+
+    async def stop(self):
+        """Останавливает пинг и подписчика и закрывает соединение с Redis"""
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        if self.subscriber_task is not None:
+            self.subscriber_task.cancel()
+            self.subscriber_task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
     
     async def connect(self, websocket: WebSocket):
         """Принимает новое WebSocket соединение"""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
+
+        queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.send_queues[websocket] = queue
+        self.relay_tasks[websocket] = asyncio.create_task(self._relay(websocket, queue))
         return websocket
     
     def disconnect(self, websocket: WebSocket):
         """Обрабатывает отключение WebSocket"""
-        # Удаляем из списка активных соединений
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        # Удаляем из активных соединений
+        self.active_connections.discard(websocket)
+
+        # Останавливаем отправку; неотправленные сообщения теряются
+        self.send_queues.pop(websocket, None)
+        task = self.relay_tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
         
-        # Удаляем из всех комнат
-        for room_id, connections in list(self.room_connections.items()):
-            if websocket in connections:
-                connections.remove(websocket)
-                # Если комната пуста, удаляем её
-                if not connections:
-                    del self.room_connections[room_id]
+        # Удаляем из комнат, в которых было соединение
+        for room_id in self.connection_rooms.pop(websocket, ()):
+            self._discard_from_room(websocket, room_id)
     
     def join_room(self, websocket: WebSocket, room_id: str):
         """Добавляет соединение в комнату"""
-        if room_id not in self.room_connections:
-            self.room_connections[room_id] = []
-        
-        if websocket not in self.room_connections[room_id]:
-            self.room_connections[room_id].append(websocket)
+        self.room_connections.setdefault(room_id, set()).add(websocket)
+        self.connection_rooms.setdefault(websocket, set()).add(room_id)
     
     def leave_room(self, websocket: WebSocket, room_id: str):
         """Удаляет соединение из комнаты"""
-        if room_id in self.room_connections:
-            if websocket in self.room_connections[room_id]:
-                self.room_connections[room_id].remove(websocket)
-            
-            # Если комната пустая, удаляем её
-            if not self.room_connections[room_id]:
-                del self.room_connections[room_id]
+        rooms = self.connection_rooms.get(websocket)
+        if rooms is not None:
+            rooms.discard(room_id)
+        self._discard_from_room(websocket, room_id)
+
+    def _discard_from_room(self, websocket: WebSocket, room_id: str):
+        # Опустевшая комната остается до очистки в _heartbeat: если в нее
+        # сразу вернутся (переподключение), множество не создается заново
+        connections = self.room_connections.get(room_id)
+        if connections is not None:
+            connections.discard(websocket)
+
+    def _sweep_empty_rooms(self):
+        """Удаляет комнаты, в которых не осталось соединений"""
+        empty = [room_id for room_id, connections in self.room_connections.items() if not connections]
+        for room_id in empty:
+            del self.room_connections[room_id]
+
+    async def _relay(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Отправляет клиенту сообщения из его очереди по одному"""
+        while True:
+            payload = await queue.get()
+            try:
+                await asyncio.wait_for(websocket.send_text(payload), WS_SEND_TIMEOUT)
+            except TERMINAL_SEND_ERRORS as e:
+                # Разорванное или зависшее соединение удаляем и закрываем:
+                # иначе эндпоинт продолжит читать из него, а клиент, считая
+                # себя подключенным, не переподключится
+                logger.warning("Error sending message: %r", e)
+                self.disconnect(websocket)
+                with contextlib.suppress(Exception):
+                    await asyncio.wait_for(websocket.close(code=status.WS_1011_INTERNAL_ERROR), WS_SEND_TIMEOUT)
+                return
+            except Exception:
+                # Остальные ошибки касаются одного сообщения, соединение живо
+                logger.exception("Error sending message")
+
+    async def _heartbeat(self):
+        """
+        Периодически отправляет клиентам короткое сообщение.
+
+        Мертвое соединение иначе обнаружилось бы только при следующей рассылке
+        в его комнату; теперь relay получает ошибку отправки не позже чем через
+        WS_PING_INTERVAL и удаляет соединение. Заодно прокси не закрывают
+        простаивающие соединения, а опустевшие комнаты удаляются
+        """
+        payload = encode_message({"event": "ping"})
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            self._sweep_empty_rooms()
+            for queue in self.send_queues.values():
+                # Отстающему клиенту пинг не нужен: ради него не вытесняем сообщения
+                if not queue.full():
+                    queue.put_nowait(payload)
+
+    async def _subscribe(self):
+        """Раздает своим соединениям рассылки, опубликованные любым воркером"""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(BROADCAST_CHANNEL)
+                await pubsub.psubscribe(f"{ROOM_CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        room_id = message["channel"][len(ROOM_CHANNEL_PREFIX):]
+                        connections = self.room_connections.get(room_id)
+                        if connections:
+                            self._enqueue(connections, message["data"])
+                    elif message["type"] == "message":
+                        self._enqueue(self.active_connections, message["data"])
+            except (redis.RedisError, OSError) as e:
+                # Рассылки, опубликованные до переподключения, теряются
+                logger.warning("WebSocket pub/sub subscriber failed, reconnecting: %s", e)
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(PUBSUB_RETRY_DELAY)
+
+    async def _publish(self, channel: str, payload: str) -> bool:
+        """Публикует рассылку для всех воркеров; False, если Redis недоступен"""
+        if self.redis is None:
+            return False
+        try:
+            await self.redis.publish(channel, payload)
+            return True
+        except (redis.RedisError, OSError) as e:
+            logger.warning("Error publishing WebSocket message, sending locally: %s", e)
+            return False
+
+    def _enqueue(self, connections: Iterable[WebSocket], payload: str):
+        """Ставит закодированное сообщение в очереди соединений"""
+        # Обход не содержит await, поэтому disconnect не может изменить
+        # множество соединений посреди цикла, и копировать его не нужно
+        get_queue = self.send_queues.get
+        for websocket in connections:
+            queue = get_queue(websocket)
+            if queue is None:
+                continue
+            # Клиент слишком отстал: отбрасываем самое старое сообщение
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Отправляет сообщение конкретному соединению"""
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            print(f"Error sending message: {e}")
-    
+        self._enqueue((websocket,), encode_message(message))
+
+    async def broadcast_raw(self, payload: str, room_id: Optional[str] = None):
+        """
+        Рассылает уже закодированное JSON-сообщение комнате, а без room_id -
+        всем подключенным клиентам. Payload уходит клиентам как есть
+        """
+        if room_id is None:
+            channel, connections = BROADCAST_CHANNEL, self.active_connections
+        else:
+            channel = f"{ROOM_CHANNEL_PREFIX}{room_id}"
+            connections = self.room_connections.get(room_id)
+
+        if not await self._publish(channel, payload) and connections:
+            self._enqueue(connections, payload)
+
     async def broadcast(self, message: dict):
         """Отправляет сообщение всем подключенным клиентам"""
-        disconnected = []
-        
-        for websocket in self.active_connections:
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting message: {e}")
-                disconnected.append(websocket)
-        
-        # Удаляем разорванные соединения
-        for websocket in disconnected:
-            self.disconnect(websocket)
+        await self.broadcast_raw(encode_message(message))
     
     
     async def broadcast_to_room(self, message: dict, room_id: str):
         "Send a message to everyone in the room"
-        if room_id not in self.room_connections:
-            return
+        await self.broadcast_raw(encode_message(message), room_id)
+            
 
-        disconnected = []
+def encode_message(message: dict) -> str:
+    """
+    Кодирует событие в JSON для отправки клиентам.
 
-        for websocket in self.room_connections[room_id]:
-            try: 
-                await websocket.send_json(message)
-            except Exception as e:
-                print(f"Error sending message to room {room_id}: {e}")
-                disconnected.append(websocket)
+    События - маленькие словари из нескольких полей, и orjson кодирует их
+    за доли микросекунды; кодирование выполняется один раз на рассылку,
+    поэтому отдельный сериализатор со схемами (msgspec) ничего бы не дал
+    """
+    # Encoded once for all sockets and workers; clients still get text frames
+    return orjson.dumps(message, default=str).decode()
 
-        for websocket in disconnected:
-            self.disconnect(websocket)
-            
-manager = WebSocketManager()
\ No newline at end of file
+
+manager = WebSocketManager()
@@ -1,3 +1,4 @@
+import logging
 import os
 from typing import Optional
 
@@ -7,6 +8,8 @@ from sqlalchemy.orm import Session
 from backend.models import OurUsers
 from backend.roles import UserRole
 
+logger = logging.getLogger(__name__)
+
 # Password encryption utility
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -33,7 +36,7 @@ def create_admin_user(db: Session) -> Optional[OurUsers]:
     admin_user = db.query(OurUsers).filter(OurUsers.email == admin_email).first()
 
     if admin_user:
-        print(f"Admin user {admin_email} already exists.")
+        logger.info("Admin user %s already exists.", admin_email)
         return admin_user
 
     # Create a new admin user
@@ -51,10 +54,9 @@ def create_admin_user(db: Session) -> Optional[OurUsers]:
     try:
         db.add(new_admin)
         db.commit()
-        db.refresh(new_admin)
-        print(f"Created admin user with email: {admin_email}")
+        logger.info("Created admin user with email: %s", admin_email)
         return new_admin
     except Exception as e:
         db.rollback()
-        print(f"Error creating admin user: {str(e)}")
+        logger.error("Error creating admin user: %s", e)
         return None
@@ -14,7 +14,7 @@ poetry install
 
 # 3. Запуск FastAPI
 echo "🧠 Запуск FastAPI (uvicorn)..."
-poetry run uvicorn backend.main:app --reload --host 0.0.0.0 --port 5001
+poetry run uvicorn backend.main:app --reload --host 0.0.0.0 --port 5001 --ws-max-size 4096
 
 # 4. Після завершення
 echo "✅ Сервер зупинено або завершився."
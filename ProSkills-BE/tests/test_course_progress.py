@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from backend.models import AssignmentProgress, CourseProgress
+from backend.models.progress import AssignmentStatus
+from backend.services.course_progress import update_course_progress_bulk
+
+
+def add_progress(db, student, assignment, status):
+    db.add(AssignmentProgress(
+        student_id=student.id,
+        assignment_id=assignment.id,
+        course_id=assignment.course_id,
+        status=status,
+    ))
+
+
+def test_update_course_progress_bulk_counts_assignments(db, course, make_user, make_assignment):
+    first, second, untouched = make_user(), make_user(), make_user()
+    assignments = [make_assignment(f"Assignment {i}") for i in range(3)]
+    for student in (first, second, untouched):
+        db.add(CourseProgress(student_id=student.id, course_id=course.id))
+    add_progress(db, first, assignments[0], AssignmentStatus.COMPLETED)
+    add_progress(db, first, assignments[1], AssignmentStatus.GRADED)
+    # Submitted but not yet graded work doesn't count as completed
+    add_progress(db, first, assignments[2], AssignmentStatus.SUBMITTED)
+    add_progress(db, second, assignments[0], AssignmentStatus.GRADED)
+    db.commit()
+
+    rows = update_course_progress_bulk(db, [first.id, second.id], course.id)
+
+    progress = {row.student_id: row for row in rows}
+    assert set(progress) == {first.id, second.id}
+    assert progress[first.id].completed_assignments == 2
+    assert progress[first.id].total_assignments == 3
+    assert progress[first.id].completion_percentage == Decimal("66.67")
+    assert progress[second.id].completed_assignments == 1
+    assert progress[second.id].completion_percentage == Decimal("33.33")
+    assert all(row.last_activity is not None for row in rows)
+
+    # Students outside the list are not touched
+    other = db.query(CourseProgress).filter_by(student_id=untouched.id).one()
+    assert other.total_assignments == 0
+    assert other.last_activity is None
+
+
+def test_completion_percentage_is_generated_by_the_database(db, course, make_user):
+    student = make_user()
+    progress = CourseProgress(student_id=student.id, course_id=course.id)
+    db.add(progress)
+    db.commit()
+    db.refresh(progress)
+    # No assignments yet: no division by zero
+    assert progress.completion_percentage == Decimal("0")
+
+    progress.completed_assignments = 4
+    progress.total_assignments = 4
+    db.commit()
+    db.refresh(progress)
+    assert progress.completion_percentage == Decimal("100.00")
+
+
+def test_update_course_progress_bulk_without_rows(db, course, make_user):
+    student = make_user()
+
+    assert update_course_progress_bulk(db, [student.id], course.id) == []
@@ -0,0 +1,55 @@
+from backend.controllers.filesForCourse import record_submission
+from backend.models import AssignmentProgress
+from backend.models.progress import AssignmentStatus
+
+
+def test_record_submission_inserts_progress(db, make_user, make_assignment):
+    student = make_user()
+    assignment = make_assignment()
+
+    record_submission(db, student.id, assignment.id, assignment.course_id, "first.txt")
+
+    progress = db.query(AssignmentProgress).one()
+    assert progress.student_id == student.id
+    assert progress.assignment_id == assignment.id
+    assert progress.course_id == assignment.course_id
+    assert progress.status == AssignmentStatus.SUBMITTED
+    assert progress.submission_file_key == "first.txt"
+    assert progress.submitted_at is not None
+
+
+def test_record_submission_updates_existing_progress(db, make_user, make_assignment):
+    student = make_user()
+    assignment = make_assignment()
+    db.add(AssignmentProgress(
+        student_id=student.id,
+        assignment_id=assignment.id,
+        course_id=assignment.course_id,
+        status=AssignmentStatus.GRADED,
+        score=80,
+    ))
+    db.commit()
+
+    record_submission(db, student.id, assignment.id, assignment.course_id, "first.txt")
+    record_submission(db, student.id, assignment.id, assignment.course_id, "second.txt")
+
+    # Resubmitting updates the one row instead of adding another
+    progress = db.query(AssignmentProgress).populate_existing().one()
+    assert progress.status == AssignmentStatus.SUBMITTED
+    assert progress.submission_file_key == "second.txt"
+    # Columns outside the submission are left alone
+    assert progress.score == 80
+
+
+def test_record_submission_keeps_students_apart(db, make_user, make_assignment):
+    first, second = make_user(), make_user()
+    assignment = make_assignment()
+
+    record_submission(db, first.id, assignment.id, assignment.course_id, "first.txt")
+    record_submission(db, second.id, assignment.id, assignment.course_id, "second.txt")
+
+    keys = {
+        progress.student_id: progress.submission_file_key
+        for progress in db.query(AssignmentProgress)
+    }
+    assert keys == {first.id: "first.txt", second.id: "second.txt"}
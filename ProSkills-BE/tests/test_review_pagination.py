@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from backend.models import Review
+from backend.services.review import _paginate, decode_review_cursor, encode_review_cursor
+
+
+def test_review_cursor_round_trip():
+    created_at = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+    cursor = encode_review_cursor(created_at, 42)
+
+    assert decode_review_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm8gc2VwYXJhdG9y", "bm90LWEtZGF0ZXwx"])
+def test_decode_review_cursor_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_review_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_paginate_seeks_past_the_cursor(db, course, make_user):
+    # Several reviews share a timestamp, so only the id breaks the tie
+    created = [
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 2, tzinfo=timezone.utc),
+        datetime(2025, 1, 2, tzinfo=timezone.utc),
+        datetime(2025, 1, 2, tzinfo=timezone.utc),
+        datetime(2025, 1, 3, tzinfo=timezone.utc),
+    ]
+    for created_at in created:
+        db.add(Review(
+            text="Review",
+            user_id=make_user().id,
+            course_id=course.id,
+            created_at=created_at,
+        ))
+    db.commit()
+    query = select(Review.id, Review.created_at).where(Review.course_id == course.id)
+    expected = db.execute(_paginate(query, 0, len(created), None)).all()
+
+    pages, cursor = [], None
+    while True:
+        page = db.execute(_paginate(query, 0, 2, cursor)).all()
+        if not page:
+            break
+        pages.append(page)
+        last = page[-1]
+        cursor = encode_review_cursor(last.created_at, last.id)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row for page in pages for row in page] == expected
+
+
+def test_paginate_uses_skip_without_cursor(db, course, make_user):
+    for _ in range(3):
+        db.add(Review(text="Review", user_id=make_user().id, course_id=course.id))
+    db.commit()
+    query = select(Review.id).where(Review.course_id == course.id)
+
+    ids = db.scalars(_paginate(query, 0, 3, None)).all()
+
+    assert db.scalars(_paginate(query, 1, 2, None)).all() == ids[1:]
@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.middlewares import upload_limit
+from backend.middlewares.upload_limit import setup_upload_limit
+
+LIMIT = 1024
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(upload_limit, "MAX_UPLOAD_REQUEST_SIZE", LIMIT)
+    app = FastAPI()
+    setup_upload_limit(app)
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"received": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_rejects_oversized_multipart_upload(client):
+    response = client.post("/upload", files={"file": ("big.txt", b"x" * (LIMIT + 1))})
+
+    assert response.status_code == 413
+    assert "File too large" in response.json()["detail"]
+
+
+def test_accepts_multipart_upload_within_limit(client):
+    response = client.post("/upload", files={"file": ("small.txt", b"x" * 100)})
+
+    assert response.status_code == 200
+
+
+def test_ignores_large_non_multipart_body(client):
+    # Only multipart uploads are limited; JSON bodies are validated elsewhere
+    response = client.post("/upload", content=b"x" * (LIMIT * 2))
+
+    assert response.status_code == 200
+    assert response.json() == {"received": LIMIT * 2}